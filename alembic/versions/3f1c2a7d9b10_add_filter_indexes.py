@@ -0,0 +1,40 @@
+"""Add indexes backing list filters and sorts
+
+Revision ID: 3f1c2a7d9b10
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a7d9b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Index name, table and column of every index added
+INDEXES = [
+    ("ix_plans_price", "plans", "price"),
+    ("ix_processing_info_pricing", "processing_info", "pricing"),
+    ("ix_solutions_data_pricing", "solutions_data", "pricing"),
+]
+
+
+def _existing_indexes(table: str) -> set:
+    """Names of the indexes of a table, which create_tables.py may have made."""
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    for name, table, column in INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, [column])
+
+
+def downgrade() -> None:
+    for name, table, _ in INDEXES:
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,36 @@
+"""Add the table of idempotency keys
+
+Revision ID: 5e9a0b3c7d21
+Revises: 8c4d2e6f1a57
+Create Date: 2026-10-18 12:00:00.000000
+
+Stores the responses of POST requests sent with an Idempotency-Key header
+until they expire.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e9a0b3c7d21'
+down_revision = '8c4d2e6f1a57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('id', sa.String(length=64), nullable=False),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('status_code', sa.SmallInteger(), nullable=True),
+        sa.Column('response', sa.LargeBinary(length=2 ** 24), nullable=True),
+        sa.Column('expires_at', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_idempotency_keys_expires_at', 'idempotency_keys', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_idempotency_keys_expires_at', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
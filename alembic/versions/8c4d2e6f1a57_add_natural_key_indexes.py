@@ -0,0 +1,52 @@
+"""Make the indexes of natural keys unique
+
+Revision ID: 8c4d2e6f1a57
+Revises: 3f1c2a7d9b10
+Create Date: 2026-10-18 09:00:00.000000
+
+Upserts by natural key rely on these indexes to detect an existing record.
+Duplicate keys must be merged before upgrading.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4d2e6f1a57'
+down_revision = '3f1c2a7d9b10'
+branch_labels = None
+depends_on = None
+
+# Index name, table and column of every natural key, and whether a
+# non-unique index existed before
+INDEXES = [
+    ("ix_faqs_question", "faqs", "question", True),
+    ("ix_images_src", "images", "src", False),
+    ("ix_types_title", "types", "title", True),
+    ("ix_processing_info_title", "processing_info", "title", True),
+    ("ix_solutions_data_title", "solutions_data", "title", True),
+]
+
+
+def _existing_indexes(table: str) -> dict:
+    """Uniqueness of the indexes of a table, by name."""
+    indexes = sa.inspect(op.get_bind()).get_indexes(table)
+    return {index["name"]: bool(index["unique"]) for index in indexes}
+
+
+def upgrade() -> None:
+    for name, table, column, _ in INDEXES:
+        existing = _existing_indexes(table)
+        if existing.get(name):
+            continue
+        if name in existing:
+            op.drop_index(name, table_name=table)
+        op.create_index(name, table, [column], unique=True)
+
+
+def downgrade() -> None:
+    for name, table, column, indexed in INDEXES:
+        if _existing_indexes(table).get(name):
+            op.drop_index(name, table_name=table)
+            if indexed:
+                op.create_index(name, table, [column])
@@ -0,0 +1,118 @@
+"""
+Admin API endpoints.
+
+This module provides endpoints for inspecting and flushing the caches. Every
+endpoint requires the ``ADMIN_TOKEN`` setting in the X-Admin-Token header.
+"""
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.api.routing import (
+    cache_hits_total,
+    coalesced_total,
+    requests_total,
+    stale_hits_total,
+)
+from app.core import counts, existence
+from app.core.cache import backend, cache_stats, clear_caches, invalidate_prefix, invalidate_table
+from app.core.deps import require_admin
+from app.database.base import Base
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/cache/stats")
+def read_cache_stats() -> Dict[str, Any]:
+    """
+    Describe the caches and how each router uses them.
+    
+    Returns:
+        Stats of every in-process cache, GET counts per router, and the kind
+        of shared backend
+    """
+    return {
+        "caches": cache_stats(),
+        "routers": router_stats(),
+        "backend": {"type": type(backend).__name__, "shared": backend.shared},
+    }
+
+
+@router.post("/cache/flush")
+def flush_cache(
+    table: Optional[str] = None,
+    id: Optional[int] = None,
+    prefix: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Flush cached entries.
+    
+    Without parameters every cache is cleared. A table flush drops every
+    entry built from the table and bumps its version, which retires the
+    cached responses of every worker; adding an id limits the in-process
+    part to the entries holding that row. A prefix flush drops the entries
+    whose key starts with it, such as ``bundle:``, from the shared backend
+    too.
+    
+    Args:
+        table: Name of the table to flush
+        id: Primary key of the row to flush, requires ``table``
+        prefix: Key prefix to flush
+        
+    Returns:
+        Number of entries removed
+        
+    Raises:
+        HTTPException: If the table does not exist or the parameters conflict
+    """
+    if id is not None and table is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Flushing an id requires a table"
+        )
+    if table is not None and prefix is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Flush either a table or a prefix"
+        )
+    if table is not None and table not in Base.metadata.tables:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Table with name {table} not found"
+        )
+    
+    if table is not None:
+        if id is None:
+            existence.bitmaps.pop(table, None)
+            counts.counters.pop(table, None)
+        else:
+            existence.record_writes([(table, id)], [])
+        return {"removed": invalidate_table(table, id)}
+    if prefix is not None:
+        return {"removed": invalidate_prefix(prefix)}
+    removed = sum(stats["entries"] for stats in cache_stats().values())
+    clear_caches()
+    existence.bitmaps.clear()
+    counts.counters.clear()
+    return {"removed": removed}
+
+
+def router_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Summarize the GET requests handled by each resource router.
+    
+    Returns:
+        Requests, response cache hits (stale ones included), stale hits,
+        coalesced requests and hit rate, by router name
+    """
+    stats: Dict[str, Dict[str, Any]] = {}
+    counters = {
+        "requests": requests_total,
+        "cache_hits": cache_hits_total,
+        "stale_hits": stale_hits_total,
+        "coalesced": coalesced_total,
+    }
+    for field, counter in counters.items():
+        for labels, value in counter.samples():
+            route = stats.setdefault(labels["route"], dict.fromkeys(counters, 0))
+            route[field] = int(value)
+    for route in stats.values():
+        route["hit_rate"] = route["cache_hits"] / route["requests"] if route["requests"] else None
+    return stats
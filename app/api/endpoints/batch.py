@@ -0,0 +1,220 @@
+"""
+Batch API endpoints.
+
+This module provides an endpoint running an ordered list of creates, updates
+and deletes across resources in one request and one transaction. Operations
+may refer to the records written by earlier ones, so a type can be created
+with a new image in a single round trip, and nothing is written unless every
+operation succeeds.
+"""
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Type
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.routing import IdempotentRoute
+from app.core import fieldsets, streaming
+from app.core.deps import DB
+from app.crud.base import CRUDBase
+from app.crud.category import category as category_crud
+from app.crud.faq import faq as faq_crud
+from app.crud.image import image as image_crud
+from app.crud.menu_option import menu_option as menu_option_crud
+from app.crud.option import option as option_crud
+from app.crud.plan import plan as plan_crud
+from app.crud.processing_info import processing_info as processing_info_crud
+from app.crud.solutions_data import solutions_data as solutions_data_crud
+from app.crud.type import type as type_crud
+from app.schemas.batch import BatchOperation, BatchRequest, BatchResponse, BatchResult
+from app.schemas.category import Category, CategoryCreate, CategoryUpdate
+from app.schemas.faq import FAQ, FAQCreate, FAQUpdate
+from app.schemas.image import Image, ImageCreate, ImageUpdate
+from app.schemas.menu_option import MenuOption, MenuOptionCreate, MenuOptionUpdate
+from app.schemas.option import Option, OptionCreate, OptionUpdate
+from app.schemas.plan import Plan, PlanCreate, PlanUpdate
+from app.schemas.processing_info import (
+    ProcessingInfoCreate,
+    ProcessingInfoSchema,
+    ProcessingInfoUpdate,
+)
+from app.schemas.solutions_data import (
+    SolutionsDataCreate,
+    SolutionsDataSchema,
+    SolutionsDataUpdate,
+)
+from app.schemas.type import TypeCreate, TypeSchema, TypeUpdate
+
+router = APIRouter(route_class=IdempotentRoute)
+
+# A reference to a field of the result of an earlier operation, e.g. "$op0.id"
+REFERENCE = re.compile(r"\$op(\d+)\.(\w+)")
+
+
+class Resource(NamedTuple):
+    """A resource that batch operations can write."""
+    crud: CRUDBase
+    create: Type[BaseModel]
+    update: Type[BaseModel]
+    schema: Type[BaseModel]
+
+
+# Resources are named after the path of their router
+RESOURCES: Dict[str, Resource] = {
+    "categories": Resource(category_crud, CategoryCreate, CategoryUpdate, Category),
+    "images": Resource(image_crud, ImageCreate, ImageUpdate, Image),
+    "faqs": Resource(faq_crud, FAQCreate, FAQUpdate, FAQ),
+    "menu-options": Resource(menu_option_crud, MenuOptionCreate, MenuOptionUpdate, MenuOption),
+    "options": Resource(option_crud, OptionCreate, OptionUpdate, Option),
+    "plans": Resource(plan_crud, PlanCreate, PlanUpdate, Plan),
+    "types": Resource(type_crud, TypeCreate, TypeUpdate, TypeSchema),
+    "processing-info": Resource(
+        processing_info_crud, ProcessingInfoCreate, ProcessingInfoUpdate, ProcessingInfoSchema
+    ),
+    "solutions-data": Resource(
+        solutions_data_crud, SolutionsDataCreate, SolutionsDataUpdate, SolutionsDataSchema
+    ),
+}
+
+
+@router.post("", response_model=BatchResponse)
+async def run_batch(db: DB, batch_in: BatchRequest) -> BatchResponse:
+    """
+    Run a batch of operations in order, in one transaction.
+    
+    Any value of an operation, and the id it updates or deletes, may be a
+    reference such as ``"$op0.id"`` to a field of the result of an earlier
+    operation. Each write is flushed as it runs, so later operations see it,
+    and the transaction is committed once every operation has succeeded.
+    
+    Args:
+        db: Database session
+        batch_in: Operations to run
+        
+    Returns:
+        Result of each operation, in order
+        
+    Raises:
+        HTTPException: If an operation names an unknown resource, holds an
+            invalid reference, targets a missing record or conflicts with an
+            existing one; nothing is written
+        RequestValidationError: If the data of an operation is invalid
+    """
+    results: List[BatchResult] = []
+    try:
+        for index, operation in enumerate(batch_in.operations):
+            results.append(await run_operation(db, index, operation, results))
+    except (HTTPException, RequestValidationError):
+        await db.rollback()
+        raise
+    await db.commit()
+    return BatchResponse(results=results)
+
+
+async def run_operation(
+    db: AsyncSession, index: int, operation: BatchOperation, results: List[BatchResult]
+) -> BatchResult:
+    """
+    Run one operation of a batch, without committing it.
+    
+    Args:
+        db: Database session
+        index: Position of the operation in the batch
+        operation: Operation to run
+        results: Results of the earlier operations
+        
+    Returns:
+        Result of the operation
+        
+    Raises:
+        HTTPException: If the operation cannot run
+        RequestValidationError: If its data is invalid
+    """
+    resource = RESOURCES.get(operation.resource)
+    if resource is None:
+        raise _error(index, status.HTTP_400_BAD_REQUEST, f"Unknown resource {operation.resource}")
+    crud = resource.crud
+    data = resolve(operation.data, index, results)
+    
+    id = None
+    if operation.op != "create":
+        id = resolve(operation.id, index, results)
+        if not isinstance(id, int):
+            detail = "The id must be an integer or a reference"
+            raise _error(index, status.HTTP_400_BAD_REQUEST, detail)
+    
+    try:
+        if operation.op == "create":
+            obj_in = _validate(resource.create, data, index)
+            db_obj = await crud.create(db, obj_in=obj_in, commit=False)
+        elif operation.op == "update":
+            obj_in = _validate(resource.update, data, index)
+            db_obj = await crud.update_by_id(db, id=id, obj_in=obj_in, commit=False)
+        else:
+            db_obj = await crud.remove(db, id=id, commit=False)
+    except IntegrityError:
+        raise _error(index, status.HTTP_409_CONFLICT, "Conflicts with an existing record")
+    if db_obj is None:
+        detail = f"Record {id} of {operation.resource} not found"
+        raise _error(index, status.HTTP_404_NOT_FOUND, detail)
+    if operation.op == "delete":
+        return BatchResult(status=status.HTTP_204_NO_CONTENT, id=id)
+    
+    names = streaming.export_fields(resource.schema, None, crud.expandable)
+    return BatchResult(
+        status=status.HTTP_201_CREATED if operation.op == "create" else status.HTTP_200_OK,
+        id=db_obj.id,
+        data=fieldsets.dump(db_obj, resource.schema, names, crud.field_attributes),
+    )
+
+
+def resolve(value: Any, index: int, results: List[BatchResult]) -> Any:
+    """
+    Replace the references in a value by the fields they refer to.
+    
+    Args:
+        value: Id or data of an operation
+        index: Position of the operation in the batch
+        results: Results of the earlier operations
+        
+    Returns:
+        Value with every reference replaced
+        
+    Raises:
+        HTTPException: If a reference is not to an earlier operation, or to
+            a field its result does not have
+    """
+    if isinstance(value, dict):
+        return {key: resolve(item, index, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve(item, index, results) for item in value]
+    match = REFERENCE.fullmatch(value) if isinstance(value, str) else None
+    if match is None:
+        return value
+    target, field = int(match.group(1)), match.group(2)
+    if target >= index:
+        raise _error(index, status.HTTP_400_BAD_REQUEST, f"{value} is not an earlier operation")
+    result = results[target]
+    fields: Dict[str, Any] = {**(result.data or {}), "id": result.id}
+    if field not in fields:
+        raise _error(index, status.HTTP_400_BAD_REQUEST, f"{value} is not a field of the result")
+    return fields[field]
+
+
+def _validate(schema: Type[BaseModel], data: Optional[Dict[str, Any]], index: int) -> BaseModel:
+    """Validate the data of an operation, locating errors in the request body."""
+    try:
+        return schema.model_validate(data)
+    except ValidationError as exc:
+        raise RequestValidationError([
+            {**error, "loc": ("body", "operations", index, "data", *error["loc"])}
+            for error in exc.errors()
+        ])
+
+
+def _error(index: int, status_code: int, detail: str) -> HTTPException:
+    """Build the error answering a batch whose operation failed."""
+    return HTTPException(status_code=status_code, detail=f"Operation {index}: {detail}")
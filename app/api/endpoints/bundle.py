@@ -0,0 +1,228 @@
+"""
+Bundle API endpoints.
+
+This module provides an endpoint returning several resource lists in one
+response. Each bundle is built from the CRUD objects in a single read
+transaction, serialized once and cached until a table it depends on changes.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.routing import SharedGetRoute, response_cache
+from app.core.cache import call_backend
+from app.core.config import settings
+from app.core.deps import DB, etag_matches, make_etag
+from app.crud.base import CRUDBase
+from app.crud.category import category as category_crud
+from app.crud.faq import faq as faq_crud
+from app.crud.image import image as image_crud
+from app.crud.menu_option import menu_option as menu_option_crud
+from app.crud.option import option as option_crud
+from app.crud.plan import plan as plan_crud
+from app.crud.processing_info import processing_info as processing_info_crud
+from app.crud.solutions_data import solutions_data as solutions_data_crud
+from app.crud.type import type as type_crud
+from app.schemas.category import Category
+from app.schemas.faq import FAQ
+from app.schemas.image import Image
+from app.schemas.menu_option import MenuOption
+from app.schemas.option import Option
+from app.schemas.plan import Plan
+from app.schemas.processing_info import ProcessingInfoSchema
+from app.schemas.solutions_data import SolutionsDataSchema
+from app.schemas.type import TypeSchema
+
+router = APIRouter(route_class=SharedGetRoute)
+
+
+class View:
+    """
+    A named list of records that can be included in a bundle.
+    
+    Attributes:
+        crud: CRUD object loading the records
+        schema: Schema serializing each record
+        tables: Names of the tables the records are read from
+        attributes: Schema fields read from a differently named model attribute
+    """
+    
+    def __init__(
+        self,
+        crud: CRUDBase,
+        schema: Type[BaseModel],
+        tables: Tuple[str, ...],
+        attributes: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Initialize a view.
+        
+        Args:
+            crud: CRUD object loading the records
+            schema: Schema serializing each record
+            tables: Names of the tables the records are read from
+            attributes: Schema fields read from a differently named model attribute
+        """
+        self.crud = crud
+        self.schema = schema
+        self.tables = tables
+        self.attributes = attributes or {}
+    
+    async def build(self, db: AsyncSession, limit: int) -> List[Dict[str, Any]]:
+        """
+        Load and serialize the records of the view.
+        
+        Args:
+            db: Database session
+            limit: Maximum number of records to return
+            
+        Returns:
+            List of serialized records
+        """
+        items = []
+        # Bundles embed every relationship their schema has
+        expand = tuple(self.crud.expandable)
+        for obj in await self.crud.get_multi(db, skip=0, limit=limit, expand=expand):
+            data = {
+                field: getattr(obj, self.attributes.get(field, field), None)
+                for field in self.schema.model_fields
+            }
+            items.append(self.schema.model_validate(data).model_dump(mode="json"))
+        return items
+
+
+# Views are named after the path of the router serving the same list
+VIEWS: Dict[str, View] = {
+    "categories": View(category_crud, Category, ("categories",)),
+    "images": View(image_crud, Image, ("images",)),
+    "faqs": View(faq_crud, FAQ, ("faqs",)),
+    "menu-options": View(menu_option_crud, MenuOption, ("menu_options",)),
+    "options": View(option_crud, Option, ("options",)),
+    "plans": View(plan_crud, Plan, ("plans",)),
+    "types": View(type_crud, TypeSchema, ("types", "images"), {"img": "image"}),
+    "processing-info": View(processing_info_crud, ProcessingInfoSchema, ("processing_info",)),
+    "solutions-data": View(
+        solutions_data_crud, SolutionsDataSchema, ("solutions_data", "images"), {"img": "image"}
+    ),
+}
+
+
+@router.get("/")
+async def read_bundle(
+    request: Request,
+    db: DB,
+    views: str = Query(..., description="Comma-separated names of the views to include"),
+    limit: int = 100,
+) -> Response:
+    """
+    Retrieve an ad hoc bundle of views.
+    
+    Args:
+        request: Incoming request
+        db: Database session
+        views: Comma-separated names of the views to include
+        limit: Maximum number of records per view
+        
+    Returns:
+        JSON object mapping each view name to its records
+        
+    Raises:
+        HTTPException: If a view does not exist
+    """
+    names = [name.strip() for name in views.split(",") if name.strip()]
+    return await bundle_response(request, db, names, limit)
+
+
+@router.get("/{bundle_name}")
+async def read_named_bundle(
+    request: Request,
+    db: DB,
+    bundle_name: str,
+    limit: int = 100,
+) -> Response:
+    """
+    Retrieve a bundle configured in the ``BUNDLES`` setting.
+    
+    Args:
+        request: Incoming request
+        db: Database session
+        bundle_name: Name of the bundle
+        limit: Maximum number of records per view
+        
+    Returns:
+        JSON object mapping each view name to its records
+        
+    Raises:
+        HTTPException: If the bundle does not exist
+    """
+    names = settings.BUNDLES.get(bundle_name)
+    if names is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Bundle with name {bundle_name} not found",
+        )
+    return await bundle_response(request, db, names, limit)
+
+
+async def bundle_response(
+    request: Request, db: AsyncSession, names: List[str], limit: int
+) -> Response:
+    """
+    Answer a bundle request from the cache, building the bundle on a miss.
+    
+    The ETag and cache key only depend on the versions of the tables behind
+    the requested views, so writes to other tables keep the bundle cached.
+    
+    Args:
+        request: Incoming request
+        db: Database session, only used on a miss
+        names: Names of the views to include
+        limit: Maximum number of records per view
+        
+    Returns:
+        Serialized bundle, or 304 Not Modified
+        
+    Raises:
+        HTTPException: If a view does not exist or no view was requested
+    """
+    unknown = [name for name in names if name not in VIEWS]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown views: {', '.join(unknown)}" if unknown else "No views requested",
+        )
+    tables = tuple(sorted({table for name in names for table in VIEWS[name].tables}))
+    etag = await call_backend(make_etag, request, tables)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(etag, if_none_match):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    key = "bundle:" + etag
+    body = await call_backend(response_cache.get, key) if settings.RESPONSE_CACHE_ENABLED else None
+    if body is None:
+        body = await build_bundle(db, names, limit)
+        if settings.RESPONSE_CACHE_ENABLED:
+            await call_backend(response_cache.set, key, body)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+async def build_bundle(db: AsyncSession, names: List[str], limit: int) -> bytes:
+    """
+    Build and serialize a bundle.
+    
+    Every view is read through the same session, so they all come from the
+    transaction it begins with the first query.
+    
+    Args:
+        db: Database session
+        names: Names of the views to include
+        limit: Maximum number of records per view
+        
+    Returns:
+        JSON encoded bundle
+    """
+    data = {name: await VIEWS[name].build(db, limit) for name in names}
+    return json.dumps(data, separators=(",", ":")).encode()
@@ -3,39 +3,114 @@ Category API endpoints.
 
 This module provides API endpoints for managing categories.
 """
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 
-from app.core.deps import DB
+from app.api.routing import ResourceRoute
+from app.core import fieldsets, streaming
+from app.core.deps import BulkPayload, DB, Filters, conditional_get, require_existing
+from app.core.fieldsets import parse_fields
+from app.core.filtering import parse_ids, parse_sort
+from app.core.pagination import CountMode
+from app.core.streaming import ExportFormat
+from app.crud.category import category as category_crud
 from app.models.category import Category as CategoryModel
+from app.schemas.bulk import BulkAffected, BulkCreated, BulkUpdate
 from app.schemas.category import Category, CategoryCreate, CategoryUpdate
 
-router = APIRouter()
+router = APIRouter(
+    route_class=ResourceRoute,
+    dependencies=[
+        Depends(conditional_get("categories")),
+        Depends(require_existing("categories", "Category not found")),
+    ],
+)
 
 
 @router.get("/", response_model=List[Category])
-def read_categories(
+async def read_categories(
+    response: Response,
     db: DB,
+    filters: Filters,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    ids: Optional[str] = None,
 ) -> List[CategoryModel]:
     """
     Retrieve all categories.
     
     Args:
+        response: Response carrying the cursor of the next page, the count
+            and the ids with no record
         db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
         skip: Number of records to skip
         limit: Maximum number of records to return
+        cursor: Cursor of the page to read, from the previous page
+        count: How to count the records: "exact", "estimate" or "none"
+        sort: Comma-separated sort columns, "-" prefixed for descending order
+        fields: Comma-separated fields to return, every field if omitted
+        ids: Comma-separated ids of the records to return instead of a page
         
     Returns:
         List of categories
     """
-    return db.query(CategoryModel).offset(skip).limit(limit).all()
+    order = parse_sort(sort)
+    selected = parse_fields(fields, Category)
+    if ids is not None:
+        categories, missing = await category_crud.get_many(db, parse_ids(ids), fields=selected)
+        if missing:
+            response.headers["X-Missing-Ids"] = ",".join(map(str, missing))
+    else:
+        categories = await category_crud.get_multi(
+            db, skip=skip, limit=limit, cursor=cursor, filters=filters, sort=order, fields=selected
+        )
+        next_cursor = category_crud.next_cursor(categories, limit, order)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        total = await category_crud.total(db, count, filters)
+        if total is not None:
+            response.headers["X-Total-Count"] = str(total)
+    if selected:
+        return fieldsets.render(
+            [fieldsets.dump(category, Category, selected) for category in categories], response
+        )
+    return categories
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_categories(
+    response: Response,
+    db: DB,
+    format: ExportFormat = "ndjson",
+    fields: Optional[str] = None,
+) -> StreamingResponse:
+    """
+    Export every category as NDJSON or CSV.
+    
+    Args:
+        response: Response carrying the ETag
+        db: Database session
+        format: "ndjson" for one JSON object per line, or "csv"
+        fields: Comma-separated fields to export, every field if omitted
+        
+    Returns:
+        Streaming response with one record per line, in id order
+    """
+    selected = parse_fields(fields, Category)
+    return streaming.export_response(
+        db, category_crud, Category, format, selected, headers=response.headers
+    )
 
 
 @router.post("/", response_model=Category, status_code=status.HTTP_201_CREATED)
-def create_category(
+async def create_category(
     *,
     db: DB,
     category_in: CategoryCreate,
@@ -50,25 +125,89 @@ def create_category(
     Returns:
         Created category
     """
-    category = CategoryModel(title=category_in.title, link=category_in.link)
-    db.add(category)
-    db.commit()
-    db.refresh(category)
-    return category
+    return await category_crud.create(db, obj_in=category_in)
+
+
+@router.post("/bulk", response_model=BulkCreated, status_code=status.HTTP_201_CREATED)
+async def bulk_create_categories(
+    *,
+    db: DB,
+    categories_in: BulkPayload[CategoryCreate],
+) -> BulkCreated:
+    """
+    Create several categories with multi-row inserts.
+    
+    Args:
+        db: Database session
+        categories_in: Data of each category to create
+        
+    Returns:
+        IDs of the created categories, in the order of the payload
+    """
+    return BulkCreated(ids=await category_crud.create_many(db, objs_in=categories_in))
+
+
+@router.patch("/bulk", response_model=BulkAffected)
+async def bulk_update_categories(
+    *,
+    db: DB,
+    filters: Filters,
+    bulk_in: BulkUpdate[CategoryUpdate],
+) -> BulkAffected:
+    """
+    Update several categories with set-based statements.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        bulk_in: Values with the ids they apply to, or categories with their values
+        
+    Returns:
+        Number of categories updated
+    """
+    affected = await category_crud.update_many(db, obj_in=bulk_in, filters=filters)
+    return BulkAffected(affected=affected)
+
+
+@router.delete("/bulk", response_model=BulkAffected)
+async def bulk_delete_categories(
+    *,
+    db: DB,
+    filters: Filters,
+    ids: Optional[str] = None,
+) -> BulkAffected:
+    """
+    Delete several categories, by ids or filters.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        ids: Comma-separated ids of the categories to delete
+        
+    Returns:
+        Number of categories deleted
+    """
+    selected = parse_ids(ids) if ids is not None else None
+    affected = await category_crud.remove_many(db, ids=selected, filters=filters)
+    return BulkAffected(affected=affected)
 
 
 @router.get("/{category_id}", response_model=Category)
-def read_category(
+async def read_category(
     *,
+    response: Response,
     db: DB,
     category_id: int,
+    fields: Optional[str] = None,
 ) -> CategoryModel:
     """
     Get a specific category by ID.
     
     Args:
+        response: Response carrying the ETag
         db: Database session
         category_id: ID of the category to retrieve
+        fields: Comma-separated fields to return, every field if omitted
         
     Returns:
         Category with the specified ID
@@ -76,17 +215,20 @@ def read_category(
     Raises:
         HTTPException: If category not found
     """
-    category = db.query(CategoryModel).filter(CategoryModel.id == category_id).first()
+    selected = parse_fields(fields, Category)
+    category = await category_crud.get(db, id=category_id, fields=selected)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Category not found",
         )
+    if selected:
+        return fieldsets.render(fieldsets.dump(category, Category, selected), response)
     return category
 
 
 @router.put("/{category_id}", response_model=Category)
-def update_category(
+async def update_category(
     *,
     db: DB,
     category_id: int,
@@ -106,25 +248,17 @@ def update_category(
     Raises:
         HTTPException: If category not found
     """
-    category = db.query(CategoryModel).filter(CategoryModel.id == category_id).first()
+    category = await category_crud.update_by_id(db, id=category_id, obj_in=category_in)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Category not found",
         )
-    
-    update_data = category_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(category, field, value)
-    
-    db.add(category)
-    db.commit()
-    db.refresh(category)
     return category
 
 
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_category(
+async def delete_category(
     *,
     db: DB,
     category_id: int,
@@ -139,12 +273,9 @@ def delete_category(
     Raises:
         HTTPException: If category not found
     """
-    category = db.query(CategoryModel).filter(CategoryModel.id == category_id).first()
-    if not category:
+    if not await category_crud.remove(db, id=category_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Category not found",
         )
-    
-    db.delete(category)
-    db.commit() 
\ No newline at end of file
+    
\ No newline at end of file
@@ -3,39 +3,114 @@ FAQ API endpoints.
 
 This module provides API endpoints for managing FAQs (Frequently Asked Questions).
 """
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 
-from app.core.deps import DB
+from app.api.routing import ResourceRoute
+from app.core import fieldsets, streaming
+from app.core.deps import BulkPayload, DB, Filters, conditional_get, require_existing
+from app.core.fieldsets import parse_fields
+from app.core.filtering import parse_ids, parse_sort
+from app.core.pagination import CountMode
+from app.core.streaming import ExportFormat
+from app.crud.faq import faq as faq_crud
 from app.models.faq import FAQ as FAQModel
+from app.schemas.bulk import BulkAffected, BulkCreated, BulkUpdate
 from app.schemas.faq import FAQ, FAQCreate, FAQUpdate
 
-router = APIRouter()
+router = APIRouter(
+    route_class=ResourceRoute,
+    dependencies=[
+        Depends(conditional_get("faqs")),
+        Depends(require_existing("faqs", "FAQ not found")),
+    ],
+)
 
 
 @router.get("/", response_model=List[FAQ])
-def read_faqs(
+async def read_faqs(
+    response: Response,
     db: DB,
+    filters: Filters,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    ids: Optional[str] = None,
 ) -> List[FAQModel]:
     """
     Retrieve all FAQs.
     
     Args:
+        response: Response carrying the cursor of the next page, the count
+            and the ids with no record
         db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
         skip: Number of records to skip
         limit: Maximum number of records to return
+        cursor: Cursor of the page to read, from the previous page
+        count: How to count the records: "exact", "estimate" or "none"
+        sort: Comma-separated sort columns, "-" prefixed for descending order
+        fields: Comma-separated fields to return, every field if omitted
+        ids: Comma-separated ids of the records to return instead of a page
         
     Returns:
         List of FAQs
     """
-    return db.query(FAQModel).offset(skip).limit(limit).all()
+    order = parse_sort(sort)
+    selected = parse_fields(fields, FAQ)
+    if ids is not None:
+        faqs, missing = await faq_crud.get_many(db, parse_ids(ids), fields=selected)
+        if missing:
+            response.headers["X-Missing-Ids"] = ",".join(map(str, missing))
+    else:
+        faqs = await faq_crud.get_multi(
+            db, skip=skip, limit=limit, cursor=cursor, filters=filters, sort=order, fields=selected
+        )
+        next_cursor = faq_crud.next_cursor(faqs, limit, order)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        total = await faq_crud.total(db, count, filters)
+        if total is not None:
+            response.headers["X-Total-Count"] = str(total)
+    if selected:
+        return fieldsets.render(
+            [fieldsets.dump(faq, FAQ, selected) for faq in faqs], response
+        )
+    return faqs
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_faqs(
+    response: Response,
+    db: DB,
+    format: ExportFormat = "ndjson",
+    fields: Optional[str] = None,
+) -> StreamingResponse:
+    """
+    Export every FAQ as NDJSON or CSV.
+    
+    Args:
+        response: Response carrying the ETag
+        db: Database session
+        format: "ndjson" for one JSON object per line, or "csv"
+        fields: Comma-separated fields to export, every field if omitted
+        
+    Returns:
+        Streaming response with one record per line, in id order
+    """
+    selected = parse_fields(fields, FAQ)
+    return streaming.export_response(
+        db, faq_crud, FAQ, format, selected, headers=response.headers
+    )
 
 
 @router.post("/", response_model=FAQ, status_code=status.HTTP_201_CREATED)
-def create_faq(
+async def create_faq(
     *,
     db: DB,
     faq_in: FAQCreate,
@@ -50,25 +125,123 @@ def create_faq(
     Returns:
         Created FAQ
     """
-    faq = FAQModel(question=faq_in.question, answer=faq_in.answer)
-    db.add(faq)
-    db.commit()
-    db.refresh(faq)
+    return await faq_crud.create(db, obj_in=faq_in)
+
+
+@router.post("/bulk", response_model=BulkCreated, status_code=status.HTTP_201_CREATED)
+async def bulk_create_faqs(
+    *,
+    db: DB,
+    faqs_in: BulkPayload[FAQCreate],
+) -> BulkCreated:
+    """
+    Create several FAQs with multi-row inserts.
+    
+    Args:
+        db: Database session
+        faqs_in: Data of each FAQ to create
+        
+    Returns:
+        IDs of the created FAQs, in the order of the payload
+    """
+    return BulkCreated(ids=await faq_crud.create_many(db, objs_in=faqs_in))
+
+
+@router.patch("/bulk", response_model=BulkAffected)
+async def bulk_update_faqs(
+    *,
+    db: DB,
+    filters: Filters,
+    bulk_in: BulkUpdate[FAQUpdate],
+) -> BulkAffected:
+    """
+    Update several FAQs with set-based statements.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        bulk_in: Values with the ids they apply to, or FAQs with their values
+        
+    Returns:
+        Number of FAQs updated
+    """
+    affected = await faq_crud.update_many(db, obj_in=bulk_in, filters=filters)
+    return BulkAffected(affected=affected)
+
+
+@router.delete("/bulk", response_model=BulkAffected)
+async def bulk_delete_faqs(
+    *,
+    db: DB,
+    filters: Filters,
+    ids: Optional[str] = None,
+) -> BulkAffected:
+    """
+    Delete several FAQs, by ids or filters.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        ids: Comma-separated ids of the FAQs to delete
+        
+    Returns:
+        Number of FAQs deleted
+    """
+    selected = parse_ids(ids) if ids is not None else None
+    affected = await faq_crud.remove_many(db, ids=selected, filters=filters)
+    return BulkAffected(affected=affected)
+
+
+@router.put("/by-key/{question:path}", response_model=FAQ)
+async def upsert_faq(
+    *,
+    response: Response,
+    db: DB,
+    question: str,
+    faq_in: FAQCreate,
+) -> FAQModel:
+    """
+    Create or replace a FAQ by question, with a single statement.
+    
+    Args:
+        response: Response whose status is 201 when the FAQ is created
+        db: Database session
+        question: Question of the FAQ, matching the one in the body
+        faq_in: Data of the FAQ
+        
+    Returns:
+        Written FAQ
+        
+    Raises:
+        HTTPException: If the question in the body does not match the path
+    """
+    if faq_in.question != question:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Question does not match the path",
+        )
+    faq, created = await faq_crud.upsert(db, obj_in=faq_in)
+    if created:
+        response.status_code = status.HTTP_201_CREATED
     return faq
 
 
 @router.get("/{faq_id}", response_model=FAQ)
-def read_faq(
+async def read_faq(
     *,
+    response: Response,
     db: DB,
     faq_id: int,
+    fields: Optional[str] = None,
 ) -> FAQModel:
     """
     Get a specific FAQ by ID.
     
     Args:
+        response: Response carrying the ETag
         db: Database session
         faq_id: ID of the FAQ to retrieve
+        fields: Comma-separated fields to return, every field if omitted
         
     Returns:
         FAQ with the specified ID
@@ -76,17 +249,20 @@ def read_faq(
     Raises:
         HTTPException: If FAQ not found
     """
-    faq = db.query(FAQModel).filter(FAQModel.id == faq_id).first()
+    selected = parse_fields(fields, FAQ)
+    faq = await faq_crud.get(db, id=faq_id, fields=selected)
     if not faq:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="FAQ not found",
         )
+    if selected:
+        return fieldsets.render(fieldsets.dump(faq, FAQ, selected), response)
     return faq
 
 
 @router.put("/{faq_id}", response_model=FAQ)
-def update_faq(
+async def update_faq(
     *,
     db: DB,
     faq_id: int,
@@ -106,25 +282,17 @@ def update_faq(
     Raises:
         HTTPException: If FAQ not found
     """
-    faq = db.query(FAQModel).filter(FAQModel.id == faq_id).first()
+    faq = await faq_crud.update_by_id(db, id=faq_id, obj_in=faq_in)
     if not faq:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="FAQ not found",
         )
-    
-    update_data = faq_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(faq, field, value)
-    
-    db.add(faq)
-    db.commit()
-    db.refresh(faq)
     return faq
 
 
 @router.delete("/{faq_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_faq(
+async def delete_faq(
     *,
     db: DB,
     faq_id: int,
@@ -139,12 +307,9 @@ def delete_faq(
     Raises:
         HTTPException: If FAQ not found
     """
-    faq = db.query(FAQModel).filter(FAQModel.id == faq_id).first()
-    if not faq:
+    if not await faq_crud.remove(db, id=faq_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="FAQ not found",
         )
-    
-    db.delete(faq)
-    db.commit() 
\ No newline at end of file
+    
\ No newline at end of file
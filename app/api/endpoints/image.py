@@ -3,39 +3,114 @@ Image API endpoints.
 
 This module provides API endpoints for managing images.
 """
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 
-from app.core.deps import DB
+from app.api.routing import ResourceRoute
+from app.core import fieldsets, streaming
+from app.core.deps import BulkPayload, DB, Filters, conditional_get, require_existing
+from app.core.fieldsets import parse_fields
+from app.core.filtering import parse_ids, parse_sort
+from app.core.pagination import CountMode
+from app.core.streaming import ExportFormat
+from app.crud.image import image as image_crud
 from app.models.image import Image as ImageModel
+from app.schemas.bulk import BulkAffected, BulkCreated, BulkUpdate
 from app.schemas.image import Image, ImageCreate, ImageUpdate
 
-router = APIRouter()
+router = APIRouter(
+    route_class=ResourceRoute,
+    dependencies=[
+        Depends(conditional_get("images")),
+        Depends(require_existing("images", "Image not found")),
+    ],
+)
 
 
 @router.get("/", response_model=List[Image])
-def read_images(
+async def read_images(
+    response: Response,
     db: DB,
+    filters: Filters,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    ids: Optional[str] = None,
 ) -> List[ImageModel]:
     """
     Retrieve all images.
     
     Args:
+        response: Response carrying the cursor of the next page, the count
+            and the ids with no record
         db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
         skip: Number of records to skip
         limit: Maximum number of records to return
+        cursor: Cursor of the page to read, from the previous page
+        count: How to count the records: "exact", "estimate" or "none"
+        sort: Comma-separated sort columns, "-" prefixed for descending order
+        fields: Comma-separated fields to return, every field if omitted
+        ids: Comma-separated ids of the records to return instead of a page
         
     Returns:
         List of images
     """
-    return db.query(ImageModel).offset(skip).limit(limit).all()
+    order = parse_sort(sort)
+    selected = parse_fields(fields, Image)
+    if ids is not None:
+        images, missing = await image_crud.get_many(db, parse_ids(ids), fields=selected)
+        if missing:
+            response.headers["X-Missing-Ids"] = ",".join(map(str, missing))
+    else:
+        images = await image_crud.get_multi(
+            db, skip=skip, limit=limit, cursor=cursor, filters=filters, sort=order, fields=selected
+        )
+        next_cursor = image_crud.next_cursor(images, limit, order)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        total = await image_crud.total(db, count, filters)
+        if total is not None:
+            response.headers["X-Total-Count"] = str(total)
+    if selected:
+        return fieldsets.render(
+            [fieldsets.dump(image, Image, selected) for image in images], response
+        )
+    return images
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_images(
+    response: Response,
+    db: DB,
+    format: ExportFormat = "ndjson",
+    fields: Optional[str] = None,
+) -> StreamingResponse:
+    """
+    Export every image as NDJSON or CSV.
+    
+    Args:
+        response: Response carrying the ETag
+        db: Database session
+        format: "ndjson" for one JSON object per line, or "csv"
+        fields: Comma-separated fields to export, every field if omitted
+        
+    Returns:
+        Streaming response with one record per line, in id order
+    """
+    selected = parse_fields(fields, Image)
+    return streaming.export_response(
+        db, image_crud, Image, format, selected, headers=response.headers
+    )
 
 
 @router.post("/", response_model=Image, status_code=status.HTTP_201_CREATED)
-def create_image(
+async def create_image(
     *,
     db: DB,
     image_in: ImageCreate,
@@ -50,25 +125,123 @@ def create_image(
     Returns:
         Created image
     """
-    image = ImageModel(src=image_in.src)
-    db.add(image)
-    db.commit()
-    db.refresh(image)
+    return await image_crud.create(db, obj_in=image_in)
+
+
+@router.post("/bulk", response_model=BulkCreated, status_code=status.HTTP_201_CREATED)
+async def bulk_create_images(
+    *,
+    db: DB,
+    images_in: BulkPayload[ImageCreate],
+) -> BulkCreated:
+    """
+    Create several images with multi-row inserts.
+    
+    Args:
+        db: Database session
+        images_in: Data of each image to create
+        
+    Returns:
+        IDs of the created images, in the order of the payload
+    """
+    return BulkCreated(ids=await image_crud.create_many(db, objs_in=images_in))
+
+
+@router.patch("/bulk", response_model=BulkAffected)
+async def bulk_update_images(
+    *,
+    db: DB,
+    filters: Filters,
+    bulk_in: BulkUpdate[ImageUpdate],
+) -> BulkAffected:
+    """
+    Update several images with set-based statements.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        bulk_in: Values with the ids they apply to, or images with their values
+        
+    Returns:
+        Number of images updated
+    """
+    affected = await image_crud.update_many(db, obj_in=bulk_in, filters=filters)
+    return BulkAffected(affected=affected)
+
+
+@router.delete("/bulk", response_model=BulkAffected)
+async def bulk_delete_images(
+    *,
+    db: DB,
+    filters: Filters,
+    ids: Optional[str] = None,
+) -> BulkAffected:
+    """
+    Delete several images, by ids or filters.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        ids: Comma-separated ids of the images to delete
+        
+    Returns:
+        Number of images deleted
+    """
+    selected = parse_ids(ids) if ids is not None else None
+    affected = await image_crud.remove_many(db, ids=selected, filters=filters)
+    return BulkAffected(affected=affected)
+
+
+@router.put("/by-key/{src:path}", response_model=Image)
+async def upsert_image(
+    *,
+    response: Response,
+    db: DB,
+    src: str,
+    image_in: ImageCreate,
+) -> ImageModel:
+    """
+    Create or replace an image by src, with a single statement.
+    
+    Args:
+        response: Response whose status is 201 when the image is created
+        db: Database session
+        src: Source of the image, matching the one in the body
+        image_in: Data of the image
+        
+    Returns:
+        Written image
+        
+    Raises:
+        HTTPException: If the source in the body does not match the path
+    """
+    if image_in.src != src:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Source does not match the path",
+        )
+    image, created = await image_crud.upsert(db, obj_in=image_in)
+    if created:
+        response.status_code = status.HTTP_201_CREATED
     return image
 
 
 @router.get("/{image_id}", response_model=Image)
-def read_image(
+async def read_image(
     *,
+    response: Response,
     db: DB,
     image_id: int,
+    fields: Optional[str] = None,
 ) -> ImageModel:
     """
     Get a specific image by ID.
     
     Args:
+        response: Response carrying the ETag
         db: Database session
         image_id: ID of the image to retrieve
+        fields: Comma-separated fields to return, every field if omitted
         
     Returns:
         Image with the specified ID
@@ -76,17 +249,20 @@ def read_image(
     Raises:
         HTTPException: If image not found
     """
-    image = db.query(ImageModel).filter(ImageModel.id == image_id).first()
+    selected = parse_fields(fields, Image)
+    image = await image_crud.get(db, id=image_id, fields=selected)
     if not image:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Image not found",
         )
+    if selected:
+        return fieldsets.render(fieldsets.dump(image, Image, selected), response)
     return image
 
 
 @router.put("/{image_id}", response_model=Image)
-def update_image(
+async def update_image(
     *,
     db: DB,
     image_id: int,
@@ -106,25 +282,17 @@ def update_image(
     Raises:
         HTTPException: If image not found
     """
-    image = db.query(ImageModel).filter(ImageModel.id == image_id).first()
+    image = await image_crud.update_by_id(db, id=image_id, obj_in=image_in)
     if not image:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Image not found",
         )
-    
-    update_data = image_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(image, field, value)
-    
-    db.add(image)
-    db.commit()
-    db.refresh(image)
     return image
 
 
 @router.delete("/{image_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_image(
+async def delete_image(
     *,
     db: DB,
     image_id: int,
@@ -139,12 +307,9 @@ def delete_image(
     Raises:
         HTTPException: If image not found
     """
-    image = db.query(ImageModel).filter(ImageModel.id == image_id).first()
-    if not image:
+    if not await image_crud.remove(db, id=image_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Image not found",
         )
-    
-    db.delete(image)
-    db.commit() 
\ No newline at end of file
+    
\ No newline at end of file
@@ -3,35 +3,87 @@ MenuOption API endpoints.
 
 This module provides API endpoints for managing menu options.
 """
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 
-from app.core.deps import DB
-from app.models.menu_option import MenuOption as MenuOptionModel
+from app.api.routing import ResourceRoute
+from app.core import fieldsets, streaming
+from app.core.deps import BulkPayload, DB, Filters, conditional_get, require_existing
+from app.core.fieldsets import parse_fields
+from app.core.filtering import parse_ids, parse_sort
+from app.core.pagination import CountMode
+from app.core.streaming import ExportFormat
+from app.crud.menu_option import menu_option as menu_option_crud
+from app.schemas.bulk import BulkAffected, BulkCreated, BulkUpdate
 from app.schemas.menu_option import MenuOption, MenuOptionCreate, MenuOptionUpdate
 
-router = APIRouter()
+router = APIRouter(
+    route_class=ResourceRoute,
+    dependencies=[
+        Depends(conditional_get("menu_options")),
+        Depends(require_existing("menu_options", "Menu option not found")),
+    ],
+)
 
 
 @router.get("/", response_model=List[MenuOption])
-def read_menu_options(
+async def read_menu_options(
+    response: Response,
     db: DB,
+    filters: Filters,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    ids: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
     """
     Retrieve all menu options.
     
     Args:
+        response: Response carrying the cursor of the next page, the count
+            and the ids with no record
         db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
         skip: Number of records to skip
         limit: Maximum number of records to return
+        cursor: Cursor of the page to read, from the previous page
+        count: How to count the records: "exact", "estimate" or "none"
+        sort: Comma-separated sort columns, "-" prefixed for descending order
+        fields: Comma-separated fields to return, every field if omitted
+        ids: Comma-separated ids of the records to return instead of a page
         
     Returns:
         List of menu options
     """
-    menu_options = db.query(MenuOptionModel).offset(skip).limit(limit).all()
+    order = parse_sort(sort)
+    selected = parse_fields(fields, MenuOption)
+    if ids is not None:
+        menu_options, missing = await menu_option_crud.get_many(db, parse_ids(ids), fields=selected)
+        if missing:
+            response.headers["X-Missing-Ids"] = ",".join(map(str, missing))
+    else:
+        menu_options = await menu_option_crud.get_multi(
+            db, skip=skip, limit=limit, cursor=cursor, filters=filters, sort=order, fields=selected
+        )
+        next_cursor = menu_option_crud.next_cursor(menu_options, limit, order)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        total = await menu_option_crud.total(db, count, filters)
+        if total is not None:
+            response.headers["X-Total-Count"] = str(total)
+    if selected:
+        return fieldsets.render(
+            [
+                fieldsets.dump(menu_option, MenuOption, selected)
+                for menu_option in menu_options
+            ],
+            response,
+        )
     # Return list of dictionaries to ensure proper JSON serialization
     return [
         {
@@ -43,8 +95,33 @@ def read_menu_options(
     ]
 
 
+@router.get("/export", response_class=StreamingResponse)
+async def export_menu_options(
+    response: Response,
+    db: DB,
+    format: ExportFormat = "ndjson",
+    fields: Optional[str] = None,
+) -> StreamingResponse:
+    """
+    Export every menu option as NDJSON or CSV.
+    
+    Args:
+        response: Response carrying the ETag
+        db: Database session
+        format: "ndjson" for one JSON object per line, or "csv"
+        fields: Comma-separated fields to export, every field if omitted
+        
+    Returns:
+        Streaming response with one record per line, in id order
+    """
+    selected = parse_fields(fields, MenuOption)
+    return streaming.export_response(
+        db, menu_option_crud, MenuOption, format, selected, headers=response.headers
+    )
+
+
 @router.post("/", response_model=MenuOption, status_code=status.HTTP_201_CREATED)
-def create_menu_option(
+async def create_menu_option(
     *,
     db: DB,
     menu_option_in: MenuOptionCreate,
@@ -59,13 +136,7 @@ def create_menu_option(
     Returns:
         Created menu option
     """
-    menu_option = MenuOptionModel(
-        type=menu_option_in.type,
-        items=menu_option_in.items
-    )
-    db.add(menu_option)
-    db.commit()
-    db.refresh(menu_option)
+    menu_option = await menu_option_crud.create(db, obj_in=menu_option_in)
     
     # Manual serialization to ensure proper JSON handling
     return {
@@ -75,18 +146,86 @@ def create_menu_option(
     }
 
 
+@router.post("/bulk", response_model=BulkCreated, status_code=status.HTTP_201_CREATED)
+async def bulk_create_menu_options(
+    *,
+    db: DB,
+    menu_options_in: BulkPayload[MenuOptionCreate],
+) -> BulkCreated:
+    """
+    Create several menu options with multi-row inserts.
+    
+    Args:
+        db: Database session
+        menu_options_in: Data of each menu option to create
+        
+    Returns:
+        IDs of the created menu options, in the order of the payload
+    """
+    return BulkCreated(ids=await menu_option_crud.create_many(db, objs_in=menu_options_in))
+
+
+@router.patch("/bulk", response_model=BulkAffected)
+async def bulk_update_menu_options(
+    *,
+    db: DB,
+    filters: Filters,
+    bulk_in: BulkUpdate[MenuOptionUpdate],
+) -> BulkAffected:
+    """
+    Update several menu options with set-based statements.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        bulk_in: Values with the ids they apply to, or menu options with their values
+        
+    Returns:
+        Number of menu options updated
+    """
+    affected = await menu_option_crud.update_many(db, obj_in=bulk_in, filters=filters)
+    return BulkAffected(affected=affected)
+
+
+@router.delete("/bulk", response_model=BulkAffected)
+async def bulk_delete_menu_options(
+    *,
+    db: DB,
+    filters: Filters,
+    ids: Optional[str] = None,
+) -> BulkAffected:
+    """
+    Delete several menu options, by ids or filters.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        ids: Comma-separated ids of the menu options to delete
+        
+    Returns:
+        Number of menu options deleted
+    """
+    selected = parse_ids(ids) if ids is not None else None
+    affected = await menu_option_crud.remove_many(db, ids=selected, filters=filters)
+    return BulkAffected(affected=affected)
+
+
 @router.get("/{menu_option_id}", response_model=MenuOption)
-def read_menu_option(
+async def read_menu_option(
     *,
+    response: Response,
     db: DB,
     menu_option_id: int,
+    fields: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Get a specific menu option by ID.
     
     Args:
+        response: Response carrying the ETag
         db: Database session
         menu_option_id: ID of the menu option to retrieve
+        fields: Comma-separated fields to return, every field if omitted
         
     Returns:
         Menu option with the specified ID
@@ -94,12 +233,15 @@ def read_menu_option(
     Raises:
         HTTPException: If menu option not found
     """
-    menu_option = db.query(MenuOptionModel).filter(MenuOptionModel.id == menu_option_id).first()
+    selected = parse_fields(fields, MenuOption)
+    menu_option = await menu_option_crud.get(db, id=menu_option_id, fields=selected)
     if not menu_option:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Menu option not found",
         )
+    if selected:
+        return fieldsets.render(fieldsets.dump(menu_option, MenuOption, selected), response)
     
     # Manual serialization to ensure proper JSON handling
     return {
@@ -110,7 +252,7 @@ def read_menu_option(
 
 
 @router.put("/{menu_option_id}", response_model=MenuOption)
-def update_menu_option(
+async def update_menu_option(
     *,
     db: DB,
     menu_option_id: int,
@@ -130,22 +272,15 @@ def update_menu_option(
     Raises:
         HTTPException: If menu option not found
     """
-    menu_option = db.query(MenuOptionModel).filter(MenuOptionModel.id == menu_option_id).first()
+    menu_option = await menu_option_crud.update_by_id(
+        db, id=menu_option_id, obj_in=menu_option_in.model_dump(exclude_none=True)
+    )
     if not menu_option:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Menu option not found",
         )
     
-    if menu_option_in.type is not None:
-        menu_option.type = menu_option_in.type
-    if menu_option_in.items is not None:
-        menu_option.items = menu_option_in.items
-    
-    db.add(menu_option)
-    db.commit()
-    db.refresh(menu_option)
-    
     # Manual serialization to ensure proper JSON handling
     return {
         "id": menu_option.id,
@@ -155,7 +290,7 @@ def update_menu_option(
 
 
 @router.delete("/{menu_option_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_menu_option(
+async def delete_menu_option(
     *,
     db: DB,
     menu_option_id: int,
@@ -170,12 +305,9 @@ def delete_menu_option(
     Raises:
         HTTPException: If menu option not found
     """
-    menu_option = db.query(MenuOptionModel).filter(MenuOptionModel.id == menu_option_id).first()
-    if not menu_option:
+    if not await menu_option_crud.remove(db, id=menu_option_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Menu option not found",
         )
-    
-    db.delete(menu_option)
-    db.commit() 
\ No newline at end of file
+    
\ No newline at end of file
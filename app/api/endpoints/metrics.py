@@ -0,0 +1,22 @@
+"""
+Metrics API endpoint.
+
+This module exposes application metrics in the Prometheus text format.
+"""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import registry
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def read_metrics() -> str:
+    """
+    Render the application metrics.
+    
+    Returns:
+        Metrics in the Prometheus text exposition format
+    """
+    return registry.render()
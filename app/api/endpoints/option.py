@@ -3,35 +3,83 @@ Option API endpoints.
 
 This module provides API endpoints for managing options.
 """
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 
-from app.core.deps import DB
-from app.models.option import Option as OptionModel
+from app.api.routing import ResourceRoute
+from app.core import fieldsets, streaming
+from app.core.deps import BulkPayload, DB, Filters, conditional_get, require_existing
+from app.core.fieldsets import parse_fields
+from app.core.filtering import parse_ids, parse_sort
+from app.core.pagination import CountMode
+from app.core.streaming import ExportFormat
+from app.crud.option import option as option_crud
+from app.schemas.bulk import BulkAffected, BulkCreated, BulkUpdate
 from app.schemas.option import Option, OptionCreate, OptionUpdate
 
-router = APIRouter()
+router = APIRouter(
+    route_class=ResourceRoute,
+    dependencies=[
+        Depends(conditional_get("options")),
+        Depends(require_existing("options", "Option not found")),
+    ],
+)
 
 
 @router.get("/", response_model=List[Option])
-def read_options(
+async def read_options(
+    response: Response,
     db: DB,
+    filters: Filters,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    ids: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
     """
     Retrieve all options.
     
     Args:
+        response: Response carrying the cursor of the next page, the count
+            and the ids with no record
         db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
         skip: Number of records to skip
         limit: Maximum number of records to return
+        cursor: Cursor of the page to read, from the previous page
+        count: How to count the records: "exact", "estimate" or "none"
+        sort: Comma-separated sort columns, "-" prefixed for descending order
+        fields: Comma-separated fields to return, every field if omitted
+        ids: Comma-separated ids of the records to return instead of a page
         
     Returns:
         List of options
     """
-    options = db.query(OptionModel).offset(skip).limit(limit).all()
+    order = parse_sort(sort)
+    selected = parse_fields(fields, Option)
+    if ids is not None:
+        options, missing = await option_crud.get_many(db, parse_ids(ids), fields=selected)
+        if missing:
+            response.headers["X-Missing-Ids"] = ",".join(map(str, missing))
+    else:
+        options = await option_crud.get_multi(
+            db, skip=skip, limit=limit, cursor=cursor, filters=filters, sort=order, fields=selected
+        )
+        next_cursor = option_crud.next_cursor(options, limit, order)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        total = await option_crud.total(db, count, filters)
+        if total is not None:
+            response.headers["X-Total-Count"] = str(total)
+    if selected:
+        return fieldsets.render(
+            [fieldsets.dump(option, Option, selected) for option in options], response
+        )
     return [
         {
             "id": option.id, 
@@ -42,8 +90,33 @@ def read_options(
     ]
 
 
+@router.get("/export", response_class=StreamingResponse)
+async def export_options(
+    response: Response,
+    db: DB,
+    format: ExportFormat = "ndjson",
+    fields: Optional[str] = None,
+) -> StreamingResponse:
+    """
+    Export every option as NDJSON or CSV.
+    
+    Args:
+        response: Response carrying the ETag
+        db: Database session
+        format: "ndjson" for one JSON object per line, or "csv"
+        fields: Comma-separated fields to export, every field if omitted
+        
+    Returns:
+        Streaming response with one record per line, in id order
+    """
+    selected = parse_fields(fields, Option)
+    return streaming.export_response(
+        db, option_crud, Option, format, selected, headers=response.headers
+    )
+
+
 @router.post("/", response_model=Option, status_code=status.HTTP_201_CREATED)
-def create_option(
+async def create_option(
     *,
     db: DB,
     option_in: OptionCreate,
@@ -58,13 +131,7 @@ def create_option(
     Returns:
         Created option
     """
-    option = OptionModel(
-        name=option_in.name,
-        icon=option_in.icon
-    )
-    db.add(option)
-    db.commit()
-    db.refresh(option)
+    option = await option_crud.create(db, obj_in=option_in)
     
     return {
         "id": option.id,
@@ -73,18 +140,86 @@ def create_option(
     }
 
 
+@router.post("/bulk", response_model=BulkCreated, status_code=status.HTTP_201_CREATED)
+async def bulk_create_options(
+    *,
+    db: DB,
+    options_in: BulkPayload[OptionCreate],
+) -> BulkCreated:
+    """
+    Create several options with multi-row inserts.
+    
+    Args:
+        db: Database session
+        options_in: Data of each option to create
+        
+    Returns:
+        IDs of the created options, in the order of the payload
+    """
+    return BulkCreated(ids=await option_crud.create_many(db, objs_in=options_in))
+
+
+@router.patch("/bulk", response_model=BulkAffected)
+async def bulk_update_options(
+    *,
+    db: DB,
+    filters: Filters,
+    bulk_in: BulkUpdate[OptionUpdate],
+) -> BulkAffected:
+    """
+    Update several options with set-based statements.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        bulk_in: Values with the ids they apply to, or options with their values
+        
+    Returns:
+        Number of options updated
+    """
+    affected = await option_crud.update_many(db, obj_in=bulk_in, filters=filters)
+    return BulkAffected(affected=affected)
+
+
+@router.delete("/bulk", response_model=BulkAffected)
+async def bulk_delete_options(
+    *,
+    db: DB,
+    filters: Filters,
+    ids: Optional[str] = None,
+) -> BulkAffected:
+    """
+    Delete several options, by ids or filters.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        ids: Comma-separated ids of the options to delete
+        
+    Returns:
+        Number of options deleted
+    """
+    selected = parse_ids(ids) if ids is not None else None
+    affected = await option_crud.remove_many(db, ids=selected, filters=filters)
+    return BulkAffected(affected=affected)
+
+
 @router.get("/{option_id}", response_model=Option)
-def read_option(
+async def read_option(
     *,
+    response: Response,
     db: DB,
     option_id: int,
+    fields: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Get a specific option by ID.
     
     Args:
+        response: Response carrying the ETag
         db: Database session
         option_id: ID of the option to retrieve
+        fields: Comma-separated fields to return, every field if omitted
         
     Returns:
         Option with the specified ID
@@ -92,12 +227,15 @@ def read_option(
     Raises:
         HTTPException: If option not found
     """
-    option = db.query(OptionModel).filter(OptionModel.id == option_id).first()
+    selected = parse_fields(fields, Option)
+    option = await option_crud.get(db, id=option_id, fields=selected)
     if not option:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Option not found",
         )
+    if selected:
+        return fieldsets.render(fieldsets.dump(option, Option, selected), response)
     
     return {
         "id": option.id,
@@ -107,7 +245,7 @@ def read_option(
 
 
 @router.put("/{option_id}", response_model=Option)
-def update_option(
+async def update_option(
     *,
     db: DB,
     option_id: int,
@@ -127,22 +265,15 @@ def update_option(
     Raises:
         HTTPException: If option not found
     """
-    option = db.query(OptionModel).filter(OptionModel.id == option_id).first()
+    option = await option_crud.update_by_id(
+        db, id=option_id, obj_in=option_in.model_dump(exclude_none=True)
+    )
     if not option:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Option not found",
         )
     
-    if option_in.name is not None:
-        option.name = option_in.name
-    if option_in.icon is not None:
-        option.icon = option_in.icon
-    
-    db.add(option)
-    db.commit()
-    db.refresh(option)
-    
     return {
         "id": option.id,
         "name": option.name,
@@ -151,7 +282,7 @@ def update_option(
 
 
 @router.delete("/{option_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_option(
+async def delete_option(
     *,
     db: DB,
     option_id: int,
@@ -166,12 +297,9 @@ def delete_option(
     Raises:
         HTTPException: If option not found
     """
-    option = db.query(OptionModel).filter(OptionModel.id == option_id).first()
-    if not option:
+    if not await option_crud.remove(db, id=option_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Option not found",
         )
-    
-    db.delete(option)
-    db.commit() 
\ No newline at end of file
+    
\ No newline at end of file
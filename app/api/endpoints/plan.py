@@ -3,35 +3,83 @@ Plan API endpoints.
 
 This module provides API endpoints for managing plans.
 """
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 
-from app.core.deps import DB
-from app.models.plan import Plan as PlanModel
+from app.api.routing import ResourceRoute
+from app.core import fieldsets, streaming
+from app.core.deps import BulkPayload, DB, Filters, conditional_get, require_existing
+from app.core.fieldsets import parse_fields
+from app.core.filtering import parse_ids, parse_sort
+from app.core.pagination import CountMode
+from app.core.streaming import ExportFormat
+from app.crud.plan import plan as plan_crud
+from app.schemas.bulk import BulkAffected, BulkCreated, BulkUpdate
 from app.schemas.plan import Plan, PlanCreate, PlanUpdate
 
-router = APIRouter()
+router = APIRouter(
+    route_class=ResourceRoute,
+    dependencies=[
+        Depends(conditional_get("plans")),
+        Depends(require_existing("plans", "Plan not found")),
+    ],
+)
 
 
 @router.get("/", response_model=List[Plan])
-def read_plans(
+async def read_plans(
+    response: Response,
     db: DB,
+    filters: Filters,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    ids: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
     """
     Retrieve all plans.
     
     Args:
+        response: Response carrying the cursor of the next page, the count
+            and the ids with no record
         db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
         skip: Number of records to skip
         limit: Maximum number of records to return
+        cursor: Cursor of the page to read, from the previous page
+        count: How to count the records: "exact", "estimate" or "none"
+        sort: Comma-separated sort columns, "-" prefixed for descending order
+        fields: Comma-separated fields to return, every field if omitted
+        ids: Comma-separated ids of the records to return instead of a page
         
     Returns:
         List of plans
     """
-    plans = db.query(PlanModel).offset(skip).limit(limit).all()
+    order = parse_sort(sort)
+    selected = parse_fields(fields, Plan)
+    if ids is not None:
+        plans, missing = await plan_crud.get_many(db, parse_ids(ids), fields=selected)
+        if missing:
+            response.headers["X-Missing-Ids"] = ",".join(map(str, missing))
+    else:
+        plans = await plan_crud.get_multi(
+            db, skip=skip, limit=limit, cursor=cursor, filters=filters, sort=order, fields=selected
+        )
+        next_cursor = plan_crud.next_cursor(plans, limit, order)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        total = await plan_crud.total(db, count, filters)
+        if total is not None:
+            response.headers["X-Total-Count"] = str(total)
+    if selected:
+        return fieldsets.render(
+            [fieldsets.dump(plan, Plan, selected) for plan in plans], response
+        )
     return [
         {
             "id": plan.id,
@@ -45,8 +93,33 @@ def read_plans(
     ]
 
 
+@router.get("/export", response_class=StreamingResponse)
+async def export_plans(
+    response: Response,
+    db: DB,
+    format: ExportFormat = "ndjson",
+    fields: Optional[str] = None,
+) -> StreamingResponse:
+    """
+    Export every plan as NDJSON or CSV.
+    
+    Args:
+        response: Response carrying the ETag
+        db: Database session
+        format: "ndjson" for one JSON object per line, or "csv"
+        fields: Comma-separated fields to export, every field if omitted
+        
+    Returns:
+        Streaming response with one record per line, in id order
+    """
+    selected = parse_fields(fields, Plan)
+    return streaming.export_response(
+        db, plan_crud, Plan, format, selected, headers=response.headers
+    )
+
+
 @router.post("/", response_model=Plan, status_code=status.HTTP_201_CREATED)
-def create_plan(
+async def create_plan(
     *,
     db: DB,
     plan_in: PlanCreate,
@@ -61,16 +134,7 @@ def create_plan(
     Returns:
         Created plan
     """
-    plan = PlanModel(
-        title=plan_in.title,
-        description=plan_in.description,
-        price=plan_in.price,
-        btnMessage=plan_in.btnMessage,
-        blueBtn=plan_in.blueBtn
-    )
-    db.add(plan)
-    db.commit()
-    db.refresh(plan)
+    plan = await plan_crud.create(db, obj_in=plan_in)
     
     return {
         "id": plan.id,
@@ -82,18 +146,86 @@ def create_plan(
     }
 
 
+@router.post("/bulk", response_model=BulkCreated, status_code=status.HTTP_201_CREATED)
+async def bulk_create_plans(
+    *,
+    db: DB,
+    plans_in: BulkPayload[PlanCreate],
+) -> BulkCreated:
+    """
+    Create several plans with multi-row inserts.
+    
+    Args:
+        db: Database session
+        plans_in: Data of each plan to create
+        
+    Returns:
+        IDs of the created plans, in the order of the payload
+    """
+    return BulkCreated(ids=await plan_crud.create_many(db, objs_in=plans_in))
+
+
+@router.patch("/bulk", response_model=BulkAffected)
+async def bulk_update_plans(
+    *,
+    db: DB,
+    filters: Filters,
+    bulk_in: BulkUpdate[PlanUpdate],
+) -> BulkAffected:
+    """
+    Update several plans with set-based statements.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        bulk_in: Values with the ids they apply to, or plans with their values
+        
+    Returns:
+        Number of plans updated
+    """
+    affected = await plan_crud.update_many(db, obj_in=bulk_in, filters=filters)
+    return BulkAffected(affected=affected)
+
+
+@router.delete("/bulk", response_model=BulkAffected)
+async def bulk_delete_plans(
+    *,
+    db: DB,
+    filters: Filters,
+    ids: Optional[str] = None,
+) -> BulkAffected:
+    """
+    Delete several plans, by ids or filters.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        ids: Comma-separated ids of the plans to delete
+        
+    Returns:
+        Number of plans deleted
+    """
+    selected = parse_ids(ids) if ids is not None else None
+    affected = await plan_crud.remove_many(db, ids=selected, filters=filters)
+    return BulkAffected(affected=affected)
+
+
 @router.get("/{plan_id}", response_model=Plan)
-def read_plan(
+async def read_plan(
     *,
+    response: Response,
     db: DB,
     plan_id: int,
+    fields: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Get a specific plan by ID.
     
     Args:
+        response: Response carrying the ETag
         db: Database session
         plan_id: ID of the plan to retrieve
+        fields: Comma-separated fields to return, every field if omitted
         
     Returns:
         Plan with the specified ID
@@ -101,12 +233,15 @@ def read_plan(
     Raises:
         HTTPException: If plan not found
     """
-    plan = db.query(PlanModel).filter(PlanModel.id == plan_id).first()
+    selected = parse_fields(fields, Plan)
+    plan = await plan_crud.get(db, id=plan_id, fields=selected)
     if not plan:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Plan not found",
         )
+    if selected:
+        return fieldsets.render(fieldsets.dump(plan, Plan, selected), response)
     
     return {
         "id": plan.id,
@@ -119,7 +254,7 @@ def read_plan(
 
 
 @router.put("/{plan_id}", response_model=Plan)
-def update_plan(
+async def update_plan(
     *,
     db: DB,
     plan_id: int,
@@ -139,28 +274,15 @@ def update_plan(
     Raises:
         HTTPException: If plan not found
     """
-    plan = db.query(PlanModel).filter(PlanModel.id == plan_id).first()
+    plan = await plan_crud.update_by_id(
+        db, id=plan_id, obj_in=plan_in.model_dump(exclude_none=True)
+    )
     if not plan:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Plan not found",
         )
     
-    if plan_in.title is not None:
-        plan.title = plan_in.title
-    if plan_in.description is not None:
-        plan.description = plan_in.description
-    if plan_in.price is not None:
-        plan.price = plan_in.price
-    if plan_in.btnMessage is not None:
-        plan.btnMessage = plan_in.btnMessage
-    if plan_in.blueBtn is not None:
-        plan.blueBtn = plan_in.blueBtn
-    
-    db.add(plan)
-    db.commit()
-    db.refresh(plan)
-    
     return {
         "id": plan.id,
         "title": plan.title,
@@ -172,7 +294,7 @@ def update_plan(
 
 
 @router.delete("/{plan_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_plan(
+async def delete_plan(
     *,
     db: DB,
     plan_id: int,
@@ -187,12 +309,9 @@ def delete_plan(
     Raises:
         HTTPException: If plan not found
     """
-    plan = db.query(PlanModel).filter(PlanModel.id == plan_id).first()
-    if not plan:
+    if not await plan_crud.remove(db, id=plan_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Plan not found",
         )
-    
-    db.delete(plan)
-    db.commit() 
\ No newline at end of file
+    
\ No newline at end of file
@@ -3,14 +3,22 @@ ProcessingInfo API endpoints.
 
 This module provides API endpoints for managing processing information.
 """
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.deps import get_db
+from app.api.routing import ResourceRoute
+from app.core import fieldsets, streaming
+from app.core.deps import BulkPayload, Filters, conditional_get, get_db, require_existing
+from app.core.fieldsets import parse_fields
+from app.core.filtering import parse_ids, parse_sort
+from app.core.pagination import CountMode
+from app.core.streaming import ExportFormat
 from app.crud.processing_info import processing_info
 from app.models.processing_info import ProcessingInfo
+from app.schemas.bulk import BulkAffected, BulkCreated, BulkUpdate
 from app.schemas.processing_info import (
     ProcessingInfoCreate,
     ProcessingInfoList,
@@ -18,34 +26,100 @@ from app.schemas.processing_info import (
     ProcessingInfoUpdate,
 )
 
-router = APIRouter()
+router = APIRouter(
+    route_class=ResourceRoute,
+    dependencies=[
+        Depends(conditional_get("processing_info")),
+        Depends(require_existing("processing_info", "Processing information not found")),
+    ],
+)
 
 
 @router.get("/", response_model=ProcessingInfoList)
-def read_processing_infos(
-    db: Session = Depends(get_db),
+async def read_processing_infos(
+    response: Response,
+    filters: Filters,
+    db: AsyncSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    ids: Optional[str] = None,
 ) -> Any:
     """
     Retrieve all processing information items.
     
     Args:
+        response: Response carrying the cursor of the next page, the count
+            and the ids with no record
+        filters: Conditions given as ``filter[column][operator]=value``
         db: Database session
         skip: Number of records to skip
         limit: Maximum number of records to return
+        cursor: Cursor of the page to read, from the previous page
+        count: How to count the records: "exact", "estimate" or "none"
+        sort: Comma-separated sort columns, "-" prefixed for descending order
+        fields: Comma-separated fields to return, every field if omitted
+        ids: Comma-separated ids of the records to return instead of a page
         
     Returns:
         List of processing information items
     """
-    items = processing_info.get_multi(db, skip=skip, limit=limit)
-    return {"items": items, "count": len(items)}
+    order = parse_sort(sort)
+    selected = parse_fields(fields, ProcessingInfoSchema)
+    if ids is not None:
+        items, missing = await processing_info.get_many(db, parse_ids(ids), fields=selected)
+        if missing:
+            response.headers["X-Missing-Ids"] = ",".join(map(str, missing))
+        next_cursor, total = None, len(items)
+    else:
+        items = await processing_info.get_multi(
+            db, skip=skip, limit=limit, cursor=cursor, filters=filters, sort=order, fields=selected
+        )
+        next_cursor = processing_info.next_cursor(items, limit, order)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        # Without a count mode, count keeps reporting the page size
+        total = len(items) if count is None else await processing_info.total(db, count, filters)
+    if selected:
+        content = [fieldsets.dump(item, ProcessingInfoSchema, selected) for item in items]
+        return fieldsets.render(
+            {"items": content, "count": total, "next_cursor": next_cursor}, response
+        )
+    return {"items": items, "count": total, "next_cursor": next_cursor}
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_processing_infos(
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    format: ExportFormat = "ndjson",
+    fields: Optional[str] = None,
+) -> StreamingResponse:
+    """
+    Export every processing information item as NDJSON or CSV.
+    
+    Args:
+        response: Response carrying the ETag
+        db: Database session
+        format: "ndjson" for one JSON object per line, or "csv"
+        fields: Comma-separated fields to export, every field if omitted
+        
+    Returns:
+        Streaming response with one record per line, in id order
+    """
+    selected = parse_fields(fields, ProcessingInfoSchema)
+    return streaming.export_response(
+        db, processing_info, ProcessingInfoSchema, format, selected, headers=response.headers
+    )
 
 
 @router.post("/", response_model=ProcessingInfoSchema, status_code=status.HTTP_201_CREATED)
-def create_processing_info(
+async def create_processing_info(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     item_in: ProcessingInfoCreate,
 ) -> Any:
     """
@@ -58,21 +132,123 @@ def create_processing_info(
     Returns:
         Created processing information item
     """
-    return processing_info.create(db=db, obj_in=item_in)
+    return await processing_info.create(db=db, obj_in=item_in)
+
+
+@router.post("/bulk", response_model=BulkCreated, status_code=status.HTTP_201_CREATED)
+async def bulk_create_processing_info(
+    *,
+    db: AsyncSession = Depends(get_db),
+    items_in: BulkPayload[ProcessingInfoCreate],
+) -> BulkCreated:
+    """
+    Create several processing info items with multi-row inserts.
+    
+    Args:
+        db: Database session
+        items_in: Data of each processing info item to create
+        
+    Returns:
+        IDs of the created processing info items, in the order of the payload
+    """
+    return BulkCreated(ids=await processing_info.create_many(db, objs_in=items_in))
+
+
+@router.patch("/bulk", response_model=BulkAffected)
+async def bulk_update_processing_info(
+    *,
+    db: AsyncSession = Depends(get_db),
+    filters: Filters,
+    bulk_in: BulkUpdate[ProcessingInfoUpdate],
+) -> BulkAffected:
+    """
+    Update several processing info items with set-based statements.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        bulk_in: Values with the ids they apply to, or processing info items with their values
+        
+    Returns:
+        Number of processing info items updated
+    """
+    affected = await processing_info.update_many(db, obj_in=bulk_in, filters=filters)
+    return BulkAffected(affected=affected)
+
+
+@router.delete("/bulk", response_model=BulkAffected)
+async def bulk_delete_processing_info(
+    *,
+    db: AsyncSession = Depends(get_db),
+    filters: Filters,
+    ids: Optional[str] = None,
+) -> BulkAffected:
+    """
+    Delete several processing info items, by ids or filters.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        ids: Comma-separated ids of the processing info items to delete
+        
+    Returns:
+        Number of processing info items deleted
+    """
+    selected = parse_ids(ids) if ids is not None else None
+    affected = await processing_info.remove_many(db, ids=selected, filters=filters)
+    return BulkAffected(affected=affected)
+
+
+@router.put("/by-key/{title:path}", response_model=ProcessingInfoSchema)
+async def upsert_processing_info(
+    *,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    title: str,
+    item_in: ProcessingInfoCreate,
+) -> Any:
+    """
+    Create or replace a processing information item by title, with a single statement.
+    
+    Args:
+        response: Response whose status is 201 when the processing information item is created
+        db: Database session
+        title: Title of the processing information item, matching the one in the body
+        item_in: Data of the processing information item
+        
+    Returns:
+        Written processing information item
+        
+    Raises:
+        HTTPException: If the title in the body does not match the path
+    """
+    if item_in.title != title:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Title does not match the path",
+        )
+    item, created = await processing_info.upsert(db, obj_in=item_in)
+    if created:
+        response.status_code = status.HTTP_201_CREATED
+    return item
 
 
 @router.get("/{item_id}", response_model=ProcessingInfoSchema)
-def read_processing_info(
+async def read_processing_info(
     *,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     item_id: int,
+    fields: Optional[str] = None,
 ) -> Any:
     """
     Get a specific processing information item by ID.
     
     Args:
+        response: Response carrying the ETag
         db: Database session
         item_id: ID of the processing information item to retrieve
+        fields: Comma-separated fields to return, every field if omitted
         
     Returns:
         The requested processing information item
@@ -80,19 +256,22 @@ def read_processing_info(
     Raises:
         HTTPException: If processing information item not found
     """
-    item = processing_info.get(db=db, id=item_id)
+    selected = parse_fields(fields, ProcessingInfoSchema)
+    item = await processing_info.get(db=db, id=item_id, fields=selected)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Processing information not found",
         )
+    if selected:
+        return fieldsets.render(fieldsets.dump(item, ProcessingInfoSchema, selected), response)
     return item
 
 
 @router.put("/{item_id}", response_model=ProcessingInfoSchema)
-def update_processing_info(
+async def update_processing_info(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     item_id: int,
     item_in: ProcessingInfoUpdate,
 ) -> Any:
@@ -110,19 +289,19 @@ def update_processing_info(
     Raises:
         HTTPException: If processing information item not found
     """
-    item = processing_info.get(db=db, id=item_id)
+    item = await processing_info.update_by_id(db=db, id=item_id, obj_in=item_in)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Processing information not found",
         )
-    return processing_info.update(db=db, db_obj=item, obj_in=item_in)
+    return item
 
 
 @router.delete("/{item_id}", response_model=ProcessingInfoSchema)
-def delete_processing_info(
+async def delete_processing_info(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     item_id: int,
 ) -> Any:
     """
@@ -138,10 +317,10 @@ def delete_processing_info(
     Raises:
         HTTPException: If processing information item not found
     """
-    item = processing_info.get(db=db, id=item_id)
+    item = await processing_info.remove(db=db, id=item_id, read=True)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Processing information not found",
         )
-    return processing_info.remove(db=db, id=item_id) 
\ No newline at end of file
+    return item
@@ -3,14 +3,22 @@ SolutionsData API endpoints.
 
 This module provides API endpoints for managing solutions data.
 """
-from typing import Any, List
+from typing import Any, Dict, List, Optional, Sequence
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.deps import get_db
+from app.api.routing import ResourceRoute
+from app.core import fieldsets, streaming
+from app.core.deps import BulkPayload, Filters, conditional_get, get_db, require_existing
+from app.core.fieldsets import parse_expand, parse_fields
+from app.core.filtering import parse_ids, parse_sort
+from app.core.pagination import CountMode
+from app.core.streaming import ExportFormat
 from app.crud.solutions_data import solutions_data
 from app.models.solutions_data import SolutionsData
+from app.schemas.bulk import BulkAffected, BulkCreated, BulkUpdate
 from app.schemas.solutions_data import (
     SolutionsDataCreate,
     SolutionsDataList,
@@ -18,35 +26,141 @@ from app.schemas.solutions_data import (
     SolutionsDataUpdate,
 )
 
-router = APIRouter()
+router = APIRouter(
+    route_class=ResourceRoute,
+    dependencies=[
+        Depends(conditional_get("solutions_data", "images")),
+        Depends(require_existing("solutions_data", "Solutions data not found")),
+    ],
+)
+
+
+def _item_data(item: SolutionsData, expand: Sequence[str]) -> Dict[str, Any]:
+    """
+    Serialize a solutions data item, with its image if expanded.
+    
+    Args:
+        item: Solutions data item
+        expand: Expanded relationship fields
+        
+    Returns:
+        Dictionary matching the solutions data schema
+    """
+    return {
+        "id": item.id,
+        "title": item.title,
+        "pricing": item.pricing,
+        "img_id": item.img_id,
+        "img": item.image if "img" in expand else None,
+    }
 
 
 @router.get("/", response_model=SolutionsDataList)
-def read_solutions_data_items(
-    db: Session = Depends(get_db),
+async def read_solutions_data_items(
+    response: Response,
+    filters: Filters,
+    db: AsyncSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
+    ids: Optional[str] = None,
 ) -> Any:
     """
     Retrieve all solutions data items.
     
     Args:
+        response: Response carrying the cursor of the next page, the count
+            and the ids with no record
+        filters: Conditions given as ``filter[column][operator]=value``
         db: Database session
         skip: Number of records to skip
         limit: Maximum number of records to return
+        cursor: Cursor of the page to read, from the previous page
+        count: How to count the records: "exact", "estimate" or "none"
+        sort: Comma-separated sort columns, "-" prefixed for descending order
+        fields: Comma-separated fields to return, every field if omitted
+        expand: Comma-separated relationship fields to include, e.g. "img"
+        ids: Comma-separated ids of the records to return instead of a page
         
     Returns:
         List of solutions data items
     """
-    items = solutions_data.get_multi(db, skip=skip, limit=limit)
-    return {"items": items, "count": len(items)}
+    order = parse_sort(sort)
+    selected = parse_fields(fields, SolutionsDataSchema)
+    expanded = parse_expand(expand, solutions_data.expandable)
+    if ids is not None:
+        items, missing = await solutions_data.get_many(
+            db, parse_ids(ids), fields=selected, expand=expanded
+        )
+        if missing:
+            response.headers["X-Missing-Ids"] = ",".join(map(str, missing))
+        next_cursor, total = None, len(items)
+    else:
+        items = await solutions_data.get_multi(
+            db,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            filters=filters,
+            sort=order,
+            fields=selected,
+            expand=expanded,
+        )
+        next_cursor = solutions_data.next_cursor(items, limit, order)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        # Without a count mode, count keeps reporting the page size
+        total = len(items) if count is None else await solutions_data.total(db, count, filters)
+    if selected:
+        content = [
+            fieldsets.dump(item, SolutionsDataSchema, selected, solutions_data.field_attributes)
+            for item in items
+        ]
+        return fieldsets.render(
+            {"items": content, "count": total, "next_cursor": next_cursor}, response
+        )
+    return {
+        "items": [_item_data(item, expanded) for item in items],
+        "count": total,
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_solutions_data_items(
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    format: ExportFormat = "ndjson",
+    fields: Optional[str] = None,
+) -> StreamingResponse:
+    """
+    Export every solutions data item as NDJSON or CSV.
+    
+    Args:
+        response: Response carrying the ETag
+        db: Database session
+        format: "ndjson" for one JSON object per line, or "csv"
+        fields: Comma-separated fields to export, every field if omitted
+        
+    Returns:
+        Streaming response with one record per line, in id order
+    """
+    selected = parse_fields(fields, SolutionsDataSchema)
+    return streaming.export_response(
+        db, solutions_data, SolutionsDataSchema, format, selected, headers=response.headers
+    )
 
 
 @router.post("/", response_model=SolutionsDataSchema, status_code=status.HTTP_201_CREATED)
-def create_solutions_data(
+async def create_solutions_data(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     item_in: SolutionsDataCreate,
+    expand: Optional[str] = None,
 ) -> Any:
     """
     Create a new solutions data item.
@@ -54,27 +168,133 @@ def create_solutions_data(
     Args:
         db: Database session
         item_in: SolutionsData information to create
+        expand: Comma-separated relationship fields to include, e.g. "img"
         
     Returns:
         Created solutions data item
     """
-    item = solutions_data.create(db=db, obj_in=item_in)
-    # Reload the object with image relationship to ensure it's returned in response
-    return solutions_data.get_with_image(db=db, id=item.id)
+    expanded = parse_expand(expand, solutions_data.expandable)
+    item = await solutions_data.create(db=db, obj_in=item_in)
+    await solutions_data.load_expanded(db, item, expanded)
+    return _item_data(item, expanded)
+
+
+@router.post("/bulk", response_model=BulkCreated, status_code=status.HTTP_201_CREATED)
+async def bulk_create_solutions_data(
+    *,
+    db: AsyncSession = Depends(get_db),
+    items_in: BulkPayload[SolutionsDataCreate],
+) -> BulkCreated:
+    """
+    Create several solutions data items with multi-row inserts.
+    
+    Args:
+        db: Database session
+        items_in: Data of each solutions data item to create
+        
+    Returns:
+        IDs of the created solutions data items, in the order of the payload
+    """
+    return BulkCreated(ids=await solutions_data.create_many(db, objs_in=items_in))
+
+
+@router.patch("/bulk", response_model=BulkAffected)
+async def bulk_update_solutions_data(
+    *,
+    db: AsyncSession = Depends(get_db),
+    filters: Filters,
+    bulk_in: BulkUpdate[SolutionsDataUpdate],
+) -> BulkAffected:
+    """
+    Update several solutions data items with set-based statements.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        bulk_in: Values with the ids they apply to, or solutions data items with their values
+        
+    Returns:
+        Number of solutions data items updated
+    """
+    affected = await solutions_data.update_many(db, obj_in=bulk_in, filters=filters)
+    return BulkAffected(affected=affected)
+
+
+@router.delete("/bulk", response_model=BulkAffected)
+async def bulk_delete_solutions_data(
+    *,
+    db: AsyncSession = Depends(get_db),
+    filters: Filters,
+    ids: Optional[str] = None,
+) -> BulkAffected:
+    """
+    Delete several solutions data items, by ids or filters.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        ids: Comma-separated ids of the solutions data items to delete
+        
+    Returns:
+        Number of solutions data items deleted
+    """
+    selected = parse_ids(ids) if ids is not None else None
+    affected = await solutions_data.remove_many(db, ids=selected, filters=filters)
+    return BulkAffected(affected=affected)
+
+
+@router.put("/by-key/{title:path}", response_model=SolutionsDataSchema)
+async def upsert_solutions_data(
+    *,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    title: str,
+    item_in: SolutionsDataCreate,
+) -> Any:
+    """
+    Create or replace a solutions data item by title, with a single statement.
+    
+    Args:
+        response: Response whose status is 201 when the solutions data item is created
+        db: Database session
+        title: Title of the solutions data item, matching the one in the body
+        item_in: Data of the solutions data item
+        
+    Returns:
+        Written solutions data item
+        
+    Raises:
+        HTTPException: If the title in the body does not match the path
+    """
+    if item_in.title != title:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Title does not match the path",
+        )
+    item, created = await solutions_data.upsert(db, obj_in=item_in)
+    if created:
+        response.status_code = status.HTTP_201_CREATED
+    return _item_data(item, ())
 
 
 @router.get("/{item_id}", response_model=SolutionsDataSchema)
-def read_solutions_data(
+async def read_solutions_data(
     *,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     item_id: int,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
 ) -> Any:
     """
     Get a specific solutions data item by ID.
     
     Args:
+        response: Response carrying the ETag
         db: Database session
         item_id: ID of the solutions data item to retrieve
+        fields: Comma-separated fields to return, every field if omitted
+        expand: Comma-separated relationship fields to include, e.g. "img"
         
     Returns:
         The requested solutions data item
@@ -82,21 +302,29 @@ def read_solutions_data(
     Raises:
         HTTPException: If solutions data item not found
     """
-    item = solutions_data.get_with_image(db=db, id=item_id)
+    selected = parse_fields(fields, SolutionsDataSchema)
+    expanded = parse_expand(expand, solutions_data.expandable)
+    item = await solutions_data.get(db=db, id=item_id, fields=selected, expand=expanded)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Solutions data not found",
         )
-    return item
+    if selected:
+        content = fieldsets.dump(
+            item, SolutionsDataSchema, selected, solutions_data.field_attributes
+        )
+        return fieldsets.render(content, response)
+    return _item_data(item, expanded)
 
 
 @router.put("/{item_id}", response_model=SolutionsDataSchema)
-def update_solutions_data(
+async def update_solutions_data(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     item_id: int,
     item_in: SolutionsDataUpdate,
+    expand: Optional[str] = None,
 ) -> Any:
     """
     Update a solutions data item.
@@ -105,6 +333,7 @@ def update_solutions_data(
         db: Database session
         item_id: ID of the solutions data item to update
         item_in: Updated solutions data information
+        expand: Comma-separated relationship fields to include, e.g. "img"
         
     Returns:
         Updated solutions data item
@@ -112,21 +341,21 @@ def update_solutions_data(
     Raises:
         HTTPException: If solutions data item not found
     """
-    item = solutions_data.get_with_image(db=db, id=item_id)
-    if not item:
+    expanded = parse_expand(expand, solutions_data.expandable)
+    updated_item = await solutions_data.update_by_id(db=db, id=item_id, obj_in=item_in)
+    if not updated_item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Solutions data not found",
         )
-    updated_item = solutions_data.update(db=db, db_obj=item, obj_in=item_in)
-    # Reload to ensure image relationship is included
-    return solutions_data.get_with_image(db=db, id=updated_item.id)
+    await solutions_data.load_expanded(db, updated_item, expanded)
+    return _item_data(updated_item, expanded)
 
 
 @router.delete("/{item_id}", response_model=SolutionsDataSchema)
-def delete_solutions_data(
+async def delete_solutions_data(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     item_id: int,
 ) -> Any:
     """
@@ -142,10 +371,10 @@ def delete_solutions_data(
     Raises:
         HTTPException: If solutions data item not found
     """
-    item = solutions_data.get_with_image(db=db, id=item_id)
+    item = await solutions_data.remove(db=db, id=item_id, read=True)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Solutions data not found",
         )
-    return solutions_data.remove(db=db, id=item_id) 
\ No newline at end of file
+    return item
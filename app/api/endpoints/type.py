@@ -3,36 +3,100 @@ Type API endpoints.
 
 This module provides API endpoints for managing types.
 """
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 
-from app.core.deps import DB
+from app.api.routing import ResourceRoute
+from app.core import fieldsets, streaming
+from app.core.deps import BulkPayload, DB, Filters, conditional_get, require_existing
+from app.core.fieldsets import parse_expand, parse_fields
+from app.core.filtering import parse_ids, parse_sort
+from app.core.pagination import CountMode
+from app.core.streaming import ExportFormat
 from app.models.type import Type as TypeModel
+from app.schemas.bulk import BulkAffected, BulkCreated, BulkUpdate
 from app.schemas.type import TypeSchema, TypeCreate, TypeUpdate
 from app.crud.type import type as type_crud
 
-router = APIRouter()
+router = APIRouter(
+    route_class=ResourceRoute,
+    dependencies=[
+        Depends(conditional_get("types", "images")),
+        Depends(require_existing("types", "Type not found")),
+    ],
+)
 
 
 @router.get("/", response_model=List[TypeSchema])
-def read_types(
+async def read_types(
+    response: Response,
     db: DB,
+    filters: Filters,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
+    ids: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
     """
     Retrieve all types.
     
     Args:
+        response: Response carrying the cursor of the next page, the count
+            and the ids with no record
         db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
         skip: Number of records to skip
         limit: Maximum number of records to return
+        cursor: Cursor of the page to read, from the previous page
+        count: How to count the records: "exact", "estimate" or "none"
+        sort: Comma-separated sort columns, "-" prefixed for descending order
+        fields: Comma-separated fields to return, every field if omitted
+        expand: Comma-separated relationship fields to include, e.g. "img"
+        ids: Comma-separated ids of the records to return instead of a page
         
     Returns:
         List of types
     """
-    types = type_crud.get_multi(db=db, skip=skip, limit=limit)
+    order = parse_sort(sort)
+    selected = parse_fields(fields, TypeSchema)
+    expanded = parse_expand(expand, type_crud.expandable)
+    if ids is not None:
+        types, missing = await type_crud.get_many(
+            db, parse_ids(ids), fields=selected, expand=expanded
+        )
+        if missing:
+            response.headers["X-Missing-Ids"] = ",".join(map(str, missing))
+    else:
+        types = await type_crud.get_multi(
+            db=db,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            filters=filters,
+            sort=order,
+            fields=selected,
+            expand=expanded,
+        )
+        next_cursor = type_crud.next_cursor(types, limit, order)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        total = await type_crud.total(db, count, filters)
+        if total is not None:
+            response.headers["X-Total-Count"] = str(total)
+    if selected:
+        return fieldsets.render(
+            [
+                fieldsets.dump(type_item, TypeSchema, selected, type_crud.field_attributes)
+                for type_item in types
+            ],
+            response,
+        )
     return [
         {
             "id": type_item.id,
@@ -40,17 +104,43 @@ def read_types(
             "description": type_item.description,
             "features": type_item.features,
             "img_id": type_item.img_id,
-            "img": type_item.image
+            "img": type_item.image if "img" in expanded else None
         } 
         for type_item in types
     ]
 
 
+@router.get("/export", response_class=StreamingResponse)
+async def export_types(
+    response: Response,
+    db: DB,
+    format: ExportFormat = "ndjson",
+    fields: Optional[str] = None,
+) -> StreamingResponse:
+    """
+    Export every type as NDJSON or CSV.
+    
+    Args:
+        response: Response carrying the ETag
+        db: Database session
+        format: "ndjson" for one JSON object per line, or "csv"
+        fields: Comma-separated fields to export, every field if omitted
+        
+    Returns:
+        Streaming response with one record per line, in id order
+    """
+    selected = parse_fields(fields, TypeSchema)
+    return streaming.export_response(
+        db, type_crud, TypeSchema, format, selected, headers=response.headers
+    )
+
+
 @router.post("/", response_model=TypeSchema, status_code=status.HTTP_201_CREATED)
-def create_type(
+async def create_type(
     *,
     db: DB,
     type_in: TypeCreate,
+    expand: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Create a new type.
@@ -58,13 +148,14 @@ def create_type(
     Args:
         db: Database session
         type_in: Type data to create
+        expand: Comma-separated relationship fields to include, e.g. "img"
         
     Returns:
         Created type
     """
-    type_obj = type_crud.create_with_features(db=db, obj_in=type_in)
-    # Reload to ensure image is loaded
-    type_obj = type_crud.get_with_image(db=db, id=type_obj.id)
+    expanded = parse_expand(expand, type_crud.expandable)
+    type_obj = await type_crud.create_with_features(db=db, obj_in=type_in)
+    await type_crud.load_expanded(db, type_obj, expanded)
     
     return {
         "id": type_obj.id,
@@ -72,22 +163,133 @@ def create_type(
         "description": type_obj.description,
         "features": type_obj.features,
         "img_id": type_obj.img_id,
-        "img": type_obj.image
+        "img": type_obj.image if "img" in expanded else None
+    }
+
+
+@router.post("/bulk", response_model=BulkCreated, status_code=status.HTTP_201_CREATED)
+async def bulk_create_types(
+    *,
+    db: DB,
+    types_in: BulkPayload[TypeCreate],
+) -> BulkCreated:
+    """
+    Create several types with multi-row inserts.
+    
+    Args:
+        db: Database session
+        types_in: Data of each type to create
+        
+    Returns:
+        IDs of the created types, in the order of the payload
+    """
+    return BulkCreated(ids=await type_crud.create_many(db, objs_in=types_in))
+
+
+@router.patch("/bulk", response_model=BulkAffected)
+async def bulk_update_types(
+    *,
+    db: DB,
+    filters: Filters,
+    bulk_in: BulkUpdate[TypeUpdate],
+) -> BulkAffected:
+    """
+    Update several types with set-based statements.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        bulk_in: Values with the ids they apply to, or types with their values
+        
+    Returns:
+        Number of types updated
+    """
+    affected = await type_crud.update_many(db, obj_in=bulk_in, filters=filters)
+    return BulkAffected(affected=affected)
+
+
+@router.delete("/bulk", response_model=BulkAffected)
+async def bulk_delete_types(
+    *,
+    db: DB,
+    filters: Filters,
+    ids: Optional[str] = None,
+) -> BulkAffected:
+    """
+    Delete several types, by ids or filters.
+    
+    Args:
+        db: Database session
+        filters: Conditions given as ``filter[column][operator]=value``
+        ids: Comma-separated ids of the types to delete
+        
+    Returns:
+        Number of types deleted
+    """
+    selected = parse_ids(ids) if ids is not None else None
+    affected = await type_crud.remove_many(db, ids=selected, filters=filters)
+    return BulkAffected(affected=affected)
+
+
+@router.put("/by-key/{title:path}", response_model=TypeSchema)
+async def upsert_type(
+    *,
+    response: Response,
+    db: DB,
+    title: str,
+    type_in: TypeCreate,
+) -> Dict[str, Any]:
+    """
+    Create or replace a type by title, with a single statement.
+    
+    Args:
+        response: Response whose status is 201 when the type is created
+        db: Database session
+        title: Title of the type, matching the one in the body
+        type_in: Data of the type
+        
+    Returns:
+        Written type
+        
+    Raises:
+        HTTPException: If the title in the body does not match the path
+    """
+    if type_in.title != title:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Title does not match the path",
+        )
+    type_obj, created = await type_crud.upsert(db, obj_in=type_in)
+    if created:
+        response.status_code = status.HTTP_201_CREATED
+    return {
+        "id": type_obj.id,
+        "title": type_obj.title,
+        "description": type_obj.description,
+        "features": type_obj.features,
+        "img_id": type_obj.img_id,
+        "img": None,
     }
 
 
 @router.get("/{type_id}", response_model=TypeSchema)
-def read_type(
+async def read_type(
     *,
+    response: Response,
     db: DB,
     type_id: int,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Get a specific type by ID.
     
     Args:
+        response: Response carrying the ETag
         db: Database session
         type_id: ID of the type to retrieve
+        fields: Comma-separated fields to return, every field if omitted
+        expand: Comma-separated relationship fields to include, e.g. "img"
         
     Returns:
         Type with the specified ID
@@ -95,12 +297,17 @@ def read_type(
     Raises:
         HTTPException: If type not found
     """
-    type_obj = type_crud.get_with_image(db=db, id=type_id)
+    selected = parse_fields(fields, TypeSchema)
+    expanded = parse_expand(expand, type_crud.expandable)
+    type_obj = await type_crud.get(db=db, id=type_id, fields=selected, expand=expanded)
     if not type_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Type not found",
         )
+    if selected:
+        content = fieldsets.dump(type_obj, TypeSchema, selected, type_crud.field_attributes)
+        return fieldsets.render(content, response)
     
     return {
         "id": type_obj.id,
@@ -108,16 +315,17 @@ def read_type(
         "description": type_obj.description,
         "features": type_obj.features,
         "img_id": type_obj.img_id,
-        "img": type_obj.image
+        "img": type_obj.image if "img" in expanded else None
     }
 
 
 @router.put("/{type_id}", response_model=TypeSchema)
-def update_type(
+async def update_type(
     *,
     db: DB,
     type_id: int,
     type_in: TypeUpdate,
+    expand: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Update a type.
@@ -126,6 +334,7 @@ def update_type(
         db: Database session
         type_id: ID of the type to update
         type_in: New type data
+        expand: Comma-separated relationship fields to include, e.g. "img"
         
     Returns:
         Updated type
@@ -133,16 +342,15 @@ def update_type(
     Raises:
         HTTPException: If type not found
     """
-    type_obj = type_crud.get_with_image(db=db, id=type_id)
-    if not type_obj:
+    expanded = parse_expand(expand, type_crud.expandable)
+    updated_type = await type_crud.update_by_id(db=db, id=type_id, obj_in=type_in)
+    if not updated_type:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Type not found",
         )
     
-    updated_type = type_crud.update(db=db, db_obj=type_obj, obj_in=type_in)
-    # Reload to ensure image is loaded
-    updated_type = type_crud.get_with_image(db=db, id=updated_type.id)
+    await type_crud.load_expanded(db, updated_type, expanded)
     
     return {
         "id": updated_type.id,
@@ -150,12 +358,12 @@ def update_type(
         "description": updated_type.description,
         "features": updated_type.features,
         "img_id": updated_type.img_id,
-        "img": updated_type.image
+        "img": updated_type.image if "img" in expanded else None
     }
 
 
 @router.delete("/{type_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_type(
+async def delete_type(
     *,
     db: DB,
     type_id: int,
@@ -170,12 +378,9 @@ def delete_type(
     Raises:
         HTTPException: If type not found
     """
-    type_obj = type_crud.get(db=db, id=type_id)
-    if not type_obj:
+    if not await type_crud.remove(db=db, id=type_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Type not found",
         )
-    
-    db.delete(type_obj)
-    db.commit() 
\ No newline at end of file
+    
\ No newline at end of file
@@ -0,0 +1,547 @@
+"""
+API routing module.
+
+This module provides the route classes used by the resource routers. GET
+responses are read through a two-tier cache keyed by their ETag, so a hit in
+any worker sharing the backend skips the handler entirely. Once an entry
+outlives the cache TTL it may still be served for the router's maximum
+staleness while a background request refreshes it. On a miss, GET requests
+that are identical to one already in flight wait for it and share its
+response instead of opening their own session and repeating the query.
+
+POST requests sent with an Idempotency-Key header run once per key: the
+response of the first is stored with the key, and retries are answered with
+it before their body is even validated. A retry arriving while the first
+request runs waits for its response.
+"""
+import asyncio
+import json
+import secrets
+import time
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Coroutine,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.routing import BaseRoute
+
+from app.core import idempotency
+from app.core.cache import TwoTierCache, backend, call_backend
+from app.core.config import settings
+from app.core.deps import etag_matches, get_db, make_etag
+from app.core.metrics import registry
+from app.core.singleflight import SingleFlight
+
+coalescer = SingleFlight()
+idempotent_requests = SingleFlight()
+
+response_cache = TwoTierCache(
+    "responses",
+    backend,
+    maxsize=settings.CACHE_MAX_ENTRIES,
+    # Keep entries for as long as any router may serve them stale
+    ttl=settings.RESPONSE_CACHE_TTL + max(
+        [settings.RESPONSE_CACHE_MAX_STALE, *settings.RESPONSE_CACHE_MAX_STALE_ROUTERS.values()]
+    ),
+    l1_ttl=settings.RESPONSE_CACHE_L1_TTL,
+)
+
+# Header marking the internal requests that refresh stale entries; the value
+# is private to the process so clients cannot use it to bypass the cache
+REFRESH_HEADER = "x-resivate-refresh"
+REFRESH_TOKEN = secrets.token_hex(16)
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+# Header marking responses replayed from an idempotency key
+REPLAYED_HEADER = "Idempotent-Replayed"
+# Seconds between checks of a key held by a request running in another worker
+IDEMPOTENCY_POLL_INTERVAL = 0.05
+
+_REFRESH_SCOPE_KEYS = (
+    "type",
+    "asgi",
+    "http_version",
+    "scheme",
+    "server",
+    "client",
+    "root_path",
+    "path",
+    "raw_path",
+    "query_string",
+)
+
+# Background refreshes in progress, by ETag
+refresh_tasks: Dict[str, asyncio.Task] = {}
+
+requests_total = registry.counter(
+    "resivate_get_requests_total", "GET requests handled by resource routes"
+)
+coalesced_total = registry.counter(
+    "resivate_get_requests_coalesced_total",
+    "GET requests answered with the response of an identical in-flight request",
+)
+cache_hits_total = registry.counter(
+    "resivate_response_cache_hits_total", "GET requests answered from the response cache"
+)
+stale_hits_total = registry.counter(
+    "resivate_response_cache_stale_total",
+    "GET requests answered with an expired response while it was refreshed",
+)
+idempotent_replays_total = registry.counter(
+    "resivate_idempotent_replays_total",
+    "POST requests answered with the stored response of their idempotency key",
+)
+
+
+def router_name(request: Request) -> str:
+    """
+    Get the name of the resource router handling a request.
+    
+    Args:
+        request: Incoming request
+        
+    Returns:
+        First path segment after the API prefix, e.g. "menu-options"
+    """
+    path = request.url.path.removeprefix(settings.API_V1_STR)
+    return path.strip("/").split("/", 1)[0]
+
+
+def request_key(request: Request) -> Hashable:
+    """
+    Build the key identifying equivalent GET requests.
+    
+    Query parameters are sorted so their order does not matter. The
+    If-None-Match header is included because it changes the response.
+    
+    Args:
+        request: Incoming request
+        
+    Returns:
+        Hashable key
+    """
+    query = tuple(sorted(request.query_params.multi_items()))
+    return (request.url.path, query, request.headers.get("if-none-match"))
+
+
+def copy_response(response: Response) -> Response:
+    """
+    Copy a response so it can be sent to another client.
+    
+    Args:
+        response: Response produced by the leading request
+        
+    Returns:
+        Response with the same status, headers and body
+    """
+    copy = Response(content=response.body, status_code=response.status_code)
+    copy.raw_headers = list(response.raw_headers)
+    return copy
+
+
+def iter_routes(routes: Iterable[BaseRoute], prefix: str = "") -> Iterator[Tuple[str, APIRoute]]:
+    """
+    Walk the API routes of an application, including those of its routers.
+    
+    Recent FastAPI versions keep included routers as a single entry instead of
+    copying their routes, so the prefix of each router is applied here.
+    
+    Args:
+        routes: Routes of an application or router
+        prefix: Path prefix of the enclosing router
+        
+    Yields:
+        Full path and route for every API route
+    """
+    for route in routes:
+        if isinstance(route, APIRoute):
+            yield prefix + route.path, route
+        elif hasattr(route, "original_router"):
+            yield from iter_routes(
+                route.original_router.routes, prefix + route.include_context.prefix
+            )
+
+
+def route_tables(route: APIRoute) -> Tuple[str, ...]:
+    """
+    Get the tables a route's responses are built from.
+    
+    Args:
+        route: Route whose dependencies may include ``conditional_get``
+        
+    Returns:
+        Names of the tables, empty if the route does not declare them
+    """
+    for dependant in route.dependencies:
+        tables = getattr(dependant.dependency, "tables", None)
+        if tables:
+            return tables
+    return ()
+
+
+def max_staleness(route: str) -> int:
+    """
+    Get how long a router's expired responses may still be served.
+    
+    Args:
+        route: Name of the router
+        
+    Returns:
+        Maximum staleness in seconds
+    """
+    return settings.RESPONSE_CACHE_MAX_STALE_ROUTERS.get(route, settings.RESPONSE_CACHE_MAX_STALE)
+
+
+def cache_control(route: str) -> str:
+    """
+    Build the Cache-Control header exposing a router's caching policy.
+    
+    Args:
+        route: Name of the router
+        
+    Returns:
+        Header value
+    """
+    return f"max-age={settings.RESPONSE_MAX_AGE}, stale-while-revalidate={max_staleness(route)}"
+
+
+def encode_response(response: Response) -> bytes:
+    """
+    Serialize a buffered response for the shared cache.
+    
+    Args:
+        response: Response to store
+        
+    Returns:
+        JSON line with the storage time, status and headers, followed by the body
+    """
+    headers = [
+        (name.decode("latin-1"), value.decode("latin-1"))
+        for name, value in response.raw_headers
+        if name != b"content-length"
+    ]
+    meta = json.dumps(
+        {"stored_at": time.time(), "status": response.status_code, "headers": headers}
+    )
+    return meta.encode() + b"\n" + response.body
+
+
+def decode_response(data: bytes) -> Tuple[float, Response]:
+    """
+    Rebuild a response stored with ``encode_response``.
+    
+    Args:
+        data: Stored bytes
+        
+    Returns:
+        Time the response was stored, and the response with the stored
+        status, headers and body
+    """
+    meta, body = data.split(b"\n", 1)
+    entry = json.loads(meta)
+    response = Response(content=body, status_code=entry["status"], headers=dict(entry["headers"]))
+    return entry["stored_at"], response
+
+
+def schedule_refresh(request: Request, etag: str) -> None:
+    """
+    Refresh a cached response in the background.
+    
+    The request is sent through the application again, marked so that it
+    skips the cache lookup and stores its response. At most one refresh runs
+    per ETag.
+    
+    Args:
+        request: Request answered with the stale response
+        etag: ETag of the response
+    """
+    if etag in refresh_tasks:
+        return
+    task = asyncio.get_running_loop().create_task(_refresh(request))
+    refresh_tasks[etag] = task
+    task.add_done_callback(lambda _: refresh_tasks.pop(etag, None))
+
+
+async def _refresh(request: Request) -> None:
+    """Send a copy of a GET request through the application, discarding the response."""
+    scope = {key: value for key, value in request.scope.items() if key in _REFRESH_SCOPE_KEYS}
+    scope["method"] = "GET"
+    scope["headers"] = [
+        (name, value) for name, value in request.scope["headers"] if name != b"if-none-match"
+    ] + [(REFRESH_HEADER.encode(), REFRESH_TOKEN.encode())]
+    if "state" in request.scope:
+        scope["state"] = dict(request.scope["state"])
+    
+    async def receive() -> Dict[str, Any]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+    
+    async def send(message: Dict[str, Any]) -> None:
+        pass
+    
+    await request.app(scope, receive, send)
+
+
+@asynccontextmanager
+async def request_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Open a database session outside of a route's dependencies.
+    
+    The session comes from the ``get_db`` dependency, or its override.
+    
+    Args:
+        request: Incoming request
+        
+    Yields:
+        Database session, closed on exit
+    """
+    sessions = request.app.dependency_overrides.get(get_db, get_db)()
+    try:
+        yield await sessions.__anext__()
+    finally:
+        await sessions.aclose()
+
+
+def replay_response(data: bytes) -> Response:
+    """
+    Rebuild a response stored with an idempotency key.
+    
+    Args:
+        data: Response serialized with ``encode_response``
+        
+    Returns:
+        Response marked as replayed
+    """
+    _, response = decode_response(data)
+    response.headers[REPLAYED_HEADER] = "true"
+    return response
+
+
+def idempotent_handler(
+    handler: Callable[[Request], Coroutine[Any, Any, Response]],
+) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+    """
+    Wrap a POST handler so requests sharing an idempotency key run once.
+    
+    Requests without the header run as before. The key is reserved before
+    the handler runs, and the reservation is renewed until it returns.
+    Responses with a status below 500 are stored with the key; otherwise, or
+    if the handler raises, the key is released so the request can be retried.
+    
+    Args:
+        handler: Default handler of the route
+        
+    Returns:
+        Request handler
+    """
+    
+    async def acquire(request: Request, id: str, fingerprint: str) -> Optional[Response]:
+        # Wait for a request holding the key in another worker
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+        while True:
+            async with request_session(request) as db:
+                row = await idempotency.reserve(db, id, fingerprint)
+            if row is None:
+                return None
+            if row.fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                    detail="Idempotency-Key was already used for a different request",
+                )
+            stored = idempotency.stored_response(row)
+            if stored is not None:
+                return replay_response(stored)
+            if time.monotonic() >= deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is in progress",
+                )
+            await asyncio.sleep(IDEMPOTENCY_POLL_INTERVAL)
+    
+    async def renew(request: Request, id: str) -> None:
+        # Keep the key reserved for as long as the handler runs, however long
+        while True:
+            await asyncio.sleep(settings.IDEMPOTENCY_LOCK_TTL / 3)
+            try:
+                async with request_session(request) as db:
+                    await idempotency.renew(db, id)
+            except Exception:
+                # Try again at the next renewal, before the reservation expires
+                continue
+    
+    async def run(request: Request, id: str, fingerprint: str) -> Response:
+        response = await acquire(request, id, fingerprint)
+        if response is not None:
+            idempotent_replays_total.inc(route=router_name(request))
+            return response
+        lease = asyncio.get_running_loop().create_task(renew(request, id))
+        try:
+            response = await handler(request)
+        except BaseException:
+            async with request_session(request) as db:
+                await idempotency.release(db, id)
+            raise
+        finally:
+            lease.cancel()
+        async with request_session(request) as db:
+            if response.status_code < 500 and hasattr(response, "body"):
+                await idempotency.complete(
+                    db, id, response.status_code, encode_response(response)
+                )
+            else:
+                await idempotency.release(db, id)
+        return response
+    
+    async def keyed_handler(request: Request) -> Response:
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return await handler(request)
+        if not 0 < len(key) <= 255:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Idempotency-Key must be 1 to 255 characters long",
+            )
+        id = idempotency.key_id(request.url.path, key)
+        fingerprint = idempotency.fingerprint(
+            request.method, request.url.path, request.url.query, await request.body()
+        )
+        flight = (id, fingerprint)
+        waiting = idempotent_requests.in_flight(flight)
+        response = await idempotent_requests.do(
+            flight, lambda: run(request, id, fingerprint), share=_share
+        )
+        if not waiting:
+            return response
+        if response is None:
+            return await run(request, id, fingerprint)
+        idempotent_replays_total.inc(route=router_name(request))
+        response.headers[REPLAYED_HEADER] = "true"
+        return response
+    
+    return keyed_handler
+
+
+class IdempotentRoute(APIRoute):
+    """
+    Route class running POST requests that share an idempotency key once.
+    """
+    
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        """
+        Wrap the default handler with idempotency keys for POST routes.
+        
+        Returns:
+            Request handler
+        """
+        handler = super().get_route_handler()
+        if "POST" not in self.methods:
+            return handler
+        return idempotent_handler(handler)
+
+
+class SharedGetRoute(APIRoute):
+    """
+    Route class caching GET responses and sharing the work of identical
+    concurrent GET requests.
+    """
+    
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        """
+        Wrap the default handler with response caching and request
+        coalescing for GET routes.
+        
+        Returns:
+            Request handler
+        """
+        handler = super().get_route_handler()
+        if "GET" not in self.methods:
+            return handler
+        tables = route_tables(self)
+        
+        async def load(request: Request, etag: Optional[str]) -> Response:
+            response = await handler(request)
+            if (
+                etag is not None
+                and response.status_code == status.HTTP_200_OK
+                and hasattr(response, "body")
+                # A write committed while the handler ran changes the ETag
+                and response.headers.get("etag") == etag
+            ):
+                await call_backend(response_cache.set, "response:" + etag, encode_response(response))
+            return response
+        
+        async def cached_response(request: Request, route: str, etag: str) -> Optional[Response]:
+            cached = await call_backend(response_cache.get, "response:" + etag)
+            if cached is None:
+                return None
+            stored_at, response = decode_response(cached)
+            age = time.time() - stored_at
+            if age > settings.RESPONSE_CACHE_TTL:
+                if age > settings.RESPONSE_CACHE_TTL + max_staleness(route):
+                    return None
+                stale_hits_total.inc(route=route)
+                schedule_refresh(request, etag)
+            cache_hits_total.inc(route=route)
+            if_none_match = request.headers.get("if-none-match")
+            if if_none_match and etag_matches(etag, if_none_match):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+            return response
+        
+        async def shared_handler(request: Request) -> Response:
+            route = router_name(request)
+            requests_total.inc(route=route)
+            etag = None
+            if tables and settings.RESPONSE_CACHE_ENABLED:
+                etag = await call_backend(make_etag, request, tables)
+                if request.headers.get(REFRESH_HEADER) != REFRESH_TOKEN:
+                    response = await cached_response(request, route, etag)
+                    if response is not None:
+                        response.headers["Cache-Control"] = cache_control(route)
+                        return response
+            response = await fetch(request, etag)
+            if tables and "cache-control" not in response.headers:
+                response.headers["Cache-Control"] = cache_control(route)
+            return response
+        
+        async def fetch(request: Request, etag: Optional[str]) -> Response:
+            if not settings.COALESCE_ENABLED:
+                return await load(request, etag)
+            route = router_name(request)
+            key = request_key(request)
+            waiting = coalescer.in_flight(key)
+            response = await coalescer.do(key, lambda: load(request, etag), share=_share)
+            if not waiting:
+                return response
+            if response is None:
+                # Streaming responses cannot be replayed; run the request
+                return await handler(request)
+            coalesced_total.inc(route=route)
+            return response
+        
+        return shared_handler
+
+
+class ResourceRoute(SharedGetRoute, IdempotentRoute):
+    """
+    Route class of the resource routers: GET requests are cached and
+    coalesced, and POST requests honour idempotency keys.
+    """
+
+
+def _share(response: Response) -> Response | None:
+    """Give a waiting request its own copy of a buffered response."""
+    if not hasattr(response, "body"):
+        return None
+    return copy_response(response)
@@ -0,0 +1,620 @@
+"""
+Cache module.
+
+This module provides the in-process LRU cache used by the CRUD layer together
+with a registry of every cache so writes can invalidate them in one place, the
+two-tier cache putting an LRU in front of a shared backend, and the per-table
+version counters that committed writes bump. The stats of every cache are
+exported through the metrics registry.
+"""
+import asyncio
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.cache_backends import CacheBackend, create_backend
+from app.core.metrics import registry
+
+# Tag carried by every cached list page of a table; inserts and deletes
+# invalidate it because they shift the contents of every page.
+ALL = "*"
+
+# Upper bounds in seconds of the entry age buckets reported by ``stats``
+AGE_BUCKETS = (1, 5, 15, 60, 300, 3600)
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live.
+    
+    Entries may carry tags such as ``("plans", 3)``; invalidating a tag drops
+    every entry that carries it. A generation counter lets readers skip
+    storing a value that was loaded before a concurrent invalidation.
+    
+    Attributes:
+        name: Name of the cache, used for stats and invalidation
+        maxsize: Maximum number of entries kept before evicting the oldest
+        ttl: Time-to-live of an entry in seconds
+        generation: Counter bumped on every invalidation
+        hits: Number of lookups answered from the cache
+        misses: Number of lookups that found no fresh entry
+        evictions: Number of entries dropped to respect ``maxsize``
+        size: Approximate number of bytes held by the entries
+    """
+    
+    def __init__(self, name: str, *, maxsize: int = 1024, ttl: float = 60.0):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            name: Name of the cache
+            maxsize: Maximum number of entries
+            ttl: Time-to-live of an entry in seconds
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any, frozenset, int]]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a value from the cache.
+        
+        Args:
+            key: Key of the entry
+            default: Value returned when the entry is missing or expired
+            
+        Returns:
+            Cached value if present and fresh, default otherwise
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value, _, _ = entry
+            if expires_at <= time.monotonic():
+                self._discard(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        *,
+        tags: Iterable[Hashable] = (),
+        generation: Optional[int] = None,
+    ) -> bool:
+        """
+        Store a value in the cache.
+        
+        Args:
+            key: Key of the entry
+            value: Value to store
+            tags: Tags used to invalidate the entry later
+            generation: Generation observed before the value was loaded; the
+                value is dropped if an invalidation happened since then
+                
+        Returns:
+            True if the value was stored, False otherwise
+        """
+        entry_size = approximate_size(value)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            if key in self._data:
+                self._discard(key)
+            entry_tags = frozenset(tags)
+            self._data[key] = (time.monotonic() + self.ttl, value, entry_tags, entry_size)
+            self.size += entry_size
+            for tag in entry_tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._discard(next(iter(self._data)))
+                self.evictions += 1
+            return True
+    
+    def delete(self, key: Hashable) -> None:
+        """
+        Remove an entry from the cache if present.
+        
+        Args:
+            key: Key of the entry
+        """
+        with self._lock:
+            self._discard(key)
+    
+    def invalidate_tags(self, tags: Iterable[Hashable]) -> int:
+        """
+        Remove every entry carrying any of the given tags.
+        
+        Args:
+            tags: Tags to invalidate
+            
+        Returns:
+            Number of entries removed
+        """
+        removed = 0
+        with self._lock:
+            self.generation += 1
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._discard(key)
+                    removed += 1
+        return removed
+    
+    def invalidate_table(self, table: str) -> int:
+        """
+        Remove every entry carrying a tag of the given table.
+        
+        Args:
+            table: Name of the table, the first element of its tags
+            
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            tags = [tag for tag in self._tags if isinstance(tag, tuple) and tag[0] == table]
+        return self.invalidate_tags(tags)
+    
+    def invalidate_prefix(self, prefix: str) -> int:
+        """
+        Remove every entry whose key is a string starting with a prefix.
+        
+        Args:
+            prefix: Key prefix, e.g. ``"bundle:"``
+            
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            self.generation += 1
+            keys = [key for key in self._data if isinstance(key, str) and key.startswith(prefix)]
+            for key in keys:
+                self._discard(key)
+        return len(keys)
+    
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+            self._tags.clear()
+            self.size = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Describe the usage and contents of the cache.
+        
+        Returns:
+            Hit, miss and eviction counts, hit rate, entry count, approximate
+            size in bytes, and the number of entries at most as old as each
+            bound of ``AGE_BUCKETS`` (cumulative, like a Prometheus histogram)
+        """
+        now = time.monotonic()
+        with self._lock:
+            ages = [self.ttl - (entry[0] - now) for entry in self._data.values()]
+            lookups = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "entries": len(self._data),
+                "bytes": self.size,
+            }
+        buckets = {str(bound): sum(age <= bound for age in ages) for bound in AGE_BUCKETS}
+        buckets["+Inf"] = len(ages)
+        stats["age_seconds"] = buckets
+        return stats
+    
+    def _discard(self, key: Hashable) -> None:
+        """Remove an entry and its tag references; caller holds the lock."""
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return
+        self.size -= entry[3]
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def approximate_size(value: Any, memo: Optional[Set[int]] = None) -> int:
+    """
+    Estimate the memory held by a cached value.
+    
+    Containers and object attributes are followed once each; SQLAlchemy
+    bookkeeping attributes are skipped.
+    
+    Args:
+        value: Value to measure
+        memo: Ids of the objects already counted
+        
+    Returns:
+        Approximate size in bytes
+    """
+    if memo is None:
+        memo = set()
+    if id(value) in memo:
+        return 0
+    memo.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, bytearray, int, float)):
+        return size
+    if isinstance(value, dict):
+        items: Iterable[Any] = (item for pair in value.items() for item in pair)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = value
+    elif hasattr(value, "__dict__"):
+        items = (item for name, item in vars(value).items() if not name.startswith("_sa_"))
+    else:
+        return size
+    return size + sum(approximate_size(item, memo) for item in items)
+
+
+# Every cache created by the application, keyed by name
+caches: Dict[str, LRUCache] = {}
+
+# Two-tier caches, keyed by the name of their L1
+tiered_caches: Dict[str, "TwoTierCache"] = {}
+
+
+def register_cache(cache: LRUCache) -> LRUCache:
+    """
+    Register a cache so it takes part in global invalidation.
+    
+    Args:
+        cache: Cache to register
+        
+    Returns:
+        The registered cache
+    """
+    caches[cache.name] = cache
+    return cache
+
+
+def invalidate_tags(tags: Iterable[Hashable]) -> int:
+    """
+    Invalidate the given tags in every registered cache.
+    
+    Args:
+        tags: Tags to invalidate
+        
+    Returns:
+        Number of entries removed across all caches
+    """
+    tags = frozenset(tags)
+    return sum(cache.invalidate_tags(tags) for cache in list(caches.values()))
+
+
+def invalidate_table(table: str, id: Optional[int] = None) -> int:
+    """
+    Invalidate what every cache holds about a table or one of its rows.
+    
+    The table's version is bumped as well, so responses cached by their
+    ETag in the shared backend are no longer looked up. This may block on
+    the backend, so async code calls it through ``call_backend``.
+    
+    Args:
+        table: Name of the table
+        id: Primary key of the row, None for the whole table
+        
+    Returns:
+        Number of entries removed from the in-process caches
+    """
+    versions.bump([table])
+    if id is not None:
+        return invalidate_tags([(table, id)])
+    return sum(cache.invalidate_table(table) for cache in list(caches.values()))
+
+
+def invalidate_prefix(prefix: str) -> int:
+    """
+    Remove the entries whose key starts with a prefix from every cache.
+    
+    This may block on the backend, so async code calls it through
+    ``call_backend``.
+    
+    Args:
+        prefix: Key prefix, e.g. ``"bundle:"``
+        
+    Returns:
+        Number of entries removed from the in-process caches and the backend
+    """
+    removed = sum(cache.invalidate_prefix(prefix) for cache in list(caches.values()))
+    return removed + backend.delete_prefix(prefix)
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Describe every registered cache.
+    
+    Returns:
+        Stats of each cache by name; two-tier caches also report the hits
+        and misses of their L2
+    """
+    stats = {}
+    for name, cache in list(caches.items()):
+        stats[name] = cache.stats()
+        tiered = tiered_caches.get(name)
+        if tiered is not None:
+            stats[name]["l2_hits"] = tiered.l2_hits
+            stats[name]["l2_misses"] = tiered.l2_misses
+    return stats
+
+
+def clear_caches() -> None:
+    """
+    Remove every entry from every registered cache and the shared backend.
+    
+    This may block on the backend, so async code calls it through
+    ``call_backend``.
+    """
+    for cache in list(caches.values()):
+        cache.clear()
+    backend.clear()
+
+
+class TwoTierCache:
+    """
+    Cache with an in-process L1 in front of a shared L2 backend.
+    
+    Reads try the L1 first and fill it from the L2; writes go to both. Values
+    are bytes so every worker sharing the backend can read them.
+    
+    Attributes:
+        l1: In-process LRU cache
+        l2: Shared backend
+        ttl: Time-to-live of L2 entries in seconds
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        backend: CacheBackend,
+        *,
+        maxsize: int = 1024,
+        ttl: float = 60.0,
+        l1_ttl: float = 5.0,
+    ):
+        """
+        Initialize the cache and register its L1.
+        
+        Args:
+            name: Name of the cache
+            backend: Shared backend used as L2
+            maxsize: Maximum number of L1 entries
+            ttl: Time-to-live of L2 entries in seconds
+            l1_ttl: Time-to-live of L1 entries in seconds
+        """
+        self.l1 = register_cache(LRUCache(name, maxsize=maxsize, ttl=l1_ttl))
+        self.l2 = backend
+        self.ttl = ttl
+        self.l2_hits = 0
+        self.l2_misses = 0
+        tiered_caches[name] = self
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Get a value from the L1, falling back to the L2.
+        
+        Args:
+            key: Key of the entry
+            
+        Returns:
+            Stored value, None on a miss in both tiers
+        """
+        value = self.l1.get(key)
+        if value is not None:
+            return value
+        value = self.l2.get(key)
+        if value is None:
+            self.l2_misses += 1
+            return None
+        self.l2_hits += 1
+        self.l1.set(key, value)
+        return value
+    
+    def set(self, key: str, value: bytes) -> None:
+        """
+        Store a value in both tiers.
+        
+        Args:
+            key: Key of the entry
+            value: Value to store
+        """
+        self.l1.set(key, value)
+        self.l2.set(key, value, self.ttl)
+
+
+class TableVersions:
+    """
+    Per-table write counters.
+    
+    Every committed write bumps the counter of each table it touched, so a
+    token built from the counters of the tables behind a response changes
+    whenever that response may have changed. Counters live in a cache
+    backend: with a shared backend every worker sees the same tokens, and the
+    backend's epoch keeps tokens from two unrelated stores from comparing
+    equal.
+    
+    Attributes:
+        backend: Backend holding the counters
+    """
+    
+    def __init__(self, backend: CacheBackend) -> None:
+        """
+        Initialize the counters.
+        
+        Args:
+            backend: Backend holding the counters
+        """
+        self.backend = backend
+    
+    @property
+    def epoch(self) -> str:
+        """Token identifying the store of the counters."""
+        return self.backend.epoch
+    
+    def bump(self, tables: Iterable[str]) -> None:
+        """
+        Increment the counters of the given tables.
+        
+        Args:
+            tables: Names of the tables written to
+        """
+        for table in set(tables):
+            self.backend.incr(f"version:{table}")
+    
+    def get(self, table: str) -> int:
+        """
+        Get the counter of a table.
+        
+        Args:
+            table: Name of the table
+            
+        Returns:
+            Number of committed writes seen for the table
+        """
+        return int(self.backend.get(f"version:{table}") or 0)
+    
+    def token(self, tables: Iterable[str]) -> str:
+        """
+        Build a token identifying the current state of the given tables.
+        
+        Args:
+            tables: Names of the tables
+            
+        Returns:
+            Token that changes whenever any of the tables is written to
+        """
+        parts = ",".join(f"{table}={self.get(table)}" for table in sorted(set(tables)))
+        return f"{self.epoch}:{parts}"
+
+
+backend = create_backend()
+
+versions = TableVersions(backend)
+
+
+# Version bumps of committed writes run in order on one thread, so commits
+# never wait on a backend blocking on I/O
+_bump_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="version-bumps")
+_pending_bumps: Set[Future] = set()
+_pending_lock = threading.Lock()
+
+
+def bump_versions(tables: Iterable[str]) -> None:
+    """
+    Bump the versions of the tables written by a committed transaction.
+    
+    Called from the commit hooks, which cannot await. When the backend blocks
+    on I/O and an event loop is running, the bump is queued to a background
+    thread instead of blocking the loop; ``call_backend`` waits for queued
+    bumps, so later lookups of this process still see the write.
+    
+    Args:
+        tables: Names of the tables written to
+    """
+    tables = set(tables)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        versions.bump(tables)
+        return
+    if not backend.blocking:
+        versions.bump(tables)
+        return
+    future = _bump_executor.submit(versions.bump, tables)
+    with _pending_lock:
+        _pending_bumps.add(future)
+    future.add_done_callback(_bump_done)
+
+
+def _bump_done(future: Future) -> None:
+    """Forget a finished version bump."""
+    with _pending_lock:
+        _pending_bumps.discard(future)
+
+
+async def wait_for_bumps() -> None:
+    """Wait until the version bumps queued so far have reached the backend."""
+    with _pending_lock:
+        pending = list(_pending_bumps)
+    if pending:
+        # A failed bump is not raised here; the lookup goes on with the
+        # versions the backend holds
+        await asyncio.wait([asyncio.wrap_future(future) for future in pending])
+
+
+async def call_backend(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Call a cache function, in the threadpool if the backend blocks on I/O.
+    
+    Version bumps still queued by earlier commits are waited for first.
+    """
+    if backend.blocking:
+        await wait_for_bumps()
+        return await run_in_threadpool(fn, *args)
+    return fn(*args)
+
+
+cache_hits = registry.counter("resivate_cache_hits_total", "Lookups answered from an in-process cache")
+cache_misses = registry.counter(
+    "resivate_cache_misses_total", "Lookups that found no fresh entry in an in-process cache"
+)
+cache_evictions = registry.counter(
+    "resivate_cache_evictions_total", "Entries evicted from an in-process cache to respect its size"
+)
+cache_l2_hits = registry.counter(
+    "resivate_cache_l2_hits_total", "Lookups answered from the shared tier of a two-tier cache"
+)
+cache_l2_misses = registry.counter(
+    "resivate_cache_l2_misses_total", "Lookups missing both tiers of a two-tier cache"
+)
+cache_entries = registry.gauge("resivate_cache_entries", "Entries held by an in-process cache")
+cache_bytes = registry.gauge(
+    "resivate_cache_bytes", "Approximate bytes held by the entries of an in-process cache"
+)
+cache_entry_age = registry.gauge(
+    "resivate_cache_entry_age_seconds",
+    "Entries of an in-process cache at most as old as the bucket bound",
+)
+
+
+@registry.collector
+def collect_cache_metrics() -> None:
+    """Copy the stats of every cache into the metrics registry."""
+    for name, stats in cache_stats().items():
+        cache_hits.set(stats["hits"], cache=name)
+        cache_misses.set(stats["misses"], cache=name)
+        cache_evictions.set(stats["evictions"], cache=name)
+        cache_entries.set(stats["entries"], cache=name)
+        cache_bytes.set(stats["bytes"], cache=name)
+        for bound, count in stats["age_seconds"].items():
+            cache_entry_age.set(count, cache=name, le=bound)
+        if "l2_hits" in stats:
+            cache_l2_hits.set(stats["l2_hits"], cache=name)
+            cache_l2_misses.set(stats["l2_misses"], cache=name)
@@ -0,0 +1,555 @@
+"""
+Cache backends module.
+
+This module provides the stores behind the shared (L2) cache tier. The
+in-memory backend is private to a process; the file backend keeps entries in
+an mmap'd file that every worker on a host maps; the Redis backend speaks
+the Redis protocol to a server shared by every host.
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import secrets
+import socket
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.core.config import settings
+
+
+class CacheBackend:
+    """
+    Interface of a shared cache store.
+    
+    Keys are strings and values are bytes. Counters created with ``incr``
+    never expire and survive ``clear``, so version tokens handed out before
+    a clear can never match again.
+    
+    Attributes:
+        blocking: Whether operations may block on network I/O
+        shared: Whether other processes see the same entries
+        epoch: Token identifying the store; it changes when the store is reset
+    """
+    
+    blocking = False
+    shared = True
+    epoch = ""
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Get a value.
+        
+        Args:
+            key: Key of the entry
+            
+        Returns:
+            Stored value, None if missing or expired
+        """
+        raise NotImplementedError
+    
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        Store a value.
+        
+        Args:
+            key: Key of the entry
+            value: Value to store
+            ttl: Time-to-live in seconds
+        """
+        raise NotImplementedError
+    
+    def delete(self, key: str) -> None:
+        """
+        Remove an entry if present.
+        
+        Args:
+            key: Key of the entry
+        """
+        raise NotImplementedError
+    
+    def incr(self, key: str) -> int:
+        """
+        Atomically increment a counter, creating it at zero if missing.
+        
+        Args:
+            key: Key of the counter
+            
+        Returns:
+            New value of the counter
+        """
+        raise NotImplementedError
+    
+    def delete_prefix(self, prefix: str) -> int:
+        """
+        Remove every entry whose key starts with a prefix, except counters.
+        
+        Args:
+            prefix: Key prefix
+            
+        Returns:
+            Number of entries removed
+        """
+        raise NotImplementedError
+    
+    def clear(self) -> None:
+        """Remove every entry except counters."""
+        self.delete_prefix("")
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Backend keeping entries in a dictionary of the current process.
+    """
+    
+    shared = False
+    
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self.epoch = secrets.token_hex(8)
+        self._data: Dict[str, Tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at and expires_at <= time.time():
+            self._data.pop(key, None)
+            return None
+        return value
+    
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._data[key] = (time.time() + ttl, value)
+    
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+    
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self.get(key) or 0) + 1
+            self._data[key] = (0, str(value).encode())
+            return value
+    
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [
+                key
+                for key, (expires_at, _) in list(self._data.items())
+                if expires_at and key.startswith(prefix)
+            ]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+
+class FileBackend(CacheBackend):
+    """
+    Backend storing entries in an mmap'd file shared by local processes.
+    
+    The file holds a fixed-size hash table. Each slot stores the hash, expiry
+    and bytes of one key and its value; a key probes a few neighbouring slots
+    and overwrites the first free, expired or matching one, or else the first
+    one it probed. Values larger than a slot are not stored. Counters live
+    in a separate region of ``COUNTERS`` small slots, probed in full, so an
+    entry can never overwrite a counter. An exclusive ``flock`` serializes
+    writers across processes, a shared one readers.
+    """
+    
+    MAGIC = b"RSVC0002"
+    HEADER = struct.Struct("<8sII16s")
+    SLOT = struct.Struct("<QdII")
+    PROBES = 8
+    COUNTERS = 256
+    COUNTER_SIZE = 128
+    
+    def __init__(self, path: str, *, slots: int = 2048, slot_size: int = 65536):
+        """
+        Open the store, creating the file if needed.
+        
+        Args:
+            path: Path of the backing file, ideally on tmpfs
+            slots: Number of slots in a new file
+            slot_size: Size in bytes of each slot in a new file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            header = os.pread(self._fd, self.HEADER.size, 0)
+            if len(header) == self.HEADER.size and header.startswith(self.MAGIC):
+                _, self.slots, self.slot_size, epoch = self.HEADER.unpack(header)
+            else:
+                self.slots, self.slot_size = slots, slot_size
+                epoch = secrets.token_bytes(8).hex().encode()
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, self._size())
+                os.pwrite(self._fd, self.HEADER.pack(self.MAGIC, slots, slot_size, epoch), 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self.epoch = epoch.decode()
+        self._map = mmap.mmap(self._fd, self._size())
+    
+    def get(self, key: str) -> Optional[bytes]:
+        digest, raw_key = self._digest(key)
+        with self._locked(fcntl.LOCK_SH):
+            slot = self._find(digest, raw_key)
+            if slot is None:
+                slot = self._find(digest, raw_key, counter=True)
+            if slot is None:
+                return None
+            return self._read(slot)[1]
+    
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._write(key, value, time.time() + ttl)
+    
+    def delete(self, key: str) -> None:
+        digest, raw_key = self._digest(key)
+        with self._locked(fcntl.LOCK_EX):
+            slot = self._find(digest, raw_key)
+            if slot is not None:
+                self.SLOT.pack_into(self._map, self._offset(slot), 0, 0, 0, 0)
+    
+    def incr(self, key: str) -> int:
+        digest, raw_key = self._digest(key)
+        with self._locked(fcntl.LOCK_EX):
+            slot = self._find(digest, raw_key, counter=True)
+            value = int(self._read(slot)[1]) + 1 if slot is not None else 1
+            self._store(digest, raw_key, str(value).encode(), 0)
+            return value
+    
+    def delete_prefix(self, prefix: str) -> int:
+        raw_prefix = prefix.encode()
+        removed = 0
+        with self._locked(fcntl.LOCK_EX):
+            for slot in range(self.slots):
+                offset = self._offset(slot)
+                if self.SLOT.unpack_from(self._map, offset)[1] and (
+                    self._read(slot)[0].startswith(raw_prefix)
+                ):
+                    self.SLOT.pack_into(self._map, offset, 0, 0, 0, 0)
+                    removed += 1
+        return removed
+    
+    def _write(self, key: str, value: bytes, expires_at: float) -> None:
+        digest, raw_key = self._digest(key)
+        if self.SLOT.size + len(raw_key) + len(value) > self.slot_size:
+            return
+        with self._locked(fcntl.LOCK_EX):
+            self._store(digest, raw_key, value, expires_at)
+    
+    def _store(self, digest: int, raw_key: bytes, value: bytes, expires_at: float) -> None:
+        """
+        Write an entry, or a counter if it never expires, into its slot; caller
+        holds the exclusive lock.
+        
+        Raises:
+            ValueError: If a counter does not fit in a counter slot
+            RuntimeError: If every counter slot holds another counter
+        """
+        counter = not expires_at
+        if counter and self.SLOT.size + len(raw_key) + len(value) > self.COUNTER_SIZE:
+            raise ValueError(f"Counter key {raw_key!r} is too long")
+        now = time.time()
+        target = None
+        for slot in self._probe(digest, counter):
+            slot_digest, slot_expires, _, _ = self.SLOT.unpack_from(self._map, self._offset(slot))
+            if slot_digest in (0, digest) or (slot_expires and slot_expires <= now):
+                target = slot
+                break
+        if target is None:
+            if counter:
+                raise RuntimeError(f"All {self.COUNTERS} counter slots of {self.path} are in use")
+            # Every probed slot holds a live entry; evict the first
+            target = next(self._probe(digest, counter))
+        offset = self._offset(target)
+        body = offset + self.SLOT.size
+        self._map[body:body + len(raw_key) + len(value)] = raw_key + value
+        self.SLOT.pack_into(self._map, offset, digest, expires_at, len(raw_key), len(value))
+    
+    def _find(self, digest: int, raw_key: bytes, counter: bool = False) -> Optional[int]:
+        """Return the slot holding a live entry or counter for the key; caller holds a lock."""
+        for slot in self._probe(digest, counter):
+            slot_digest, expires_at, _, _ = self.SLOT.unpack_from(self._map, self._offset(slot))
+            if counter and slot_digest == 0:
+                # Counters are never removed, so the probe ends at a free slot
+                return None
+            if slot_digest == digest and self._read(slot)[0] == raw_key:
+                if expires_at and expires_at <= time.time():
+                    return None
+                return slot
+        return None
+    
+    def _probe(self, digest: int, counter: bool) -> Iterator[int]:
+        """Yield the slots a key may occupy, in probe order."""
+        if counter:
+            start = digest % self.COUNTERS
+            for probe in range(self.COUNTERS):
+                yield self.slots + (start + probe) % self.COUNTERS
+        else:
+            start = digest % self.slots
+            for probe in range(self.PROBES):
+                yield (start + probe) % self.slots
+    
+    def _read(self, slot: int) -> Tuple[bytes, bytes]:
+        """Return the key and value bytes stored in a slot."""
+        offset = self._offset(slot)
+        _, _, key_length, value_length = self.SLOT.unpack_from(self._map, offset)
+        body = offset + self.SLOT.size
+        return (
+            bytes(self._map[body:body + key_length]),
+            bytes(self._map[body + key_length:body + key_length + value_length]),
+        )
+    
+    def _offset(self, slot: int) -> int:
+        """Return the file offset of an entry slot, or of a counter slot past them."""
+        if slot < self.slots:
+            return self.HEADER.size + slot * self.slot_size
+        counters = self.HEADER.size + self.slots * self.slot_size
+        return counters + (slot - self.slots) * self.COUNTER_SIZE
+    
+    def _size(self) -> int:
+        return self.HEADER.size + self.slots * self.slot_size + self.COUNTERS * self.COUNTER_SIZE
+    
+    @staticmethod
+    def _digest(key: str) -> Tuple[int, bytes]:
+        raw_key = key.encode()
+        digest = int.from_bytes(hashlib.blake2b(raw_key, digest_size=8).digest(), "little")
+        return digest or 1, raw_key
+    
+    def _locked(self, operation: int) -> "_FileLock":
+        return _FileLock(self._fd, operation, self._lock)
+
+
+class _FileLock:
+    """Context manager holding a thread lock and an ``flock`` on a file."""
+    
+    def __init__(self, fd: int, operation: int, lock: threading.Lock):
+        self._fd = fd
+        self._operation = operation
+        self._lock = lock
+    
+    def __enter__(self) -> None:
+        self._lock.acquire()
+        fcntl.flock(self._fd, self._operation)
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._lock.release()
+
+
+class RedisError(Exception):
+    """Error reply received from a Redis server."""
+
+
+class RedisBackend(CacheBackend):
+    """
+    Backend speaking the Redis protocol (RESP2) over TCP.
+    
+    Each thread keeps its own connection. Keys are namespaced with a prefix
+    so ``clear`` only removes entries written by this application; counters
+    are created without an expiry, which ``clear`` uses to skip them.
+    """
+    
+    blocking = True
+    
+    def __init__(self, url: str, *, prefix: str = "resivate:", timeout: float = 1.0):
+        """
+        Configure the backend.
+        
+        Args:
+            url: Server URL, e.g. ``redis://:password@localhost:6379/0``
+            prefix: Prefix added to every key
+            timeout: Socket timeout in seconds
+        """
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.strip("/") or 0)
+        self.prefix = prefix
+        self.timeout = timeout
+        self._local = threading.local()
+        epoch_key = self.prefix + "epoch"
+        self.execute("SET", epoch_key, secrets.token_hex(8), "NX")
+        self.epoch = self.execute("GET", epoch_key).decode()
+    
+    def get(self, key: str) -> Optional[bytes]:
+        return self.execute("GET", self.prefix + key)
+    
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.execute("SET", self.prefix + key, value, "PX", int(ttl * 1000))
+    
+    def delete(self, key: str) -> None:
+        self.execute("DEL", self.prefix + key)
+    
+    def incr(self, key: str) -> int:
+        return self.execute("INCR", self.prefix + key)
+    
+    def delete_prefix(self, prefix: str) -> int:
+        pattern = "".join("\\" + c if c in "*?[]\\" else c for c in self.prefix + prefix) + "*"
+        removed = 0
+        cursor = b"0"
+        while True:
+            cursor, keys = self.execute("SCAN", cursor, "MATCH", pattern, "COUNT", 500)
+            ttls = self.pipeline([("PTTL", key) for key in keys])
+            expiring = [key for key, ttl in zip(keys, ttls) if ttl >= 0]
+            if expiring:
+                removed += self.execute("DEL", *expiring)
+            if cursor == b"0":
+                break
+        return removed
+    
+    def execute(self, *args: Any) -> Any:
+        """
+        Send a command and read its reply, reconnecting once on failure.
+        
+        Args:
+            args: Command name and arguments
+            
+        Returns:
+            Decoded reply
+            
+        Raises:
+            RedisError: If the server answers with an error
+        """
+        try:
+            return self._execute(self._connection(), args)
+        except (ConnectionError, OSError):
+            self._local.conn = None
+            return self._execute(self._connection(), args)
+    
+    def pipeline(self, commands: List[Tuple[Any, ...]]) -> List[Any]:
+        """
+        Send several commands at once and read their replies.
+        
+        Args:
+            commands: Command name and arguments of each command
+            
+        Returns:
+            Decoded reply of each command, in order
+            
+        Raises:
+            RedisError: If the server answers a command with an error
+        """
+        if not commands:
+            return []
+        try:
+            return self._pipeline(self._connection(), commands)
+        except (ConnectionError, OSError):
+            self._local.conn = None
+            return self._pipeline(self._connection(), commands)
+    
+    def _pipeline(
+        self, conn: Tuple[socket.socket, Any], commands: List[Tuple[Any, ...]]
+    ) -> List[Any]:
+        sock, reader = conn
+        sock.sendall(b"".join(encode_command(*args) for args in commands))
+        replies: List[Any] = []
+        error = None
+        for _ in commands:
+            # Read every reply, so the connection stays in step after an error
+            try:
+                replies.append(read_reply(reader))
+            except RedisError as exc:
+                error = error or exc
+                replies.append(None)
+        if error is not None:
+            raise error
+        return replies
+    
+    def _connection(self) -> Tuple[socket.socket, Any]:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            conn = (sock, sock.makefile("rb"))
+            self._local.conn = conn
+            if self.password:
+                self._execute(conn, ("AUTH", self.password))
+            if self.db:
+                self._execute(conn, ("SELECT", self.db))
+        return conn
+    
+    def _execute(self, conn: Tuple[socket.socket, Any], args: Tuple[Any, ...]) -> Any:
+        sock, reader = conn
+        sock.sendall(encode_command(*args))
+        return read_reply(reader)
+
+
+def encode_command(*args: Any) -> bytes:
+    """
+    Encode a command as a RESP array of bulk strings.
+    
+    Args:
+        args: Command name and arguments
+        
+    Returns:
+        Encoded command
+    """
+    parts: List[bytes] = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+def read_reply(reader: Any) -> Any:
+    """
+    Read one RESP reply.
+    
+    Args:
+        reader: Binary file-like object wrapping the connection
+        
+    Returns:
+        Decoded reply: bytes, int, list or None
+        
+    Raises:
+        RedisError: If the reply is an error
+        ConnectionError: If the connection was closed
+    """
+    line = reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by server")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload
+    if kind == b"-":
+        raise RedisError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        length = int(payload)
+        if length < 0:
+            return None
+        return [read_reply(reader) for _ in range(length)]
+    raise RedisError(f"Unexpected reply: {line!r}")
+
+
+def create_backend() -> CacheBackend:
+    """
+    Create the shared cache backend selected in the settings.
+    
+    Returns:
+        Cache backend
+    """
+    if settings.CACHE_BACKEND == "file":
+        path = settings.CACHE_FILE_PATH or os.path.join(tempfile.gettempdir(), "resivate-cache")
+        return FileBackend(
+            path, slots=settings.CACHE_FILE_SLOTS, slot_size=settings.CACHE_FILE_SLOT_SIZE
+        )
+    if settings.CACHE_BACKEND == "redis":
+        return RedisBackend(settings.CACHE_REDIS_URL)
+    return MemoryBackend()
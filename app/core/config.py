@@ -4,7 +4,7 @@ Configuration module for the application.
 This module contains settings for database connections, API settings, and other configurations.
 """
 import os
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings
@@ -28,10 +28,100 @@ class Settings(BaseSettings):
     MYSQL_DB: str = os.getenv("MYSQL_DB", "resivate_db")
     MYSQL_PORT: str = os.getenv("MYSQL_PORT", "3306")
     DATABASE_URL: str = ""
+    # Used by the API; DATABASE_URL remains in use by scripts and migrations
+    ASYNC_DATABASE_URL: str = ""
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 30
+    
+    # Cache configuration
+    CACHE_ENABLED: bool = True
+    CACHE_TTL: int = 60
+    CACHE_MAX_ENTRIES: int = 1024
+    COALESCE_ENABLED: bool = True
+    
+    # Shared response cache: "memory" (per process), "file" (per host) or "redis".
+    # Memory counters miss writes of other processes, so ETags then also change
+    # every RESPONSE_CACHE_TTL seconds; use "file" or "redis" with several workers
+    CACHE_BACKEND: str = "memory"
+    CACHE_FILE_PATH: str = ""
+    CACHE_FILE_SLOTS: int = 2048
+    CACHE_FILE_SLOT_SIZE: int = 65536
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL: int = 300
+    RESPONSE_CACHE_L1_TTL: int = 5
+    # Seconds an expired response may still be served while it is refreshed in
+    # the background, by router name, e.g. {"types": 120}
+    RESPONSE_CACHE_MAX_STALE: int = 30
+    RESPONSE_CACHE_MAX_STALE_ROUTERS: Dict[str, int] = {}
+    # max-age announced to downstream caches, which revalidate with the ETag
+    RESPONSE_MAX_AGE: int = 0
+    
+    # Lookups of missing rows: id bitmaps are rebuilt after EXISTENCE_TTL
+    # seconds, ids reported missing are remembered for NEGATIVE_CACHE_TTL
+    EXISTENCE_ENABLED: bool = True
+    EXISTENCE_TTL: int = 300
+    NEGATIVE_CACHE_TTL: int = 10
+    
+    # Estimated row counts are read from table statistics again after
+    # COUNT_ESTIMATE_TTL seconds
+    COUNT_ESTIMATE_TTL: int = 300
+    
+    # Batch reads by id query at most GET_MANY_CHUNK_SIZE ids per IN list
+    GET_MANY_CHUNK_SIZE: int = 500
+    
+    # Exports fetch EXPORT_BATCH_SIZE rows at a time from a server-side cursor
+    EXPORT_BATCH_SIZE: int = 1000
+    
+    # Bulk creates insert BULK_CHUNK_SIZE rows per statement and transaction,
+    # from payloads of at most BULK_MAX_ITEMS records
+    BULK_CHUNK_SIZE: int = 500
+    BULK_MAX_ITEMS: int = 10000
+    
+    # Batch requests run at most BATCH_MAX_OPERATIONS operations in one
+    # transaction
+    BATCH_MAX_OPERATIONS: int = 100
+    
+    # With GROUP_COMMIT_ENABLED, single-record writes are committed together
+    # by an in-process writer: a batch waits GROUP_COMMIT_DELAY seconds for
+    # at most GROUP_COMMIT_MAX_BATCH writes, and at most
+    # GROUP_COMMIT_MAX_PENDING writes wait in the queue
+    GROUP_COMMIT_ENABLED: bool = False
+    GROUP_COMMIT_DELAY: float = 0.005
+    GROUP_COMMIT_MAX_BATCH: int = 100
+    GROUP_COMMIT_MAX_PENDING: int = 1000
+    
+    # Responses of POST requests sent with an Idempotency-Key header are
+    # replayed to retries for IDEMPOTENCY_TTL seconds. A retry arriving while
+    # the first request runs waits at most IDEMPOTENCY_WAIT seconds for it.
+    # Running requests renew their key every third of IDEMPOTENCY_LOCK_TTL,
+    # so a request that stopped without finishing holds it for that long
+    IDEMPOTENCY_TTL: int = 86400
+    IDEMPOTENCY_WAIT: float = 10.0
+    IDEMPOTENCY_LOCK_TTL: int = 60
+    
+    # Token expected in the X-Admin-Token header of admin requests; the admin
+    # API is disabled while it is empty
+    ADMIN_TOKEN: str = ""
+    
+    # Named bundles served by /bundles/{name}, as lists of view names
+    BUNDLES: Dict[str, List[str]] = {
+        "landing": [
+            "categories",
+            "plans",
+            "types",
+            "faqs",
+            "options",
+            "menu-options",
+            "processing-info",
+            "solutions-data",
+        ],
+    }
     
     def __init__(self, **data: Any):
         super().__init__(**data)
         self.DATABASE_URL = f"mysql+pymysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_SERVER}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
+        self.ASYNC_DATABASE_URL = f"mysql+aiomysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_SERVER}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
     
     class Config:
         env_file = ".env"
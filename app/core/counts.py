@@ -0,0 +1,121 @@
+"""
+Row counts module.
+
+This module maintains estimated row counts per table. Each counter is read
+from the database statistics, or from a ``COUNT(*)`` where there are none,
+then kept up to date by the creates and deletes committed by the process
+until it is read again after its TTL. Rows written by other workers are only
+picked up by that refresh, which is what makes the count an estimate.
+"""
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from app.core.config import settings
+
+
+class RowCounter:
+    """
+    Estimated number of rows of a table.
+    
+    Attributes:
+        table: Name of the table
+        ttl: Seconds after which the counter must be read again
+        value: Estimated number of rows
+    """
+    
+    def __init__(self, table: str, *, ttl: float = 300.0):
+        """
+        Initialize a counter that needs a refresh.
+        
+        Args:
+            table: Name of the table
+            ttl: Seconds after which the counter must be read again
+        """
+        self.table = table
+        self.ttl = ttl
+        self.value = 0
+        self._read_at: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    def expired(self) -> bool:
+        """
+        Check whether the counter must be read again before it can be used.
+        
+        Returns:
+            True if never read or older than its TTL, False otherwise
+        """
+        return self._read_at is None or time.monotonic() - self._read_at > self.ttl
+    
+    def reset(self, value: int) -> None:
+        """
+        Replace the count with a value read from the database.
+        
+        Args:
+            value: Number of rows
+        """
+        with self._lock:
+            self.value = value
+            self._read_at = time.monotonic()
+    
+    def add(self, delta: int) -> None:
+        """
+        Record created or deleted rows.
+        
+        Args:
+            delta: Number of rows created, negative for deleted rows
+        """
+        with self._lock:
+            self.value = max(0, self.value + delta)
+
+
+counters: Dict[str, RowCounter] = {}
+
+
+def counter(table: str) -> RowCounter:
+    """
+    Get the counter of a table, creating it if needed.
+    
+    Args:
+        table: Name of the table
+        
+    Returns:
+        Counter of the table
+    """
+    if table not in counters:
+        counters.setdefault(table, RowCounter(table, ttl=settings.COUNT_ESTIMATE_TTL))
+    return counters[table]
+
+
+async def estimate(table: str, read: Callable[[], Awaitable[int]]) -> int:
+    """
+    Get the estimated number of rows of a table.
+    
+    Args:
+        table: Name of the table
+        read: Coroutine function reading the number of rows from the
+            database, used to refresh an expired counter
+            
+    Returns:
+        Estimated number of rows
+    """
+    rows = counter(table)
+    if rows.expired():
+        rows.reset(await read())
+    return rows.value
+
+
+def record_writes(created: Iterable[Tuple[str, int]], deleted: Iterable[Tuple[str, int]]) -> None:
+    """
+    Update the counters with committed creates and deletes.
+    
+    Args:
+        created: Table and id of every created row
+        deleted: Table and id of every deleted row
+    """
+    for table, _ in created:
+        if table in counters:
+            counters[table].add(1)
+    for table, _ in deleted:
+        if table in counters:
+            counters[table].add(-1)
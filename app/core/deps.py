@@ -3,29 +3,198 @@ Dependencies module.
 
 This module provides dependency injection functionality for the FastAPI application.
 """
-from typing import Annotated, Generator
+import hashlib
+import secrets
+import time
+from typing import Annotated, AsyncGenerator, Awaitable, Callable, List, Optional, Tuple, TypeVar
 
-from fastapi import Depends
-from sqlalchemy.orm import Session
+from fastapi import Body, Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.session import SessionLocal
+from app.core import existence
+from app.core.cache import call_backend, versions
+from app.core.config import settings
+from app.core.filtering import Filter, parse_filters
+from app.database.base import Base
+from app.database.session import AsyncSessionLocal
 
 
-def get_db() -> Generator[Session, None, None]:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Get database session dependency.
     
-    Creates a new database session and ensures it's closed after use.
+    Creates a new async database session and ensures it's closed after use.
     
     Yields:
-        SQLAlchemy Session object
+        SQLAlchemy AsyncSession object
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 # Type annotation for database dependency
-DB = Annotated[Session, Depends(get_db)] 
\ No newline at end of file
+DB = Annotated[AsyncSession, Depends(get_db)]
+
+
+def list_filters(request: Request) -> Tuple[Filter, ...]:
+    """
+    Get the filters of a list request.
+    
+    Filters are given as ``filter[column][operator]=value`` query parameters,
+    which cannot be declared as regular parameters.
+    
+    Args:
+        request: Incoming request
+        
+    Returns:
+        Filters of the request
+        
+    Raises:
+        InvalidFilter: If a filter parameter is malformed
+    """
+    return parse_filters(request.query_params.multi_items())
+
+
+# Type annotation for list filters dependency
+Filters = Annotated[Tuple[Filter, ...], Depends(list_filters)]
+
+T = TypeVar("T")
+
+# Type annotation for the payload of bulk creates: a list of 1 to
+# BULK_MAX_ITEMS records, e.g. ``BulkPayload[FAQCreate]``
+BulkPayload = Annotated[List[T], Body(min_length=1, max_length=settings.BULK_MAX_ITEMS)]
+
+
+def require_admin(x_admin_token: Annotated[Optional[str], Header()] = None) -> None:
+    """
+    Allow a request only if it carries the admin token.
+    
+    Args:
+        x_admin_token: Value of the X-Admin-Token request header
+        
+    Raises:
+        HTTPException: If admin access is disabled or the token is wrong
+    """
+    if not settings.ADMIN_TOKEN or not secrets.compare_digest(
+        (x_admin_token or "").encode(), settings.ADMIN_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access denied")
+
+
+def make_etag(request: Request, tables: tuple) -> str:
+    """
+    Build a strong ETag for a GET request.
+    
+    The tag is derived from the request path and query together with the
+    version counters of the tables the response is built from. When the
+    counters are private to the process, writes made by other workers or
+    outside the API never bump them, so the tag also changes every
+    ``RESPONSE_CACHE_TTL`` seconds, which bounds how long it stays valid.
+    
+    Args:
+        request: Incoming request
+        tables: Names of the tables the response depends on
+        
+    Returns:
+        Quoted ETag value
+    """
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    source = f"{request.url.path}?{query}|{versions.token(tables)}"
+    if not versions.backend.shared:
+        source += f"|{int(time.time() // max(settings.RESPONSE_CACHE_TTL, 1))}"
+    return '"' + hashlib.sha1(source.encode()).hexdigest() + '"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """
+    Check an ETag against an If-None-Match header.
+    
+    Args:
+        etag: Current ETag of the resource
+        if_none_match: Value of the If-None-Match request header
+        
+    Returns:
+        True if any listed tag matches, False otherwise
+    """
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def conditional_get(*tables: str) -> Callable[[Request, Response], Awaitable[None]]:
+    """
+    Build a dependency answering conditional GETs from table versions.
+    
+    Used as a router dependency, it runs before the database session is
+    created: a GET whose If-None-Match matches the current ETag is answered
+    with 304 Not Modified, otherwise the ETag is added to the response.
+    
+    Args:
+        tables: Names of the tables the router's responses are built from
+        
+    Returns:
+        Dependency function
+    """
+    async def check_etag(request: Request, response: Response) -> None:
+        if request.method != "GET":
+            return
+        etag = await call_backend(make_etag, request, tables)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(etag, if_none_match):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag},
+            )
+        response.headers["ETag"] = etag
+    
+    check_etag.tables = tables
+    return check_etag
+
+
+def require_existing(table: str, detail: str) -> Callable[..., AsyncGenerator[None, None]]:
+    """
+    Build a dependency answering lookups of missing rows with 404.
+    
+    Used as a router dependency, it checks the id in the path of GET requests
+    against the table's existence bitmap and the cache of ids reported
+    missing, before the endpoint queries the database. Ids the database
+    reports missing are added to that cache.
+    
+    Args:
+        table: Name of the table the router's ids belong to
+        detail: Detail of the router's 404 responses
+        
+    Returns:
+        Dependency function
+    """
+    async def check_exists(request: Request, db: DB) -> AsyncGenerator[None, None]:
+        id = _path_id(request)
+        if id is None:
+            yield
+            return
+        version = await existence.table_version(table)
+        if await existence.is_missing(table, id, lambda: _table_ids(db, table), version):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+        try:
+            yield
+        except HTTPException as exc:
+            if exc.status_code == status.HTTP_404_NOT_FOUND:
+                existence.record_missing(table, id, version)
+            raise
+    
+    return check_exists
+
+
+def _path_id(request: Request) -> Optional[int]:
+    """Return the integer id in the path of a GET request, if any."""
+    if request.method != "GET" or not settings.EXISTENCE_ENABLED or len(request.path_params) != 1:
+        return None
+    try:
+        return int(next(iter(request.path_params.values())))
+    except ValueError:
+        return None
+
+
+async def _table_ids(db: AsyncSession, table: str) -> List[int]:
+    """Read every id of a table from its primary key index."""
+    return list(await db.scalars(select(Base.metadata.tables[table].c.id)))
@@ -0,0 +1,227 @@
+"""
+Existence module.
+
+This module tracks which primary keys exist in each table so lookups of
+missing rows can be answered without querying the database: a per-table
+bitmap of the ids present when it was last rebuilt, kept up to date by
+committed creates and deletes, and a short-lived cache of ids the database
+reported missing. With a shared cache backend, a bitmap only rules an id out
+while the table's version is the one it was built at, so rows written by
+other processes are never hidden.
+"""
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from app.core.cache import LRUCache, call_backend, register_cache, versions
+from app.core.config import settings
+
+
+class IdBitmap:
+    """
+    Bitmap of the ids of a table, one bit per id up to the largest at rebuild.
+    
+    The bitmap only answers for ids up to that largest id: rows inserted
+    since, possibly by another worker, get higher ids and are reported as
+    possibly existing. Rows created or deleted through this process update
+    the bitmap immediately; the whole bitmap is rebuilt once it expires.
+    
+    Attributes:
+        table: Name of the table
+        ttl: Seconds after which the bitmap must be rebuilt
+        max_id: Largest id present at the last rebuild, -1 before the first
+        version: Version token of the table read before the last rebuild
+    """
+    
+    def __init__(self, table: str, *, ttl: float = 300.0):
+        """
+        Initialize an empty bitmap that needs a rebuild.
+        
+        Args:
+            table: Name of the table
+            ttl: Seconds after which the bitmap must be rebuilt
+        """
+        self.table = table
+        self.ttl = ttl
+        self.max_id = -1
+        self.version: Optional[str] = None
+        self._bits = bytearray()
+        self._built_at: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    def expired(self) -> bool:
+        """
+        Check whether the bitmap must be rebuilt before it can be used.
+        
+        Returns:
+            True if never built or older than its TTL, False otherwise
+        """
+        return self._built_at is None or time.monotonic() - self._built_at > self.ttl
+    
+    def rebuild(self, ids: Iterable[int], version: Optional[str] = None) -> None:
+        """
+        Replace the contents of the bitmap.
+        
+        Args:
+            ids: Every id currently in the table
+            version: Version token of the table, read before the ids
+        """
+        ids = [id for id in ids if id >= 0]
+        max_id = max(ids, default=-1)
+        bits = bytearray(max_id // 8 + 1)
+        for id in ids:
+            bits[id >> 3] |= 1 << (id & 7)
+        with self._lock:
+            self._bits = bits
+            self.max_id = max_id
+            self.version = version
+            self._built_at = time.monotonic()
+    
+    def might_exist(self, id: int) -> bool:
+        """
+        Check whether a row may exist.
+        
+        Args:
+            id: Primary key to check
+            
+        Returns:
+            False only if the row is known not to exist
+        """
+        if self.expired() or id < 0 or id > self.max_id:
+            return True
+        return bool(self._bits[id >> 3] & (1 << (id & 7)))
+    
+    def add(self, id: int) -> None:
+        """
+        Record a created row.
+        
+        Args:
+            id: Primary key of the row
+        """
+        with self._lock:
+            if 0 <= id <= self.max_id:
+                self._bits[id >> 3] |= 1 << (id & 7)
+    
+    def discard(self, id: int) -> None:
+        """
+        Record a deleted row.
+        
+        Args:
+            id: Primary key of the row
+        """
+        with self._lock:
+            if 0 <= id <= self.max_id:
+                self._bits[id >> 3] &= ~(1 << (id & 7)) & 0xFF
+
+
+bitmaps: Dict[str, IdBitmap] = {}
+
+# Ids the database reported missing; creates invalidate them by row tag
+not_found = register_cache(
+    LRUCache("not_found", maxsize=settings.CACHE_MAX_ENTRIES, ttl=settings.NEGATIVE_CACHE_TTL)
+)
+
+
+def bitmap(table: str) -> IdBitmap:
+    """
+    Get the bitmap of a table, creating it if needed.
+    
+    Args:
+        table: Name of the table
+        
+    Returns:
+        Bitmap of the table
+    """
+    if table not in bitmaps:
+        bitmaps.setdefault(table, IdBitmap(table, ttl=settings.EXISTENCE_TTL))
+    return bitmaps[table]
+
+
+async def table_version(table: str) -> Optional[str]:
+    """
+    Read the version token of a table, if it counts the writes of every worker.
+    
+    Args:
+        table: Name of the table
+        
+    Returns:
+        Version token with a shared cache backend, None otherwise
+    """
+    if not versions.backend.shared:
+        return None
+    return await call_backend(versions.token, [table])
+
+
+def known_missing(table: str, id: int, version: Optional[str] = None) -> bool:
+    """
+    Check whether the database reported a row missing at a table version.
+    
+    Args:
+        table: Name of the table
+        id: Primary key of the row
+        version: Current version token of the table
+        
+    Returns:
+        True if the row was reported missing at that version
+    """
+    return not_found.get((table, id)) == (version,)
+
+
+async def is_missing(
+    table: str,
+    id: int,
+    load_ids: Callable[[], Awaitable[Iterable[int]]],
+    version: Optional[str] = None,
+) -> bool:
+    """
+    Check whether a row is known not to exist.
+    
+    With a shared cache backend, an id is only ruled out at the table version
+    it was found missing at: once the version changes, a row with that id may
+    have been inserted by another process, and the bitmap is rebuilt before
+    answering.
+    
+    Args:
+        table: Name of the table
+        id: Primary key of the row
+        load_ids: Coroutine function reading every id of the table, used to
+            rebuild the bitmap
+        version: Current version token of the table, from ``table_version``
+            
+    Returns:
+        True if the row is known not to exist, False if it may exist
+    """
+    if known_missing(table, id, version):
+        return True
+    ids = bitmap(table)
+    if ids.expired() or (version != ids.version and not ids.might_exist(id)):
+        ids.rebuild(await load_ids(), version)
+    return not ids.might_exist(id)
+
+
+def record_missing(table: str, id: int, version: Optional[str] = None) -> None:
+    """
+    Remember that the database reported a row missing.
+    
+    Args:
+        table: Name of the table
+        id: Primary key of the row
+        version: Version token of the table read before the query
+    """
+    not_found.set((table, id), (version,), tags=[(table, id)])
+
+
+def record_writes(created: Iterable[Tuple[str, int]], deleted: Iterable[Tuple[str, int]]) -> None:
+    """
+    Update the bitmaps with committed creates and deletes.
+    
+    Args:
+        created: Table and id of every created row
+        deleted: Table and id of every deleted row
+    """
+    for table, id in created:
+        if table in bitmaps:
+            bitmaps[table].add(id)
+    for table, id in deleted:
+        if table in bitmaps:
+            bitmaps[table].discard(id)
@@ -0,0 +1,131 @@
+"""
+Fieldsets module.
+
+This module implements sparse fieldsets: a ``fields=id,question`` parameter
+limits a response to some fields of its schema. The CRUD layer only loads
+the matching columns, and records are serialized with a copy of the schema
+trimmed to those fields. Fields backed by a relationship, such as ``img``,
+are only loaded when named in an ``expand=img`` parameter.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional, Tuple, Type
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, create_model
+
+
+class InvalidFields(ValueError):
+    """Raised when a fields or expand parameter names a field that is not available."""
+
+
+def parse_fields(value: Optional[str], schema: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """
+    Split a fields parameter into the names of schema fields.
+    
+    Args:
+        value: Comma-separated field names, or None
+        schema: Schema of the full response records
+        
+    Returns:
+        Field names in schema order, None if every field was requested
+        
+    Raises:
+        InvalidFields: If a field does not exist or no field was given
+    """
+    if value is None:
+        return None
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = names - set(schema.model_fields)
+    if unknown:
+        raise InvalidFields(f"Unknown fields: {', '.join(sorted(unknown))}")
+    if not names:
+        raise InvalidFields("No fields requested")
+    return tuple(name for name in schema.model_fields if name in names)
+
+
+def parse_expand(value: Optional[str], expandable: Mapping[str, str]) -> Tuple[str, ...]:
+    """
+    Split an expand parameter into the names of relationship fields.
+    
+    Args:
+        value: Comma-separated field names, or None
+        expandable: Loader strategy of every field that can be expanded
+        
+    Returns:
+        Field names, empty if nothing is expanded
+        
+    Raises:
+        InvalidFields: If a field cannot be expanded
+    """
+    if value is None:
+        return ()
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = names - set(expandable)
+    if unknown:
+        raise InvalidFields(f"Cannot expand {', '.join(sorted(unknown))}")
+    return tuple(name for name in expandable if name in names)
+
+
+@lru_cache(maxsize=None)
+def trimmed_schema(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    Build a copy of a schema limited to some of its fields.
+    
+    Args:
+        schema: Schema of the full response records
+        fields: Names of the fields to keep
+        
+    Returns:
+        Schema with the same definition for each kept field
+    """
+    definitions: Dict[str, Any] = {
+        name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields
+    }
+    return create_model(f"{schema.__name__}Fields", **definitions)
+
+
+def dump(
+    obj: Any,
+    schema: Type[BaseModel],
+    fields: Tuple[str, ...],
+    attributes: Optional[Mapping[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Serialize some fields of a record.
+    
+    Only the requested attributes are read, so the record may have been
+    loaded with just the matching columns.
+    
+    Args:
+        obj: ORM instance
+        schema: Schema of the full response records
+        fields: Names of the fields to serialize
+        attributes: Schema fields read from a differently named model attribute
+        
+    Returns:
+        JSON compatible dictionary with the requested fields
+    """
+    attributes = attributes or {}
+    data = {name: getattr(obj, attributes.get(name, name)) for name in fields}
+    model = trimmed_schema(schema, fields)
+    return model.model_validate(data, from_attributes=True).model_dump(mode="json")
+
+
+def render(content: Any, response: Response) -> JSONResponse:
+    """
+    Build the response of a request for a sparse fieldset.
+    
+    The route's response model describes full records, so the content is
+    returned directly, with the headers already set by dependencies and
+    the endpoint.
+    
+    Args:
+        content: Serialized records
+        response: Response whose headers were set for the request
+        
+    Returns:
+        JSON response
+    """
+    return JSONResponse(content=content, headers=dict(response.headers))
+
@@ -0,0 +1,237 @@
+"""
+Filtering module.
+
+This module parses the filter and sort parameters of list requests, such as
+``?filter[price][lte]=50&sort=-price,id``, and turns them into SQL
+conditions. Each CRUD object whitelists the columns it can be filtered and
+sorted by, and every whitelisted column must lead an index, so a filter can
+always be answered with an index range scan rather than a full table scan.
+The ``ids`` parameter of batch reads is parsed here too.
+"""
+import operator
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Any, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import Column, String, inspect
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.pagination import DEFAULT_ORDER
+
+# Operators that can use an index; "ne", "contains" and suffix matches
+# cannot, so they are not offered
+OPERATORS = ("eq", "in", "lt", "lte", "gt", "gte", "prefix")
+
+# Maximum number of values of an "in" filter
+MAX_IN_VALUES = 100
+
+_COMPARISONS = {
+    "eq": operator.eq,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+}
+
+_FILTER_PARAM = re.compile(r"^filter\[(\w+)\](?:\[(\w+)\])?$")
+
+
+class InvalidFilter(ValueError):
+    """Raised when a filter or sort parameter is malformed or not allowed."""
+
+
+class Filter(NamedTuple):
+    """
+    A condition on one column of a list request.
+    
+    Attributes:
+        field: Name of the column
+        op: Operator, one of ``OPERATORS``
+        value: Value as given in the query string
+    """
+    field: str
+    op: str
+    value: str
+
+
+def parse_filters(params: Iterable[Tuple[str, str]]) -> Tuple[Filter, ...]:
+    """
+    Extract the filters from the parameters of a query string.
+    
+    ``filter[field]=value`` is a shorthand for ``filter[field][eq]=value``.
+    Parameters that are not filters are ignored.
+    
+    Args:
+        params: Name and value of every query parameter
+        
+    Returns:
+        Filters, sorted so that equivalent requests get the same tuple
+        
+    Raises:
+        InvalidFilter: If an operator is not supported
+    """
+    filters = []
+    for name, value in params:
+        match = _FILTER_PARAM.match(name)
+        if match is None:
+            if name.startswith("filter"):
+                raise InvalidFilter(f"Invalid filter parameter {name}")
+            continue
+        field, op = match.group(1), match.group(2) or "eq"
+        if op not in OPERATORS:
+            raise InvalidFilter(f"Unsupported filter operator {op}")
+        filters.append(Filter(field, op, value))
+    return tuple(sorted(filters))
+
+
+def parse_sort(value: Optional[str]) -> Tuple[str, ...]:
+    """
+    Split a sort parameter into column names.
+    
+    Args:
+        value: Comma-separated column names, each prefixed with "-" for a
+            descending sort, or None
+            
+    Returns:
+        Sort order, ``DEFAULT_ORDER`` if none was given
+    """
+    if not value:
+        return DEFAULT_ORDER
+    return tuple(name.strip() for name in value.split(",") if name.strip())
+
+
+def parse_ids(value: str) -> Tuple[int, ...]:
+    """
+    Split an ids parameter into primary keys.
+    
+    Args:
+        value: Comma-separated ids
+        
+    Returns:
+        Ids in the order given
+        
+    Raises:
+        InvalidFilter: If an id is not an integer or no id was given
+    """
+    try:
+        ids = tuple(int(part) for part in value.split(",") if part.strip())
+    except ValueError:
+        raise InvalidFilter(f"Invalid ids: {value}")
+    if not ids:
+        raise InvalidFilter("No ids requested")
+    return ids
+
+
+def indexed_columns(model: Any) -> Set[str]:
+    """
+    Get the columns of a model that lead an index.
+    
+    Args:
+        model: SQLAlchemy model class
+        
+    Returns:
+        Names of the primary key column and of the first column of every index
+    """
+    table = inspect(model).local_table
+    names = {column.name for column in table.primary_key.columns}
+    names.update(column.name for column in table.columns if column.index or column.unique)
+    for index in table.indexes:
+        names.add(list(index.columns)[0].name)
+    return names
+
+
+def check_whitelist(model: Any, filterable: Sequence[str], sortable: Sequence[str]) -> None:
+    """
+    Check that filterable and sortable columns can be served from an index.
+    
+    Sort columns must also be non-nullable, since rows with a NULL sort key
+    cannot be positioned by a cursor.
+    
+    Args:
+        model: SQLAlchemy model class
+        filterable: Columns the model may be filtered by
+        sortable: Columns the model may be sorted by
+        
+    Raises:
+        ValueError: If a column does not exist, lacks an index, or may be NULL
+            while sortable
+    """
+    columns = inspect(model).columns
+    indexed = indexed_columns(model)
+    for name in (*filterable, *sortable):
+        if name not in columns or columns[name].name not in indexed:
+            raise ValueError(f"{model.__name__}.{name} has no index to filter or sort by")
+    for name in sortable:
+        if columns[name].nullable and not columns[name].primary_key:
+            raise ValueError(f"{model.__name__}.{name} may be NULL and cannot be sorted by")
+
+
+def check_sort(order: Sequence[str], sortable: Sequence[str]) -> None:
+    """
+    Check that a sort order only uses sortable columns.
+    
+    Args:
+        order: Column names, each prefixed with "-" for a descending sort
+        sortable: Columns the model may be sorted by
+        
+    Raises:
+        InvalidFilter: If a column may not be sorted by
+    """
+    for name in order:
+        if name.lstrip("-") not in sortable:
+            raise InvalidFilter(f"Cannot sort by {name.lstrip('-')}")
+
+
+def conditions(
+    model: Any, filters: Sequence[Filter], filterable: Sequence[str]
+) -> List[ColumnElement]:
+    """
+    Build the SQL conditions of filters.
+    
+    Args:
+        model: SQLAlchemy model class
+        filters: Filters of the request
+        filterable: Columns the model may be filtered by
+        
+    Returns:
+        Conditions to pass to ``Select.where``
+        
+    Raises:
+        InvalidFilter: If a column may not be filtered by, or a value does not
+            match the column type
+    """
+    columns = inspect(model).columns
+    clauses = []
+    for field, op, raw in filters:
+        if field not in filterable:
+            raise InvalidFilter(f"Cannot filter by {field}")
+        column = columns[field]
+        if op == "prefix":
+            if not isinstance(column.type, String):
+                raise InvalidFilter(f"Cannot filter {field} by prefix")
+            if not raw:
+                raise InvalidFilter("A prefix filter needs a value")
+            clauses.append(column.startswith(raw, autoescape=True))
+        elif op == "in":
+            values = [_coerce(column, value) for value in raw.split(",")]
+            if len(values) > MAX_IN_VALUES:
+                raise InvalidFilter(f"An in filter takes at most {MAX_IN_VALUES} values")
+            clauses.append(column.in_(values))
+        else:
+            clauses.append(_COMPARISONS[op](column, _coerce(column, raw)))
+    return clauses
+
+
+def _coerce(column: Column, raw: str) -> Any:
+    """Convert a filter value to the type of its column."""
+    python_type = column.type.python_type
+    try:
+        if python_type is bool:
+            if raw.lower() not in ("true", "false", "1", "0"):
+                raise ValueError(raw)
+            return raw.lower() in ("true", "1")
+        if python_type in (int, float, Decimal):
+            return python_type(raw)
+    except (ValueError, InvalidOperation):
+        raise InvalidFilter(f"Invalid value for {column.key}: {raw}")
+    return raw
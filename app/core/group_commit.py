@@ -0,0 +1,251 @@
+"""
+Group commit module.
+
+This module provides an in-process writer that commits the writes of many
+callers together. While ``GROUP_COMMIT_ENABLED`` is set, the single-record
+writes of the CRUD layer are queued to the writer of their engine instead of
+committing on their own. The writer gathers the writes arriving within
+``GROUP_COMMIT_DELAY`` seconds, or until ``GROUP_COMMIT_MAX_BATCH`` are
+queued, runs them in order in one session and commits them in one
+transaction, so a burst of writes pays for one commit rather than one each.
+
+Each caller waits until the transaction holding its write is committed, and
+gets the result of its write or the error it raised. A write that fails is
+left out of the batch, which is run again without it, so it does not fail
+the writes it was grouped with. At most ``GROUP_COMMIT_MAX_PENDING`` writes
+wait in the queue; further callers wait for room.
+
+Writes run in the writer's session, outside of their caller's transaction,
+so the CRUD layer only queues the writes of sessions with no open
+transaction.
+"""
+import asyncio
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+# A write runs in the session of its batch, without committing
+Write = Callable[[AsyncSession], Awaitable[Any]]
+
+batches_total = registry.counter(
+    "resivate_group_commit_batches_total", "Transactions committed by the group commit writer"
+)
+writes_total = registry.counter(
+    "resivate_group_commit_writes_total", "Writes committed by the group commit writer"
+)
+failures_total = registry.counter(
+    "resivate_group_commit_failures_total", "Writes the group commit writer could not commit"
+)
+commit_seconds_total = registry.counter(
+    "resivate_group_commit_seconds_total", "Time spent committing by the group commit writer"
+)
+last_batch_size = registry.gauge(
+    "resivate_group_commit_last_batch_size", "Writes committed by the last group commit"
+)
+last_commit_seconds = registry.gauge(
+    "resivate_group_commit_last_commit_seconds", "Duration of the last group commit"
+)
+pending_writes = registry.gauge(
+    "resivate_group_commit_pending", "Writes waiting in the queue of the group commit writer"
+)
+
+
+class Pending(NamedTuple):
+    """A queued write and the future its caller waits on."""
+    write: Write
+    future: asyncio.Future
+
+
+class GroupCommitWriter:
+    """
+    Commit queued writes in batches, each in one transaction.
+    
+    The writer runs a task while writes are queued, and stops once the
+    queue is empty; the next write starts it again.
+    """
+    
+    def __init__(
+        self,
+        sessions: Callable[[], AsyncSession],
+        *,
+        max_batch: int,
+        delay: float,
+        max_pending: int,
+    ) -> None:
+        """
+        Initialize a writer with an empty queue.
+        
+        Args:
+            sessions: Factory of the sessions batches run in
+            max_batch: Most writes committed in one transaction
+            delay: Seconds a batch waits for more writes after its first one
+            max_pending: Most writes waiting in the queue
+        """
+        self.sessions = sessions
+        self.max_batch = max_batch
+        self.delay = delay
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def pending(self) -> int:
+        """Number of writes waiting in the queue."""
+        return self._queue.qsize()
+    
+    async def submit(self, write: Write) -> Any:
+        """
+        Queue a write and wait until it is committed.
+        
+        Args:
+            write: Coroutine function running the write in a session
+            
+        Returns:
+            Result of the write, once its transaction is committed
+            
+        Raises:
+            Exception: Whatever the write or its commit raised
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(Pending(write, future))
+        if self._queue.qsize() >= self.max_batch:
+            self._full.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return await future
+    
+    async def _run(self) -> None:
+        """
+        Commit batches until the queue is empty.
+        
+        If the task stops early, e.g. because it is cancelled, the writes
+        still queued fail instead of leaving their callers waiting.
+        """
+        try:
+            while not self._queue.empty():
+                if self._queue.qsize() < self.max_batch:
+                    try:
+                        await asyncio.wait_for(self._full.wait(), self.delay)
+                    except asyncio.TimeoutError:
+                        pass
+                self._full.clear()
+                batch = [
+                    self._queue.get_nowait() for _ in range(min(self.max_batch, self.pending))
+                ]
+                await self._commit(batch)
+        finally:
+            while not self._queue.empty():
+                _resolve(self._queue.get_nowait().future, exc=_stopped())
+    
+    async def _commit(self, batch: List[Pending]) -> None:
+        """
+        Run a batch of writes in one transaction and resolve their futures.
+        
+        A write that raises is rolled back with the rest of the batch, its
+        caller gets the error, and the batch is run again without it. If the
+        commit is interrupted, e.g. by cancellation, every write of the batch
+        not yet resolved fails.
+        
+        Args:
+            batch: Queued writes, in order
+        """
+        try:
+            await self._commit_batch(batch)
+        finally:
+            for pending in batch:
+                _resolve(pending.future, exc=_stopped())
+    
+    async def _commit_batch(self, batch: List[Pending]) -> None:
+        """Run and commit a batch, retrying it without each write that fails."""
+        while batch:
+            results: List[Any] = []
+            failed: Optional[Pending] = None
+            async with self.sessions() as db:
+                for pending in batch:
+                    try:
+                        results.append(await pending.write(db))
+                    except Exception as exc:
+                        failed = pending
+                        _resolve(pending.future, exc=exc)
+                        break
+                if failed is not None:
+                    await db.rollback()
+                    failures_total.inc()
+                    batch = [pending for pending in batch if pending is not failed]
+                    continue
+                started = time.perf_counter()
+                try:
+                    await db.commit()
+                except Exception as exc:
+                    failures_total.inc(len(batch))
+                    for pending in batch:
+                        _resolve(pending.future, exc=exc)
+                    return
+            seconds = time.perf_counter() - started
+            batches_total.inc()
+            writes_total.inc(len(batch))
+            commit_seconds_total.inc(seconds)
+            last_batch_size.set(len(batch))
+            last_commit_seconds.set(seconds)
+            for pending, result in zip(batch, results):
+                _resolve(pending.future, result)
+            return
+
+
+# Writers by event loop, then by engine, since queues belong to one loop
+_writers: "weakref.WeakKeyDictionary[Any, Dict[AsyncEngine, GroupCommitWriter]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def writer_for(db: AsyncSession) -> GroupCommitWriter:
+    """
+    Get the writer committing writes to the database of a session.
+    
+    Args:
+        db: Session of the caller
+        
+    Returns:
+        Writer of the session's engine in the running event loop
+    """
+    engine = db.bind
+    writers = _writers.setdefault(asyncio.get_running_loop(), {})
+    writer = writers.get(engine)
+    if writer is None:
+        writer = writers[engine] = GroupCommitWriter(
+            async_sessionmaker(engine, autoflush=False, expire_on_commit=False),
+            max_batch=settings.GROUP_COMMIT_MAX_BATCH,
+            delay=settings.GROUP_COMMIT_DELAY,
+            max_pending=settings.GROUP_COMMIT_MAX_PENDING,
+        )
+    return writer
+
+
+@registry.collector
+def collect_group_commit_metrics() -> None:
+    """Copy the queue length of every writer into the metrics registry."""
+    pending_writes.set(
+        sum(writer.pending for writers in list(_writers.values()) for writer in writers.values())
+    )
+
+
+def _stopped() -> RuntimeError:
+    """Error of a write the writer stopped before committing."""
+    return RuntimeError("The group commit writer stopped before reporting the outcome of the write")
+
+
+def _resolve(
+    future: asyncio.Future, result: Any = None, exc: Optional[BaseException] = None
+) -> None:
+    """Resolve the future of a write, unless its caller stopped waiting."""
+    if future.done():
+        return
+    if exc is not None:
+        future.set_exception(exc)
+    else:
+        future.set_result(result)
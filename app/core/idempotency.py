@@ -0,0 +1,164 @@
+"""
+Idempotency module.
+
+This module stores the responses of POST requests sent with an
+Idempotency-Key header in the ``idempotency_keys`` table, shared by every
+worker using the database. The first request with a key reserves it by
+inserting a row holding the fingerprint of the request; once it completes,
+its response is stored compressed in that row, and retries are answered with
+it until it expires ``IDEMPOTENCY_TTL`` seconds later. Expired rows are
+deleted as keys are reserved.
+"""
+import hashlib
+import time
+import zlib
+from typing import Optional
+
+from sqlalchemy import Row, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.idempotency_key import IdempotencyKey
+
+keys = IdempotencyKey.__table__
+
+# Expired rows are purged at most once per PURGE_INTERVAL seconds
+PURGE_INTERVAL = 60
+_next_purge = 0.0
+
+
+def key_id(path: str, key: str) -> str:
+    """
+    Get the row ID of an idempotency key.
+    
+    Keys are scoped to the route they were sent to.
+    
+    Args:
+        path: Path of the request
+        key: Value of the Idempotency-Key header
+        
+    Returns:
+        Hex SHA-256 digest
+    """
+    return hashlib.sha256(f"{path}\n{key}".encode()).hexdigest()
+
+
+def fingerprint(method: str, path: str, query: str, body: bytes) -> str:
+    """
+    Digest a request, so a key reused for another request can be detected.
+    
+    Args:
+        method: HTTP method
+        path: Path of the request
+        query: Query string
+        body: Raw body
+        
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256(f"{method} {path}?{query}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+async def reserve(db: AsyncSession, id: str, fingerprint: str) -> Optional[Row]:
+    """
+    Reserve a key for a request about to run.
+    
+    The reservation expires after ``IDEMPOTENCY_LOCK_TTL`` seconds unless
+    it is renewed with ``renew``, so a key held by a request that stopped
+    without completing, e.g. in a worker that died, can be used again.
+    
+    Args:
+        db: Database session
+        id: Row ID of the key
+        fingerprint: Fingerprint of the request
+        
+    Returns:
+        None if the key was reserved for the request, otherwise the row
+        holding it, which may since have been released
+    """
+    global _next_purge
+    now = int(time.time())
+    if now >= _next_purge:
+        _next_purge = now + PURGE_INTERVAL
+        await db.execute(delete(keys).where(keys.c.expires_at <= now))
+    else:
+        await db.execute(delete(keys).where(keys.c.id == id, keys.c.expires_at <= now))
+    try:
+        await db.execute(
+            insert(keys).values(
+                id=id, fingerprint=fingerprint, expires_at=now + settings.IDEMPOTENCY_LOCK_TTL
+            )
+        )
+        await db.commit()
+        return None
+    except IntegrityError:
+        await db.rollback()
+    return (await db.execute(select(keys).where(keys.c.id == id))).one_or_none()
+
+
+async def renew(db: AsyncSession, id: str) -> None:
+    """
+    Extend the reservation of a key whose request is still running.
+    
+    Args:
+        db: Database session
+        id: Row ID of the key
+    """
+    await db.execute(
+        update(keys)
+        .where(keys.c.id == id, keys.c.status_code.is_(None))
+        .values(expires_at=int(time.time()) + settings.IDEMPOTENCY_LOCK_TTL)
+    )
+    await db.commit()
+
+
+async def complete(db: AsyncSession, id: str, status_code: int, response: bytes) -> None:
+    """
+    Store the response of a request holding a key.
+    
+    Args:
+        db: Database session
+        id: Row ID of the key
+        status_code: Status of the response
+        response: Serialized response
+    """
+    await db.execute(
+        update(keys)
+        .where(keys.c.id == id)
+        .values(
+            status_code=status_code,
+            response=zlib.compress(response),
+            expires_at=int(time.time()) + settings.IDEMPOTENCY_TTL,
+        )
+    )
+    await db.commit()
+
+
+async def release(db: AsyncSession, id: str) -> None:
+    """
+    Free a key whose request did not complete, so it can be retried.
+    
+    Args:
+        db: Database session
+        id: Row ID of the key
+    """
+    await db.execute(delete(keys).where(keys.c.id == id, keys.c.status_code.is_(None)))
+    await db.commit()
+
+
+def stored_response(row: Row) -> Optional[bytes]:
+    """
+    Get the response stored in the row of a key.
+    
+    Args:
+        row: Row returned by ``reserve``
+        
+    Returns:
+        Serialized response, or None while its request runs
+    """
+    if row.response is None:
+        return None
+    return zlib.decompress(row.response)
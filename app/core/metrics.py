@@ -0,0 +1,167 @@
+"""
+Metrics module.
+
+This module provides a minimal registry of counters and gauges rendered in
+the Prometheus text exposition format. Collectors registered with the
+registry copy values kept elsewhere, such as cache statistics, into its
+metrics right before they are rendered.
+"""
+import threading
+from typing import Callable, Dict, List, Tuple
+
+
+class Metric:
+    """
+    A named metric holding one value per label combination.
+    
+    Attributes:
+        name: Metric name
+        help: Help text describing the metric
+        kind: Prometheus metric type, "counter" or "gauge"
+    """
+    
+    def __init__(self, name: str, help: str, kind: str):
+        """
+        Initialize a metric with no values.
+        
+        Args:
+            name: Metric name
+            help: Help text describing the metric
+            kind: Prometheus metric type
+        """
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Increase the value for the given labels.
+        
+        Args:
+            amount: Amount to add
+            labels: Label values identifying the series
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def set(self, value: float, **labels: str) -> None:
+        """
+        Set the value for the given labels.
+        
+        Args:
+            value: New value
+            labels: Label values identifying the series
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = value
+    
+    def value(self, **labels: str) -> float:
+        """
+        Get the value for the given labels.
+        
+        Args:
+            labels: Label values identifying the series
+            
+        Returns:
+            Current value, 0 if the series was never recorded
+        """
+        return self._values.get(tuple(sorted(labels.items())), 0)
+    
+    def samples(self) -> List[Tuple[Dict[str, str], float]]:
+        """
+        Get every recorded series.
+        
+        Returns:
+            Labels and value of each series
+        """
+        with self._lock:
+            items = list(self._values.items())
+        return [(dict(key), value) for key, value in items]
+    
+    def render(self) -> List[str]:
+        """
+        Render the metric in the Prometheus text format.
+        
+        Returns:
+            Lines describing the metric and its series
+        """
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            labels = ",".join(f'{name}="{label}"' for name, label in key)
+            series = f"{self.name}{{{labels}}}" if labels else self.name
+            number = int(value) if float(value).is_integer() else value
+            lines.append(f"{series} {number}")
+        return lines
+
+
+class Registry:
+    """
+    Collection of the metrics exported by the application.
+    """
+    
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+    
+    def counter(self, name: str, help: str) -> Metric:
+        """
+        Get or create a counter.
+        
+        Args:
+            name: Metric name
+            help: Help text describing the metric
+            
+        Returns:
+            The counter
+        """
+        return self._metrics.setdefault(name, Metric(name, help, "counter"))
+    
+    def gauge(self, name: str, help: str) -> Metric:
+        """
+        Get or create a gauge.
+        
+        Args:
+            name: Metric name
+            help: Help text describing the metric
+            
+        Returns:
+            The gauge
+        """
+        return self._metrics.setdefault(name, Metric(name, help, "gauge"))
+    
+    def collector(self, collect: Callable[[], None]) -> Callable[[], None]:
+        """
+        Register a function updating metrics before every render.
+        
+        Args:
+            collect: Function setting the values of its metrics
+            
+        Returns:
+            The function, so this can be used as a decorator
+        """
+        self._collectors.append(collect)
+        return collect
+    
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text format.
+        
+        Returns:
+            Exposition text
+        """
+        for collect in self._collectors:
+            collect()
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
@@ -0,0 +1,202 @@
+"""
+Pagination module.
+
+This module provides keyset (cursor) pagination. Pages are ordered by a list
+of sort columns always ending with the primary key, and the next page starts
+right after the last row of the previous one with a seek such as
+``WHERE (title, id) > (:title, :id)``, so its cost does not grow with the
+page number the way an ``OFFSET`` does. Cursors are opaque tokens encoding
+the sort order and the sort values of the last row.
+
+It also defines how list requests ask for the total number of records.
+"""
+import base64
+import binascii
+import json
+from decimal import Decimal
+from typing import Any, List, Literal, Optional, Sequence, Tuple
+
+from sqlalchemy import Column, and_, inspect, or_, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+# Sort order used when none is given
+DEFAULT_ORDER = ("id",)
+
+# Ways a list request may ask for the number of records
+CountMode = Literal["exact", "estimate", "none"]
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded or does not match the query."""
+
+
+def sort_columns(model: Any, order: Sequence[str] = DEFAULT_ORDER) -> List[Tuple[Column, bool]]:
+    """
+    Resolve a sort order to columns of a model.
+    
+    The primary key is appended when missing, so rows always have a total
+    order and a cursor identifies a single position.
+    
+    Args:
+        model: SQLAlchemy model class
+        order: Column names, each prefixed with "-" for a descending sort
+        
+    Returns:
+        Column and whether it is sorted descending, for each sort key
+        
+    Raises:
+        ValueError: If a column does not exist
+    """
+    columns = inspect(model).columns
+    keys = []
+    for name in order:
+        descending = name.startswith("-")
+        name = name.lstrip("-")
+        if name not in columns:
+            raise ValueError(f"Unknown sort column {name}")
+        keys.append((columns[name], descending))
+    if not any(column.primary_key for column, _ in keys):
+        keys.append((columns["id"], False))
+    return keys
+
+
+def order_by(model: Any, order: Sequence[str] = DEFAULT_ORDER) -> List[ColumnElement]:
+    """
+    Build the ORDER BY clauses of a sort order.
+    
+    Args:
+        model: SQLAlchemy model class
+        order: Column names, each prefixed with "-" for a descending sort
+        
+    Returns:
+        Clauses to pass to ``Select.order_by``
+    """
+    return [
+        column.desc() if descending else column.asc()
+        for column, descending in sort_columns(model, order)
+    ]
+
+
+def seek(model: Any, order: Sequence[str], cursor: str) -> ColumnElement:
+    """
+    Build the condition selecting the rows after a cursor.
+    
+    When every key is sorted the same way this is a single row value
+    comparison, which databases answer with a range scan of the matching
+    index; mixed directions expand to the equivalent OR of comparisons.
+    
+    Args:
+        model: SQLAlchemy model class
+        order: Sort order the cursor was created with
+        cursor: Cursor returned with the previous page
+        
+    Returns:
+        Condition to pass to ``Select.where``
+        
+    Raises:
+        InvalidCursor: If the cursor is malformed or was made for another order
+    """
+    keys = sort_columns(model, order)
+    values = decode_cursor(cursor, keys)
+    directions = {descending for _, descending in keys}
+    if len(directions) == 1:
+        if len(keys) == 1:
+            row, bound = keys[0][0], values[0]
+        else:
+            row, bound = tuple_(*(column for column, _ in keys)), tuple_(*values)
+        return row < bound if directions.pop() else row > bound
+    clauses = []
+    for index, (column, descending) in enumerate(keys):
+        equal = [keys[i][0] == values[i] for i in range(index)]
+        after = column < values[index] if descending else column > values[index]
+        clauses.append(and_(*equal, after))
+    return or_(*clauses)
+
+
+def encode_cursor(obj: Any, keys: List[Tuple[Column, bool]]) -> str:
+    """
+    Encode the position of a row in a sort order.
+    
+    Args:
+        obj: Last row of a page
+        keys: Sort keys, as returned by ``sort_columns``
+        
+    Returns:
+        Opaque cursor
+    """
+    payload = {
+        "o": [("-" if descending else "") + column.key for column, descending in keys],
+        "v": [_dump(getattr(obj, column.key)) for column, _ in keys],
+    }
+    data = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, keys: List[Tuple[Column, bool]]) -> List[Any]:
+    """
+    Decode the sort values stored in a cursor.
+    
+    Args:
+        cursor: Cursor returned with a previous page
+        keys: Sort keys of the current query, as returned by ``sort_columns``
+        
+    Returns:
+        Sort values of the last row of the previous page
+        
+    Raises:
+        InvalidCursor: If the cursor is malformed or was made for another order
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(data)
+        order, values = payload["o"], payload["v"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursor("Invalid cursor")
+    expected = [("-" if descending else "") + column.key for column, descending in keys]
+    if order != expected or len(values) != len(keys):
+        raise InvalidCursor("Cursor does not match the sort order")
+    if any(value is None for value in values):
+        raise InvalidCursor("Invalid cursor")
+    try:
+        return [_load(column, value) for (column, _), value in zip(keys, values)]
+    except (ArithmeticError, TypeError, ValueError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def next_cursor(
+    model: Any, items: Sequence[Any], limit: int, order: Sequence[str] = DEFAULT_ORDER
+) -> Optional[str]:
+    """
+    Get the cursor of the page following a page of results.
+    
+    Args:
+        model: SQLAlchemy model class
+        items: Rows of the current page
+        limit: Page size the rows were requested with
+        order: Sort order of the page
+        
+    Returns:
+        Cursor of the next page, None if the page was the last one
+    """
+    if not items or len(items) < limit:
+        return None
+    return encode_cursor(items[-1], sort_columns(model, order))
+
+
+def _dump(value: Any) -> Any:
+    """Convert a sort value to JSON, keeping decimals exact."""
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _load(column: Column, value: Any) -> Any:
+    """Convert a sort value read from a cursor back to the column's type."""
+    python_type = column.type.python_type
+    if python_type is Decimal:
+        return Decimal(str(value))
+    if python_type is float and isinstance(value, int):
+        return float(value)
+    if not isinstance(value, python_type):
+        raise TypeError(f"Invalid value for {column.key}")
+    return value
@@ -0,0 +1,79 @@
+"""
+Single-flight module.
+
+This module provides request coalescing: concurrent calls sharing a key wait
+for the first one instead of repeating its work.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key.
+    
+    The first caller for a key runs the work; callers arriving while it is in
+    flight wait for its result, or its exception, instead of running it again.
+    Nothing is kept once the call completes.
+    """
+    
+    def __init__(self) -> None:
+        """Initialize with no calls in flight."""
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+    
+    def in_flight(self, key: Hashable) -> bool:
+        """
+        Check whether a call is running for a key.
+        
+        Args:
+            key: Key of the call
+            
+        Returns:
+            True if a call is in flight, False otherwise
+        """
+        return key in self._calls
+    
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        share: Callable[[Any], Any] = lambda result: result,
+    ) -> Any:
+        """
+        Run ``fn`` unless a call with the same key is already in flight.
+        
+        Args:
+            key: Key identifying equivalent calls
+            fn: Coroutine function doing the work
+            share: Function deriving a waiter's copy of the leader's result
+            
+        Returns:
+            Result of the leader's call
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            try:
+                return share(await asyncio.shield(future))
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled; do the work ourselves
+                return await self.do(key, fn, share)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved when nobody was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
@@ -2,20 +2,106 @@
 Base CRUD module.
 
 This module provides a base class for CRUD operations.
+
+Reads made through ``CRUDBase`` are served from a per-model LRU cache. Cached
+rows are kept detached from any session and merged into the caller's session
+on a hit, so no SQL is emitted. Committed writes invalidate exactly the cache
+entries holding the rows they touched. When the cache backend is shared by
+several workers, entries also remember the versions of the tables they were
+read from, so a write committed by another worker makes them stale too.
+
+Every method takes an ``AsyncSession``. Relationships that callers read must
+be loaded eagerly by the query, since lazy loads cannot run outside of an
+await. Sessions are expected not to expire instances on commit, so written
+records are returned without being read again.
 """
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from decimal import Decimal
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    Numeric,
+    case,
+    delete,
+    event,
+    func,
+    insert,
+    inspect,
+    literal,
+    or_,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import (
+    ONETOMANY,
+    Session,
+    joinedload,
+    load_only,
+    make_transient_to_detached,
+    selectinload,
+)
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.core import counts, existence, filtering, group_commit, pagination
+from app.core.cache import (
+    ALL,
+    LRUCache,
+    backend,
+    bump_versions,
+    call_backend,
+    invalidate_tags,
+    register_cache,
+    versions,
+)
+from app.core.config import settings
+from app.core.filtering import Filter, InvalidFilter
+from app.core.pagination import DEFAULT_ORDER, CountMode
 from app.database.base import Base
+from app.schemas.bulk import BulkUpdate
+
+# Loader options of the strategies relationships can be expanded with
+LOADERS = {"joined": joinedload, "selectin": selectinload}
+
+# Offset of the ids MySQL upserts report for updated records, above any id
+UPDATED_ID_OFFSET = 1 << 62
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+class SyncResult(NamedTuple):
+    """Number of records written, or to write in a dry run, by a sync."""
+    created: int
+    updated: int
+    deleted: int
+    unchanged: int
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """
     CRUD base class with default methods to Create, Read, Update, Delete (CRUD).
@@ -24,7 +110,24 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
     * `model`: A SQLAlchemy model class
     * `schema`: A Pydantic model (schema) class
+    
+    Subclasses whitelist the columns lists may be filtered and sorted by in
+    `filterable` and `sortable`; each must lead an index of the table. Schema
+    fields that are not model columns of the same name are mapped to the
+    attribute serializing them in `field_attributes`, and to the column they
+    are read from in `field_columns`. Relationships are only loaded when
+    their field is expanded; `expandable` maps each such field to the
+    strategy loading it, "joined" or "selectin". Models with a natural key,
+    a column identifying records for imports, name it in `natural_key`; it
+    must have a unique index.
     """
+    
+    filterable: Tuple[str, ...] = ("id",)
+    sortable: Tuple[str, ...] = ("id",)
+    field_attributes: Dict[str, str] = {}
+    field_columns: Dict[str, str] = {}
+    expandable: Dict[str, str] = {}
+    natural_key: Optional[str] = None
 
     def __init__(self, model: Type[ModelType]):
         """
@@ -33,61 +136,474 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Args:
             model: SQLAlchemy model class
         """
+        filtering.check_whitelist(model, self.filterable, self.sortable)
+        for name, strategy in self.expandable.items():
+            if strategy not in LOADERS:
+                raise ValueError(f"{model.__name__}.{name} has no loader strategy {strategy}")
+        if self.natural_key is not None and not _is_unique(model, self.natural_key):
+            raise ValueError(f"{model.__name__}.{self.natural_key} has no unique index")
         self.model = model
+        self.cache = register_cache(
+            LRUCache(
+                model.__tablename__,
+                maxsize=settings.CACHE_MAX_ENTRIES,
+                ttl=settings.CACHE_TTL,
+            )
+        )
+
+    def _token(self) -> Optional[str]:
+        """Version token of the tables a cached read of this model may use."""
+        if not backend.shared:
+            return None
+        mapper = inspect(self.model)
+        tables = {mapper.local_table.name}
+        tables.update(rel.mapper.local_table.name for rel in mapper.relationships)
+        return versions.token(tables)
 
-    def get(self, db: Session, id: Any) -> Optional[ModelType]:
+    async def get(
+        self,
+        db: AsyncSession,
+        id: Any,
+        *,
+        fields: Optional[Sequence[str]] = None,
+        expand: Sequence[str] = (),
+    ) -> Optional[ModelType]:
         """
         Get a single record by ID.
         
         Args:
             db: Database session
             id: ID of the record to get
+            fields: Schema fields to load, every column if None
+            expand: ``expandable`` fields whose relationship is loaded
             
         Returns:
             Record with matching ID if found, None otherwise
         """
-        return db.query(self.model).filter(self.model.id == id).first()
+        statement = select(self.model).options(*self._options(fields, expand=expand))
+        return await self._cached_one(
+            db,
+            ("get", id, fields, tuple(expand)),
+            lambda: db.scalar(statement.where(self.model.id == id).limit(1)),
+        )
+    
+    async def get_many(
+        self,
+        db: AsyncSession,
+        ids: Sequence[Any],
+        *,
+        fields: Optional[Sequence[str]] = None,
+        expand: Sequence[str] = (),
+    ) -> Tuple[List[ModelType], List[Any]]:
+        """
+        Get several records by ID.
+        
+        Each id is first read from the cache entries of ``get``. The others
+        are loaded with ``WHERE id IN (...)`` queries of at most
+        ``GET_MANY_CHUNK_SIZE`` ids, then cached for ``get`` as well.
+        
+        Args:
+            db: Database session
+            ids: IDs of the records to get
+            fields: Schema fields to load, every column if None
+            expand: ``expandable`` fields whose relationship is loaded
+            
+        Returns:
+            Records found, in the order of their first ID in ``ids``, and
+            the IDs with no record, in the same order
+        """
+        table = self.model.__tablename__
+        ordered = list(dict.fromkeys(ids))
+        found: Dict[Any, ModelType] = {}
+        misses = []
+        token = await call_backend(self._token) if settings.CACHE_ENABLED else None
+        version = await existence.table_version(table) if settings.EXISTENCE_ENABLED else None
+        generation = self.cache.generation
+        for id in ordered:
+            cached = self.cache.get(("get", id, fields, tuple(expand)))
+            if settings.CACHE_ENABLED and cached is not None and cached[0] == token:
+                found[id] = await db.merge(cached[1], load=False)
+            elif not (settings.EXISTENCE_ENABLED and existence.known_missing(table, id, version)):
+                misses.append(id)
+        
+        statement = select(self.model).options(*self._options(fields, expand=expand))
+        size = settings.GET_MANY_CHUNK_SIZE
+        for start in range(0, len(misses), size):
+            chunk = misses[start:start + size]
+            for obj in await self._all(db, statement.where(self.model.id.in_(chunk))):
+                found[obj.id] = obj
+                if settings.CACHE_ENABLED:
+                    tags: Set[Hashable] = set()
+                    entry = (token, _detach(obj, tags))
+                    key = ("get", obj.id, fields, tuple(expand))
+                    self.cache.set(key, entry, tags=tags, generation=generation)
+        
+        missing = [id for id in ordered if id not in found]
+        if settings.EXISTENCE_ENABLED:
+            for id in missing:
+                existence.record_missing(table, id, version)
+        return [found[id] for id in ordered if id in found], missing
 
-    def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        filters: Sequence[Filter] = (),
+        sort: Sequence[str] = DEFAULT_ORDER,
+        fields: Optional[Sequence[str]] = None,
+        expand: Sequence[str] = (),
     ) -> List[ModelType]:
         """
-        Get multiple records.
+        Get multiple records matching filters, ordered by id by default.
+        
+        Pages are either read by offset, with ``skip``, or after the cursor
+        returned with the previous page, which seeks through the index of the
+        sort columns instead of scanning the skipped rows.
         
         Args:
             db: Database session
             skip: Number of records to skip
             limit: Maximum number of records to return
+            cursor: Cursor of the page to read, from ``next_cursor``
+            filters: Conditions on the ``filterable`` columns
+            sort: Sort order over the ``sortable`` columns
+            fields: Schema fields to load, every column if None
+            expand: ``expandable`` fields whose relationship is loaded
             
         Returns:
             List of records
+            
+        Raises:
+            InvalidCursor: If the cursor is invalid or combined with ``skip``
+            InvalidFilter: If a filter or the sort order is not allowed
+        """
+        statement = self._page(
+            select(self.model).options(*self._options(fields, sort, expand)),
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            filters=filters,
+            sort=sort,
+        )
+        return await self._cached_many(
+            db,
+            ("multi", skip, limit, cursor, tuple(filters), tuple(sort), fields, tuple(expand)),
+            lambda: self._all(db, statement),
+        )
+    
+    async def stream(
+        self, db: AsyncSession, *, fields: Optional[Sequence[str]] = None
+    ) -> AsyncIterator[ModelType]:
+        """
+        Iterate over every record of the table, in id order.
+        
+        Rows are fetched ``EXPORT_BATCH_SIZE`` at a time from a server-side
+        cursor, so memory use does not depend on the size of the table. The
+        records are not cached.
+        
+        Args:
+            db: Database session, kept busy until the iteration ends
+            fields: Schema fields to load, every column if None
+            
+        Yields:
+            Records
+        """
+        statement = (
+            select(self.model)
+            .options(*self._options(fields))
+            .order_by(self.model.id)
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        async for obj in await db.stream_scalars(statement):
+            yield obj
+    
+    async def load_expanded(
+        self, db: AsyncSession, obj: ModelType, expand: Sequence[str]
+    ) -> ModelType:
+        """
+        Load the relationships of expanded fields on a record already loaded.
+        
+        Args:
+            db: Database session the record is attached to
+            obj: Record, typically just created or updated
+            expand: ``expandable`` fields whose relationship is loaded
+            
+        Returns:
+            The same record
+        """
+        names = [
+            self.field_attributes.get(name, name) for name in self.expandable if name in expand
+        ]
+        if names:
+            await db.refresh(obj, attribute_names=names)
+        return obj
+    
+    def next_cursor(
+        self, items: List[ModelType], limit: int, sort: Sequence[str] = DEFAULT_ORDER
+    ) -> Optional[str]:
+        """
+        Get the cursor of the page following a page returned by ``get_multi``.
+        
+        Args:
+            items: Records of the page
+            limit: Page size the records were requested with
+            sort: Sort order the records were requested with
+            
+        Returns:
+            Cursor of the next page, None if the page was the last one
         """
-        return db.query(self.model).offset(skip).limit(limit).all()
+        return pagination.next_cursor(self.model, items, limit, sort)
 
-    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
+    async def count(
+        self, db: AsyncSession, *, estimate: bool = False, filters: Sequence[Filter] = ()
+    ) -> int:
+        """
+        Count the records of the table, or those matching filters.
+        
+        An exact count runs ``COUNT(*)``, which the database answers from its
+        smallest index, or from the index of the filtered column, and is
+        cached until a row is created or deleted. An estimate of the whole
+        table is read from the table statistics where the database keeps
+        them, and maintained by the writes of this process in between;
+        filtered counts are always exact.
+        
+        Args:
+            db: Database session
+            estimate: Whether an estimate is good enough
+            filters: Conditions on the ``filterable`` columns
+            
+        Returns:
+            Number of records
+            
+        Raises:
+            InvalidFilter: If a filter is not allowed
+        """
+        if estimate and not filters:
+            return await counts.estimate(self.model.__tablename__, lambda: self._table_rows(db))
+        statement = select(func.count()).select_from(self.model).where(
+            *filtering.conditions(self.model, filters, self.filterable)
+        )
+        return await self._cached_scalar(db, ("count", tuple(filters)), lambda: db.scalar(statement))
+    
+    async def total(
+        self, db: AsyncSession, mode: Optional[CountMode], filters: Sequence[Filter] = ()
+    ) -> Optional[int]:
+        """
+        Count the records of the table the way a list request asked for.
+        
+        Args:
+            db: Database session
+            mode: "exact", "estimate" or "none", if requested
+            filters: Conditions of the list request
+            
+        Returns:
+            Number of records, None if no count was requested
+        """
+        if mode is None or mode == "none":
+            return None
+        return await self.count(db, estimate=mode == "estimate", filters=filters)
+    
+    async def create(
+        self, db: AsyncSession, *, obj_in: CreateSchemaType, commit: bool = True
+    ) -> ModelType:
         """
         Create a new record.
         
         Args:
             db: Database session
             obj_in: Data to create record with
+            commit: Whether to commit, or only flush so the caller can
+                commit more writes in the same transaction
             
         Returns:
             Created record
         """
+        if self._group_commits(db, commit):
+            return await self._group_commit(
+                db, lambda session: self.create(session, obj_in=obj_in, commit=False)
+            )
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await self._write(db, commit)
         return db_obj
 
-    def update(
+    async def create_many(
+        self, db: AsyncSession, *, objs_in: Sequence[CreateSchemaType]
+    ) -> List[int]:
+        """
+        Create several records with multi-row inserts.
+        
+        Records are inserted in chunks of ``BULK_CHUNK_SIZE`` rows, each
+        with one INSERT statement committed in its own transaction, so
+        chunks committed before a failing one are kept. Generated ids are
+        read back with ``RETURNING`` where the database supports it; MySQL
+        reports the first id of a multi-row insert, and allocates the
+        following ones consecutively. Records are not refreshed.
+        
+        Args:
+            db: Database session
+            objs_in: Data to create records with
+            
+        Returns:
+            IDs of the created records, in the order of ``objs_in``
+        """
+        rows = [self._column_values(jsonable_encoder(obj_in)) for obj_in in objs_in]
+        return await self._create_rows(db, rows)
+    
+    async def sync(
         self,
-        db: Session,
+        db: AsyncSession,
+        objs_in: Sequence[CreateSchemaType],
+        *,
+        ids: Optional[Sequence[int]] = None,
+        delete_missing: bool = True,
+        dry_run: bool = False,
+    ) -> "SyncResult":
+        """
+        Make the table hold the given records, writing only the differences.
+        
+        Records are matched to rows by natural key, or by id for models
+        without one. Matched rows are updated when a field given for their
+        record holds another value; fields a record leaves unset are kept.
+        Records with no row are created, and rows with no record deleted.
+        Each kind of change is written by chunks of ``BULK_CHUNK_SIZE``
+        rows, each committed in its own transaction.
+        
+        Args:
+            db: Database session
+            objs_in: Every record the table should hold
+            ids: ID of each record, required for models without a natural key
+            delete_missing: Whether to delete rows with no record
+            dry_run: Whether to only count the changes, without writing them
+            
+        Returns:
+            Number of records created, updated, deleted and left unchanged
+            
+        Raises:
+            ValueError: If two records have the same key, or ids are needed but missing
+        """
+        key = self.natural_key or "id"
+        if self.natural_key is None and ids is None:
+            raise ValueError(f"{self.model.__name__} has no natural key; records need ids")
+        table = self.model.__table__
+        wanted: Dict[Any, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        for index, obj_in in enumerate(objs_in):
+            row = self._column_values(jsonable_encoder(obj_in))
+            given = self._column_values(jsonable_encoder(obj_in, exclude_unset=True))
+            if self.natural_key is None:
+                row["id"] = ids[index]
+            if row[key] in wanted:
+                raise ValueError(f"Two records have the {key} {row[key]!r}")
+            wanted[row[key]] = (row, given)
+        
+        existing = {row[key]: row for row in (await db.execute(select(table))).mappings()}
+        creates = [row for value, (row, _) in wanted.items() if value not in existing]
+        updates: Dict[Any, Dict[str, Any]] = {}
+        for value, (_, given) in wanted.items():
+            current = existing.get(value)
+            if current is not None and any(
+                not _same_value(table.c[name], current[name], given[name]) for name in given
+            ):
+                updates[current["id"]] = given
+        deletes = [row["id"] for value, row in existing.items() if value not in wanted]
+        if not delete_missing:
+            deletes = []
+        result = SyncResult(
+            len(creates), len(updates), len(deletes), len(wanted) - len(creates) - len(updates)
+        )
+        if dry_run:
+            return result
+        
+        await self._create_rows(db, creates)
+        size = settings.BULK_CHUNK_SIZE
+        update_ids = list(updates)
+        for start in range(0, len(update_ids), size):
+            chunk = update_ids[start:start + size]
+            await self._update_rows(db, {id: updates[id] for id in chunk})
+            _record_rows(db, table.name, chunk)
+            await db.commit()
+        for start in range(0, len(deletes), size):
+            await _delete_rows(db, self.model, deletes[start:start + size])
+            await db.commit()
+        return result
+    
+    async def upsert(
+        self, db: AsyncSession, *, obj_in: CreateSchemaType
+    ) -> Tuple[ModelType, bool]:
+        """
+        Create a record, or update the record with the same natural key.
+        
+        The record is written with a single statement where possible. MySQL
+        runs one ``INSERT ... ON DUPLICATE KEY UPDATE``, which sets every
+        column of an existing record and reports its id, offset to tell it
+        from the id of an inserted record. SQLite runs an ``UPDATE ...
+        RETURNING`` of the record holding the key, and an ``INSERT`` if there
+        is none; the write lock SQLite takes for the ``UPDATE`` makes this
+        atomic. Other databases read the id of the record holding the key,
+        then run an ``UPDATE`` or an ``INSERT``; this is not atomic, so
+        concurrent upserts of a new key may fail with an ``IntegrityError``.
+        
+        Args:
+            db: Database session
+            obj_in: Data of the record, including its natural key
+            
+        Returns:
+            Written record, built from ``obj_in`` without reading it back,
+            and whether it was created
+            
+        Raises:
+            ValueError: If the model has no natural key
+        """
+        if self.natural_key is None:
+            raise ValueError(f"{self.model.__name__} has no natural key")
+        data = jsonable_encoder(obj_in)
+        values = self._column_values(data)
+        table = self.model.__table__
+        key = table.c[self.natural_key]
+        matches = key == values[self.natural_key]
+        dialect = db.get_bind().dialect.name
+        if dialect == "mysql":
+            statement = mysql.insert(table).values(values)
+            updates = {name: statement.inserted[name] for name in values}
+            # Report the id of an updated record as the last inserted id,
+            # offset by UPDATED_ID_OFFSET. The row count cannot tell an
+            # insert from an update changing nothing, both counting 1 with
+            # the CLIENT_FOUND_ROWS flag SQLAlchemy connects with.
+            updates["id"] = (
+                func.last_insert_id(table.c.id + UPDATED_ID_OFFSET) - UPDATED_ID_OFFSET
+            )
+            id = (await db.execute(statement.on_duplicate_key_update(updates))).lastrowid
+            created = id < UPDATED_ID_OFFSET
+            if not created:
+                id -= UPDATED_ID_OFFSET
+        elif dialect == "sqlite":
+            statement = update(table).where(matches).values(values).returning(table.c.id)
+            id = await db.scalar(statement)
+            created = id is None
+            if created:
+                id = (await db.execute(insert(table).values(values))).inserted_primary_key[0]
+        else:
+            id = await db.scalar(select(table.c.id).where(matches))
+            created = id is None
+            if created:
+                id = (await db.execute(insert(table).values(values))).inserted_primary_key[0]
+            else:
+                await db.execute(update(table).where(table.c.id == id).values(values))
+        _record_rows(db, table.name, [id], "created_rows" if created else None)
+        await db.commit()
+        return self.model(id=id, **data), created
+    
+    async def update(
+        self,
+        db: AsyncSession,
         *,
         db_obj: ModelType,
-        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        commit: bool = True,
     ) -> ModelType:
         """
         Update a record.
@@ -96,35 +612,800 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             db: Database session
             db_obj: Record to update
             obj_in: New data to update record with
+            commit: Whether to commit, or only flush so the caller can
+                commit more writes in the same transaction
             
         Returns:
             Updated record
         """
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
-            update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+            update_data = obj_in.model_dump(exclude_unset=True)
+        for field, value in update_data.items():
+            if hasattr(self.model, field):
+                setattr(db_obj, field, value)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await self._write(db, commit)
         return db_obj
+    
+    async def update_by_id(
+        self,
+        db: AsyncSession,
+        *,
+        id: int,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        commit: bool = True,
+    ) -> Optional[ModelType]:
+        """
+        Update a record by id with a single statement, without reading it first.
+        
+        Only the given fields are set, and only when one of them holds
+        another value. Where the dialect supports ``UPDATE ... RETURNING``,
+        the statement also returns the updated row. Other dialects tell from
+        its row count whether it updated the record, then read the updated
+        record back in the same transaction. A record the statement did not
+        update is read through the cache, to tell an unchanged record from a
+        missing one. An update changing nothing writes nothing and
+        invalidates no cache entry.
+        
+        Args:
+            db: Database session
+            id: ID of the record to update
+            obj_in: New data to update record with
+            commit: Whether to commit, or leave the transaction open so the
+                caller can commit more writes with it
+            
+        Returns:
+            Updated record, or None if it does not exist
+        """
+        if self._group_commits(db, commit):
+            return await self._group_commit(
+                db, lambda session: self.update_by_id(session, id=id, obj_in=obj_in, commit=False)
+            )
+        if not isinstance(obj_in, dict):
+            obj_in = obj_in.model_dump(exclude_unset=True)
+        values = self._column_values(obj_in)
+        table = self.model.__table__
+        if not values:
+            return await self.get(db, id)
+        changed = or_(*(table.c[name].is_distinct_from(value) for name, value in values.items()))
+        statement = update(table).where(table.c.id == id, changed).values(values)
+        if db.get_bind().dialect.update_returning:
+            row = (await db.execute(statement.returning(*table.c))).mappings().first()
+        elif (await db.execute(statement)).rowcount:
+            row = await self._read(db, id)
+        else:
+            row = None
+        if row is None:
+            return await self.get(db, id)
+        _record_rows(db, table.name, [id])
+        await self._write(db, commit)
+        return await db.merge(self._instance(row), load=False)
 
-    def remove(self, db: Session, *, id: int) -> ModelType:
+    async def update_many(
+        self,
+        db: AsyncSession,
+        *,
+        obj_in: BulkUpdate,
+        filters: Sequence[Filter] = (),
+    ) -> int:
         """
-        Remove a record.
+        Update several records with set-based statements.
+        
+        The records to update are read first, then updated with one UPDATE
+        per chunk of ``BULK_CHUNK_SIZE`` records, where values that differ
+        between records are picked by a ``CASE`` on the id. Every chunk is
+        committed in a single transaction, so the cache is invalidated once.
+        
+        Args:
+            db: Database session
+            obj_in: Values and the ids they apply to, or records with their values
+            filters: Conditions on the ``filterable`` columns
+            
+        Returns:
+            Number of records updated
+            
+        Raises:
+            InvalidFilter: If neither ids nor filters were given, or a filter is invalid
+        """
+        if obj_in.items is not None:
+            rows = {
+                item.id: self._column_values(item.values.model_dump(exclude_unset=True))
+                for item in obj_in.items
+            }
+            ids = await self._matching_ids(db, list(rows), filters)
+        else:
+            values = self._column_values(obj_in.values.model_dump(exclude_unset=True))
+            ids = await self._matching_ids(db, obj_in.ids, filters)
+            rows = dict.fromkeys(ids, values)
+        if not any(rows.values()):
+            return 0
+        
+        affected = 0
+        size = settings.BULK_CHUNK_SIZE
+        for start in range(0, len(ids), size):
+            chunk = ids[start:start + size]
+            affected += await self._update_rows(db, {id: rows[id] for id in chunk})
+        _record_rows(db, self.model.__tablename__, ids)
+        await db.commit()
+        return affected
+    
+    async def remove(
+        self, db: AsyncSession, *, id: int, commit: bool = True, read: bool = False
+    ) -> Optional[ModelType]:
+        """
+        Remove a record with a single ``DELETE``, without reading it first.
+        
+        Where the dialect supports ``DELETE ... RETURNING``, the statement
+        returns the removed row. Other dialects tell from its row count
+        whether the record existed, and only read it first if ``read`` is
+        set. Records of relationships that cascade deletes are removed
+        before it.
         
         Args:
             db: Database session
             id: ID of the record to remove
+            commit: Whether to commit, or leave the transaction open so the
+                caller can commit more writes with it
+            read: Whether the whole removed record is needed, on dialects
+                without ``DELETE ... RETURNING``
+            
+        Returns:
+            Removed record, or None if it does not exist. Without
+            ``DELETE ... RETURNING`` and ``read``, the record only holds its id.
+        """
+        table = self.model.__table__
+        stale = db.identity_map.get(identity_key(self.model, id))
+        if stale is not None:
+            db.expunge(stale)
+        if self._group_commits(db, commit):
+            return await group_commit.writer_for(db).submit(
+                lambda session: self.remove(session, id=id, commit=False, read=read)
+            )
+        statement = delete(table).where(table.c.id == id)
+        if db.get_bind().dialect.delete_returning:
+            await _delete_children(db, self.model, [id])
+            row = (await db.execute(statement.returning(*table.c))).mappings().first()
+            obj = None if row is None else self._instance(row)
+        else:
+            row = await self._read(db, id) if read else None
+            await _delete_children(db, self.model, [id])
+            obj = None
+            if (await db.execute(statement)).rowcount:
+                obj = self.model(id=id) if row is None else self._instance(row)
+        if obj is not None:
+            _record_rows(db, table.name, [id], "deleted_rows")
+            await self._write(db, commit)
+        return obj
+    
+    async def remove_many(
+        self,
+        db: AsyncSession,
+        *,
+        ids: Optional[Sequence[int]] = None,
+        filters: Sequence[Filter] = (),
+    ) -> int:
+        """
+        Remove several records with ``DELETE ... WHERE id IN`` statements.
+        
+        The records to remove are read first, then deleted by chunks of
+        ``BULK_CHUNK_SIZE`` ids, along with the records of relationships
+        that cascade deletes. Every chunk is committed in a single
+        transaction, so the cache is invalidated once.
+        
+        Args:
+            db: Database session
+            ids: IDs of the records to remove, every record matching the filters if None
+            filters: Conditions on the ``filterable`` columns
             
         Returns:
-            Removed record
+            Number of records removed
+            
+        Raises:
+            InvalidFilter: If neither ids nor filters were given, or a filter is invalid
+        """
+        targets = await self._matching_ids(db, ids, filters)
+        affected = await _delete_rows(db, self.model, targets)
+        await db.commit()
+        return affected
+    
+    def _group_commits(self, db: AsyncSession, commit: bool) -> bool:
+        """
+        Check whether a write goes through the group commit writer.
+        
+        The writer runs the write in its own session, so it is only used
+        when the caller's session has no open transaction, whose uncommitted
+        work the write could neither see nor commit.
+        
+        Args:
+            db: Database session of the caller
+            commit: Whether the caller asked to commit the write
+            
+        Returns:
+            True if group commits are enabled and the write may use them
+        """
+        return commit and settings.GROUP_COMMIT_ENABLED and not db.in_transaction()
+    
+    async def _group_commit(
+        self, db: AsyncSession, write: Callable[[AsyncSession], Awaitable[Optional[ModelType]]]
+    ) -> Optional[ModelType]:
         """
-        obj = db.query(self.model).get(id)
-        db.delete(obj)
-        db.commit()
-        return obj 
\ No newline at end of file
+        Run a write through the group commit writer, and attach its record.
+        
+        Args:
+            db: Database session of the caller
+            write: Coroutine function running the write without committing
+            
+        Returns:
+            Written record, merged into the caller's session, or None
+        """
+        db_obj = await group_commit.writer_for(db).submit(write)
+        return None if db_obj is None else await db.merge(db_obj, load=False)
+    
+    async def _write(self, db: AsyncSession, commit: bool) -> None:
+        """
+        Commit or flush the pending writes of a session.
+        
+        A flush sends the writes and assigns the ids of new records, but
+        leaves the transaction open. Either way written records keep the
+        values they were given, so they are not read again.
+        
+        Args:
+            db: Database session
+            commit: Whether to commit
+        """
+        if commit:
+            await db.commit()
+        else:
+            await db.flush()
+    
+    async def _read(self, db: AsyncSession, id: int) -> Optional[Mapping[str, Any]]:
+        """
+        Read the row of a record from the database, bypassing the cache.
+        
+        Args:
+            db: Database session
+            id: ID of the record
+            
+        Returns:
+            Column values of the row, or None if it does not exist
+        """
+        table = self.model.__table__
+        return (await db.execute(select(table).where(table.c.id == id))).mappings().first()
+    
+    def _instance(self, row: Mapping[str, Any]) -> ModelType:
+        """
+        Build a detached record from a row read by a Core statement.
+        
+        Args:
+            row: Column values of the row, keyed by column name
+            
+        Returns:
+            Record that can be merged into a session without emitting SQL
+        """
+        obj = self.model.__mapper__.class_manager.new_instance()
+        for attr in inspect(self.model).column_attrs:
+            set_committed_value(obj, attr.key, row[attr.columns[0].key])
+        make_transient_to_detached(obj)
+        return obj
+    
+    def _column_values(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get the column values of record data, keyed by column name.
+        
+        The data is set on a model instance, so attributes stored in another
+        form, such as the JSON features of a type, are converted as by
+        ``create`` and ``update``.
+        """
+        db_obj = self.model()
+        for field, value in data.items():
+            if hasattr(self.model, field):
+                setattr(db_obj, field, value)
+        state = inspect(db_obj)
+        return {
+            attr.columns[0].key: state.dict[attr.key]
+            for attr in state.mapper.column_attrs
+            if attr.key in state.dict
+        }
+    
+    async def _create_rows(self, db: AsyncSession, rows: Sequence[Dict[str, Any]]) -> List[int]:
+        """
+        Insert rows by chunks, each committed in its own transaction.
+        
+        Args:
+            db: Database session
+            rows: Column values of each row
+            
+        Returns:
+            IDs of the created rows, in order
+        """
+        ids: List[int] = []
+        size = settings.BULK_CHUNK_SIZE
+        for start in range(0, len(rows), size):
+            chunk = await self._insert_rows(db, list(rows[start:start + size]))
+            _record_rows(db, self.model.__tablename__, chunk, "created_rows")
+            await db.commit()
+            ids.extend(chunk)
+        return ids
+    
+    async def _insert_rows(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        Insert rows with one statement and return their ids, in order.
+        
+        The ids of a multi-row insert are allocated in the order of its
+        rows, so they are sorted rather than matched to the rows. Rows may
+        also give their id.
+        
+        Args:
+            db: Database session
+            rows: Column values of each row, with the same columns in every row
+            
+        Returns:
+            Generated IDs
+        """
+        table = self.model.__table__
+        statement = insert(table).values(rows)
+        if "id" in rows[0]:
+            await db.execute(statement)
+            return [row["id"] for row in rows]
+        if db.get_bind().dialect.insert_returning:
+            return sorted((await db.execute(statement.returning(table.c.id))).scalars())
+        result = await db.execute(statement)
+        return list(range(result.lastrowid, result.lastrowid + len(rows)))
+    
+    async def _update_rows(self, db: AsyncSession, rows: Dict[Any, Dict[str, Any]]) -> int:
+        """
+        Update rows with one statement.
+        
+        A column set to the same value on every row is assigned that value,
+        others a ``CASE`` on the id that keeps rows without a value as is.
+        
+        Args:
+            db: Database session
+            rows: Column values to set, by row id
+            
+        Returns:
+            Number of rows updated
+        """
+        table = self.model.__table__
+        assignments: Dict[str, Any] = {}
+        for name in dict.fromkeys(name for values in rows.values() for name in values):
+            column = table.c[name]
+            given = {id: values[name] for id, values in rows.items() if name in values}
+            if len(given) == len(rows) and len(set(given.values())) == 1:
+                assignments[name] = next(iter(given.values()))
+            else:
+                whens = {id: literal(value, column.type) for id, value in given.items()}
+                assignments[name] = case(whens, value=table.c.id, else_=column)
+        statement = update(table).where(table.c.id.in_(list(rows))).values(assignments)
+        return (await db.execute(statement)).rowcount
+    
+    async def _matching_ids(
+        self, db: AsyncSession, ids: Optional[Sequence[Any]], filters: Sequence[Filter]
+    ) -> List[Any]:
+        """
+        Get the ids of the records a bulk write applies to.
+        
+        Args:
+            db: Database session
+            ids: IDs requested, every record matching the filters if None
+            filters: Conditions on the ``filterable`` columns
+            
+        Returns:
+            IDs of the existing records among ``ids`` that match the filters, in order
+            
+        Raises:
+            InvalidFilter: If neither ids nor filters were given, or a filter is invalid
+        """
+        if ids is None and not filters:
+            raise InvalidFilter("Bulk writes need ids or a filter")
+        statement = select(self.model.id).where(
+            *filtering.conditions(self.model, filters, self.filterable)
+        )
+        if ids is None:
+            return list(await db.scalars(statement.order_by(self.model.id)))
+        matched: List[Any] = []
+        ordered = list(dict.fromkeys(ids))
+        size = settings.BULK_CHUNK_SIZE
+        for start in range(0, len(ordered), size):
+            chunk = ordered[start:start + size]
+            matched.extend(await db.scalars(statement.where(self.model.id.in_(chunk))))
+        return sorted(matched)
+    
+    def _options(
+        self,
+        fields: Optional[Sequence[str]],
+        sort: Sequence[str] = DEFAULT_ORDER,
+        expand: Sequence[str] = (),
+    ) -> List[Any]:
+        """
+        Build the loader options of a query for some schema fields.
+        
+        The primary key and the sort columns are always loaded, since they
+        identify the records and position the next page. Relationships are
+        loaded with their ``expandable`` strategy when their field is
+        expanded, or named in ``fields``, and are left unloaded otherwise.
+        
+        Args:
+            fields: Schema fields to load, every column if None
+            sort: Sort order of the query
+            expand: ``expandable`` fields whose relationship is loaded
+            
+        Returns:
+            Options to pass to ``Select.options``
+        """
+        mapper = inspect(self.model)
+        wanted = expand if fields is None else fields
+        expanded = [name for name in self.expandable if name in wanted]
+        relationships = [
+            mapper.relationships[self.field_attributes.get(name, name)] for name in expanded
+        ]
+        options: List[Any] = [
+            LOADERS[self.expandable[name]](rel.class_attribute)
+            for name, rel in zip(expanded, relationships)
+        ]
+        if fields is None:
+            return options
+        keys = {column.key for column in mapper.primary_key}
+        keys.update(name.lstrip("-") for name in sort)
+        for field in fields:
+            keys.add(self.field_columns.get(field, self.field_attributes.get(field, field)))
+        # Relationships are loaded from the foreign keys of the record
+        for rel in relationships:
+            keys.update(mapper.get_property_by_column(column).key for column in rel.local_columns)
+        columns = [getattr(self.model, attr.key) for attr in mapper.column_attrs if attr.key in keys]
+        return [load_only(*columns), *options]
+    
+    def _page(
+        self,
+        statement: Any,
+        *,
+        skip: int,
+        limit: int,
+        cursor: Optional[str],
+        filters: Sequence[Filter] = (),
+        sort: Sequence[str] = DEFAULT_ORDER,
+    ) -> Any:
+        """
+        Filter and order a query and restrict it to one page.
+        
+        Args:
+            statement: Select statement of the model
+            skip: Number of records to skip
+            limit: Maximum number of records to return
+            cursor: Cursor of the page to read, if any
+            filters: Conditions on the ``filterable`` columns
+            sort: Sort order over the ``sortable`` columns
+            
+        Returns:
+            Select statement of the page
+            
+        Raises:
+            InvalidCursor: If the cursor is invalid or combined with ``skip``
+            InvalidFilter: If a filter or the sort order is not allowed
+        """
+        filtering.check_sort(sort, self.sortable)
+        statement = statement.where(*filtering.conditions(self.model, filters, self.filterable))
+        statement = statement.order_by(*pagination.order_by(self.model, sort))
+        if cursor is not None:
+            if skip:
+                raise pagination.InvalidCursor("A cursor cannot be combined with skip")
+            statement = statement.where(pagination.seek(self.model, sort, cursor))
+        else:
+            statement = statement.offset(skip)
+        return statement.limit(limit)
+    
+    async def _table_rows(self, db: AsyncSession) -> int:
+        """
+        Read the number of rows of the table from the database statistics.
+        
+        Falls back to counting the rows on databases without statistics,
+        such as SQLite, or before MySQL has analyzed the table.
+        
+        Args:
+            db: Database session
+            
+        Returns:
+            Number of rows
+        """
+        if db.get_bind().dialect.name == "mysql":
+            rows = await db.scalar(
+                text(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+                ),
+                {"table": self.model.__tablename__},
+            )
+            if rows is not None:
+                return int(rows)
+        return await db.scalar(select(func.count()).select_from(self.model))
+    
+    async def _all(self, db: AsyncSession, statement: Any) -> List[ModelType]:
+        """
+        Run a query and return every record it selects.
+        
+        Args:
+            db: Database session
+            statement: Select statement
+            
+        Returns:
+            List of records
+        """
+        return list((await db.scalars(statement)).unique())
+    
+    async def _cached_one(
+        self,
+        db: AsyncSession,
+        key: Hashable,
+        load: Callable[[], Awaitable[Optional[ModelType]]],
+    ) -> Optional[ModelType]:
+        """
+        Read a single record through the cache.
+        
+        Args:
+            db: Database session the result is attached to
+            key: Cache key of the read
+            load: Coroutine function running the query on a miss
+            
+        Returns:
+            Record if found, None otherwise
+        """
+        if not settings.CACHE_ENABLED:
+            return await load()
+        token = await call_backend(self._token)
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == token:
+            return await db.merge(cached[1], load=False)
+        generation = self.cache.generation
+        obj = await load()
+        if obj is not None:
+            tags: Set[Hashable] = set()
+            entry = (token, _detach(obj, tags))
+            self.cache.set(key, entry, tags=tags, generation=generation)
+        return obj
+    
+    async def _cached_scalar(
+        self,
+        db: AsyncSession,
+        key: Hashable,
+        load: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Read a value computed over the whole table through the cache.
+        
+        The value is dropped when a row of the table is created or deleted.
+        
+        Args:
+            db: Database session
+            key: Cache key of the read
+            load: Coroutine function running the query on a miss
+            
+        Returns:
+            Value returned by the query
+        """
+        if not settings.CACHE_ENABLED:
+            return await load()
+        token = await call_backend(self._token)
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == token:
+            return cached[1]
+        generation = self.cache.generation
+        value = await load()
+        tags: Set[Hashable] = {(self.model.__tablename__, ALL)}
+        self.cache.set(key, (token, value), tags=tags, generation=generation)
+        return value
+    
+    async def _cached_many(
+        self,
+        db: AsyncSession,
+        key: Hashable,
+        load: Callable[[], Awaitable[List[ModelType]]],
+    ) -> List[ModelType]:
+        """
+        Read a list of records through the cache.
+        
+        Args:
+            db: Database session the results are attached to
+            key: Cache key of the read
+            load: Coroutine function running the query on a miss
+            
+        Returns:
+            List of records
+        """
+        if not settings.CACHE_ENABLED:
+            return await load()
+        token = await call_backend(self._token)
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == token:
+            return [await db.merge(obj, load=False) for obj in cached[1]]
+        generation = self.cache.generation
+        objs = await load()
+        tags: Set[Hashable] = {(self.model.__tablename__, ALL)}
+        entry = (token, [_detach(obj, tags) for obj in objs])
+        self.cache.set(key, entry, tags=tags, generation=generation)
+        return objs
+
+
+def _row_tag(obj: Any) -> Hashable:
+    """Return the cache tag identifying the row behind an ORM instance."""
+    state = inspect(obj)
+    identity = state.identity or state.mapper.primary_key_from_instance(obj)
+    return (state.mapper.local_table.name, identity[0])
+
+
+def _is_unique(model: Any, column: str) -> bool:
+    """Check whether a column of a model has a unique index or constraint."""
+    table = model.__table__
+    if table.c[column].unique:
+        return True
+    indexes = [index for index in table.indexes if index.unique]
+    return any([col.name for col in index.columns] == [column] for index in indexes)
+
+
+def _same_value(column: Any, stored: Any, value: Any) -> bool:
+    """Check whether a stored column value equals a new one, comparing numbers exactly."""
+    if isinstance(column.type, Numeric) and stored is not None and value is not None:
+        return Decimal(str(stored)) == Decimal(str(value))
+    return stored == value
+
+
+def _record_rows(
+    db: AsyncSession, table: str, ids: Iterable[Any], written: Optional[str] = None
+) -> None:
+    """
+    Record the cache tags of rows written by a Core statement.
+    
+    Core statements skip the flush hooks, so bulk writes record the rows
+    they touched themselves, before committing. Their table's list pages
+    are invalidated as well.
+    
+    Args:
+        db: Database session
+        table: Name of the written table
+        ids: IDs of the written rows
+        written: "created_rows" or "deleted_rows" for inserts and deletes,
+            None for updates
+    """
+    rows = {(table, id) for id in ids}
+    tags = db.info.setdefault("cache_tags", set())
+    tags.add((table, ALL))
+    tags.update(rows)
+    if written:
+        db.info.setdefault(written, set()).update(rows)
+
+
+async def _delete_rows(db: AsyncSession, model: Any, ids: Sequence[Any]) -> int:
+    """
+    Delete rows by chunks of ids, after the rows their deletion cascades to.
+    
+    Args:
+        db: Database session
+        model: SQLAlchemy model class
+        ids: IDs of the rows to delete
+        
+    Returns:
+        Number of rows of the model deleted
+    """
+    table = model.__table__
+    affected = 0
+    size = settings.BULK_CHUNK_SIZE
+    for start in range(0, len(ids), size):
+        chunk = ids[start:start + size]
+        await _delete_children(db, model, chunk)
+        statement = delete(table).where(table.c.id.in_(chunk))
+        affected += (await db.execute(statement)).rowcount
+        _record_rows(db, table.name, chunk, "deleted_rows")
+    return affected
+
+
+async def _delete_children(db: AsyncSession, model: Any, ids: Sequence[Any]) -> None:
+    """
+    Delete the rows that deleting some rows of a model cascades to.
+    
+    Args:
+        db: Database session
+        model: SQLAlchemy model class
+        ids: IDs of the rows about to be deleted
+    """
+    for rel in inspect(model).relationships:
+        if rel.cascade.delete and rel.direction is ONETOMANY:
+            child = rel.mapper.class_
+            (foreign_key,) = rel.remote_side
+            children = list(await db.scalars(select(child.id).where(foreign_key.in_(ids))))
+            await _delete_rows(db, child, children)
+
+
+def _detach(obj: Any, tags: Set[Hashable], memo: Optional[Dict[int, Any]] = None) -> Any:
+    """
+    Copy an ORM instance and its loaded relationships out of its session.
+    
+    The copy is a detached instance whose loaded attributes are marked as
+    committed, which lets ``Session.merge(copy, load=False)`` attach it to
+    another session without emitting SQL.
+    
+    Args:
+        obj: Persistent ORM instance
+        tags: Set collecting the row tag of every copied instance
+        memo: Copies made so far, used to preserve cycles
+        
+    Returns:
+        Detached copy of the instance
+    """
+    memo = {} if memo is None else memo
+    if id(obj) in memo:
+        return memo[id(obj)]
+    state = inspect(obj)
+    mapper = state.mapper
+    copy = mapper.class_manager.new_instance()
+    memo[id(obj)] = copy
+    for attr in mapper.column_attrs:
+        if attr.key in state.dict:
+            set_committed_value(copy, attr.key, state.dict[attr.key])
+    make_transient_to_detached(copy)
+    tags.add(_row_tag(copy))
+    for rel in mapper.relationships:
+        if rel.key not in state.dict:
+            continue
+        value = state.dict[rel.key]
+        if value is None:
+            set_committed_value(copy, rel.key, None)
+        elif rel.uselist:
+            set_committed_value(copy, rel.key, [_detach(item, tags, memo) for item in value])
+        else:
+            set_committed_value(copy, rel.key, _detach(value, tags, memo))
+    return copy
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_written_rows(session: Session, flush_context: Any) -> None:
+    """
+    Record the cache tags of every row written by a flush.
+    
+    Every written row also invalidates the list pages and counts of its
+    table, which it may enter, leave or move within. Inserts and deletes are
+    recorded for the existence bitmaps.
+    """
+    tags = session.info.setdefault("cache_tags", set())
+    created = session.info.setdefault("created_rows", set())
+    deleted = session.info.setdefault("deleted_rows", set())
+    for obj in session.new:
+        tags.add(_row_tag(obj))
+        tags.add((inspect(obj).mapper.local_table.name, ALL))
+        created.add(_row_tag(obj))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            tags.add(_row_tag(obj))
+            tags.add((inspect(obj).mapper.local_table.name, ALL))
+    for obj in session.deleted:
+        tags.add(_row_tag(obj))
+        tags.add((inspect(obj).mapper.local_table.name, ALL))
+        deleted.add(_row_tag(obj))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written_rows(session: Session) -> None:
+    """
+    Invalidate cache entries for rows written by the committed transaction,
+    bump the version of every table it touched and update the existence
+    bitmaps and row counters.
+    
+    Only in-process state is updated here; a version bump that would block
+    on the backend is queued by ``bump_versions``.
+    """
+    tags = session.info.pop("cache_tags", None)
+    created = session.info.pop("created_rows", ())
+    deleted = session.info.pop("deleted_rows", ())
+    existence.record_writes(created, deleted)
+    counts.record_writes(created, deleted)
+    if tags:
+        bump_versions(table for table, _ in tags)
+        invalidate_tags(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_rows(session: Session) -> None:
+    """Forget rows recorded by a transaction that was rolled back."""
+    session.info.pop("cache_tags", None)
+    session.info.pop("created_rows", None)
+    session.info.pop("deleted_rows", None)
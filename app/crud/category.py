@@ -0,0 +1,19 @@
+"""
+CRUD operations for Category.
+
+This module provides database operations for Category model.
+"""
+from app.crud.base import CRUDBase
+from app.models.category import Category
+from app.schemas.category import CategoryCreate, CategoryUpdate
+
+
+class CRUDCategory(CRUDBase[Category, CategoryCreate, CategoryUpdate]):
+    """
+    CRUD operations for Category
+    """
+    filterable = ("id", "title")
+    sortable = ("id", "title")
+
+
+category = CRUDCategory(Category)
@@ -0,0 +1,20 @@
+"""
+CRUD operations for FAQ.
+
+This module provides database operations for FAQ model.
+"""
+from app.crud.base import CRUDBase
+from app.models.faq import FAQ
+from app.schemas.faq import FAQCreate, FAQUpdate
+
+
+class CRUDFAQ(CRUDBase[FAQ, FAQCreate, FAQUpdate]):
+    """
+    CRUD operations for FAQ
+    """
+    filterable = ("id", "question")
+    sortable = ("id", "question")
+    natural_key = "question"
+
+
+faq = CRUDFAQ(FAQ)
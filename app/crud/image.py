@@ -0,0 +1,18 @@
+"""
+CRUD operations for Image.
+
+This module provides database operations for Image model.
+"""
+from app.crud.base import CRUDBase
+from app.models.image import Image
+from app.schemas.image import ImageCreate, ImageUpdate
+
+
+class CRUDImage(CRUDBase[Image, ImageCreate, ImageUpdate]):
+    """
+    CRUD operations for Image
+    """
+    natural_key = "src"
+
+
+image = CRUDImage(Image)
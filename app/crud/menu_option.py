@@ -0,0 +1,20 @@
+"""
+CRUD operations for MenuOption.
+
+This module provides database operations for MenuOption model.
+"""
+from app.crud.base import CRUDBase
+from app.models.menu_option import MenuOption
+from app.schemas.menu_option import MenuOptionCreate, MenuOptionUpdate
+
+
+class CRUDMenuOption(CRUDBase[MenuOption, MenuOptionCreate, MenuOptionUpdate]):
+    """
+    CRUD operations for MenuOption
+    """
+    filterable = ("id", "type")
+    sortable = ("id", "type")
+    field_columns = {"items": "_items"}
+
+
+menu_option = CRUDMenuOption(MenuOption)
@@ -0,0 +1,19 @@
+"""
+CRUD operations for Option.
+
+This module provides database operations for Option model.
+"""
+from app.crud.base import CRUDBase
+from app.models.option import Option
+from app.schemas.option import OptionCreate, OptionUpdate
+
+
+class CRUDOption(CRUDBase[Option, OptionCreate, OptionUpdate]):
+    """
+    CRUD operations for Option
+    """
+    filterable = ("id", "name")
+    sortable = ("id", "name")
+
+
+option = CRUDOption(Option)
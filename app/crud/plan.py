@@ -0,0 +1,19 @@
+"""
+CRUD operations for Plan.
+
+This module provides database operations for Plan model.
+"""
+from app.crud.base import CRUDBase
+from app.models.plan import Plan
+from app.schemas.plan import PlanCreate, PlanUpdate
+
+
+class CRUDPlan(CRUDBase[Plan, PlanCreate, PlanUpdate]):
+    """
+    CRUD operations for Plan
+    """
+    filterable = ("id", "title", "price")
+    sortable = ("id", "title", "price")
+
+
+plan = CRUDPlan(Plan)
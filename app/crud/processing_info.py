@@ -5,7 +5,8 @@ This module provides database operations for ProcessingInfo model.
 """
 from typing import List, Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.base import CRUDBase
 from app.models.processing_info import ProcessingInfo
@@ -16,8 +17,11 @@ class CRUDProcessingInfo(CRUDBase[ProcessingInfo, ProcessingInfoCreate, Processi
     """
     CRUD operations for ProcessingInfo
     """
+    filterable = ("id", "title", "pricing")
+    sortable = ("id", "title")
+    natural_key = "title"
     
-    def get_by_title(self, db: Session, *, title: str) -> Optional[ProcessingInfo]:
+    async def get_by_title(self, db: AsyncSession, *, title: str) -> Optional[ProcessingInfo]:
         """
         Get ProcessingInfo by title
         
@@ -28,9 +32,9 @@ class CRUDProcessingInfo(CRUDBase[ProcessingInfo, ProcessingInfoCreate, Processi
         Returns:
             ProcessingInfo object if found, None otherwise
         """
-        return db.query(self.model).filter(self.model.title == title).first()
+        return await db.scalar(select(self.model).where(self.model.title == title).limit(1))
     
-    def get_multi_by_pricing(self, db: Session, *, pricing: str, skip: int = 0, limit: int = 100) -> List[ProcessingInfo]:
+    async def get_multi_by_pricing(self, db: AsyncSession, *, pricing: str, skip: int = 0, limit: int = 100) -> List[ProcessingInfo]:
         """
         Get ProcessingInfo items by pricing
         
@@ -43,7 +47,7 @@ class CRUDProcessingInfo(CRUDBase[ProcessingInfo, ProcessingInfoCreate, Processi
         Returns:
             List of ProcessingInfo objects matching the pricing
         """
-        return db.query(self.model).filter(self.model.pricing == pricing).offset(skip).limit(limit).all()
+        return await self._all(db, select(self.model).where(self.model.pricing == pricing).offset(skip).limit(limit))
 
 
 processing_info = CRUDProcessingInfo(ProcessingInfo) 
\ No newline at end of file
@@ -3,9 +3,10 @@ CRUD operations for SolutionsData.
 
 This module provides database operations for SolutionsData model.
 """
-from typing import List, Optional
+from typing import List, Optional, Sequence
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.base import CRUDBase
 from app.models.solutions_data import SolutionsData
@@ -16,8 +17,14 @@ class CRUDSolutionsData(CRUDBase[SolutionsData, SolutionsDataCreate, SolutionsDa
     """
     CRUD operations for SolutionsData
     """
+    filterable = ("id", "title", "pricing")
+    sortable = ("id", "title")
+    natural_key = "title"
+    field_attributes = {"img": "image"}
+    # Solutions each have their own image, joined to the page query
+    expandable = {"img": "joined"}
     
-    def get_by_title(self, db: Session, *, title: str) -> Optional[SolutionsData]:
+    async def get_by_title(self, db: AsyncSession, *, title: str) -> Optional[SolutionsData]:
         """
         Get SolutionsData by title
         
@@ -28,9 +35,9 @@ class CRUDSolutionsData(CRUDBase[SolutionsData, SolutionsDataCreate, SolutionsDa
         Returns:
             SolutionsData object if found, None otherwise
         """
-        return db.query(self.model).filter(self.model.title == title).first()
+        return await db.scalar(select(self.model).where(self.model.title == title).limit(1))
     
-    def get_multi_by_pricing(self, db: Session, *, pricing: str, skip: int = 0, limit: int = 100) -> List[SolutionsData]:
+    async def get_multi_by_pricing(self, db: AsyncSession, *, pricing: str, skip: int = 0, limit: int = 100) -> List[SolutionsData]:
         """
         Get SolutionsData items by pricing
         
@@ -43,36 +50,23 @@ class CRUDSolutionsData(CRUDBase[SolutionsData, SolutionsDataCreate, SolutionsDa
         Returns:
             List of SolutionsData objects matching the pricing
         """
-        return db.query(self.model).filter(self.model.pricing == pricing).offset(skip).limit(limit).all()
+        return await self._all(db, select(self.model).where(self.model.pricing == pricing).offset(skip).limit(limit))
     
-    def get_with_image(self, db: Session, *, id: int) -> Optional[SolutionsData]:
+    async def get_with_image(
+        self, db: AsyncSession, *, id: int, fields: Optional[Sequence[str]] = None
+    ) -> Optional[SolutionsData]:
         """
         Get SolutionsData including the image relationship
         
         Args:
             db: Database session
             id: ID of the record to get
+            fields: Schema fields to load, every column if None
             
         Returns:
             SolutionsData object with loaded image if found, None otherwise
         """
-        # Use joinedload to eagerly load the image relationship
-        return db.query(self.model).options(joinedload(self.model.image)).filter(self.model.id == id).first()
-    
-    def get_multi(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[SolutionsData]:
-        """
-        Get multiple SolutionsData records with images preloaded
-        
-        Args:
-            db: Database session
-            skip: Number of records to skip
-            limit: Maximum number of records to return
-            
-        Returns:
-            List of SolutionsData objects with preloaded images
-        """
-        # Override base method to eager load image relationships
-        return db.query(self.model).options(joinedload(self.model.image)).offset(skip).limit(limit).all()
+        return await self.get(db, id, fields=fields, expand=("img",))
 
 
-solutions_data = CRUDSolutionsData(SolutionsData) 
\ No newline at end of file
+solutions_data = CRUDSolutionsData(SolutionsData)
@@ -1,6 +1,7 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.base import CRUDBase
 from app.models.type import Type
@@ -11,8 +12,15 @@ class CRUDType(CRUDBase[Type, TypeCreate, TypeUpdate]):
     """
     CRUD operations for Type
     """
+    filterable = ("id", "title")
+    sortable = ("id", "title")
+    natural_key = "title"
+    field_attributes = {"img": "image"}
+    field_columns = {"features": "_features"}
+    # Types share a few images, each loaded once by a second query
+    expandable = {"img": "selectin"}
     
-    def get_by_title(self, db: Session, *, title: str) -> Optional[Type]:
+    async def get_by_title(self, db: AsyncSession, *, title: str) -> Optional[Type]:
         """
         Get Type by title
         
@@ -23,10 +31,10 @@ class CRUDType(CRUDBase[Type, TypeCreate, TypeUpdate]):
         Returns:
             Type object if found, None otherwise
         """
-        return db.query(self.model).filter(self.model.title == title).first()
+        return await db.scalar(select(self.model).where(self.model.title == title).limit(1))
     
-    def create_with_features(
-        self, db: Session, *, obj_in: TypeCreate
+    async def create_with_features(
+        self, db: AsyncSession, *, obj_in: TypeCreate
     ) -> Type:
         """
         Create a new Type with features list
@@ -38,19 +46,10 @@ class CRUDType(CRUDBase[Type, TypeCreate, TypeUpdate]):
         Returns:
             Created Type object
         """
-        db_obj = self.model(
-            title=obj_in.title,
-            description=obj_in.description,
-            features=obj_in.features,
-            img_id=obj_in.img_id
-        )
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        return await self.create(db, obj_in=obj_in)
     
-    def update(
-        self, db: Session, *, db_obj: Type, obj_in: TypeUpdate
+    async def update(
+        self, db: AsyncSession, *, db_obj: Type, obj_in: TypeUpdate, commit: bool = True
     ) -> Type:
         """
         Update Type object
@@ -59,6 +58,7 @@ class CRUDType(CRUDBase[Type, TypeCreate, TypeUpdate]):
             db: Database session
             db_obj: Existing Type object to update
             obj_in: Update data
+            commit: Whether to commit, or only flush
             
         Returns:
             Updated Type object
@@ -66,37 +66,25 @@ class CRUDType(CRUDBase[Type, TypeCreate, TypeUpdate]):
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
-            update_data = obj_in.dict(exclude_unset=True)
+            update_data = obj_in.model_dump(exclude_unset=True)
             
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        return await super().update(db, db_obj=db_obj, obj_in=update_data, commit=commit)
     
-    def get_with_image(self, db: Session, *, id: int) -> Optional[Type]:
+    async def get_with_image(
+        self, db: AsyncSession, *, id: int, fields: Optional[Sequence[str]] = None
+    ) -> Optional[Type]:
         """
         Get Type including the image relationship
         
         Args:
             db: Database session
             id: ID of the Type to retrieve
+            fields: Schema fields to load, every column if None
             
         Returns:
             Type object with loaded image if found, None otherwise
         """
-        return db.query(self.model).options(joinedload(self.model.image)).filter(self.model.id == id).first()
-    
-    def get_multi(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[Type]:
-        """
-        Get multiple Type records with images preloaded
-        
-        Args:
-            db: Database session
-            skip: Number of records to skip
-            limit: Maximum number of records to return
-            
-        Returns:
-            List of Type objects with preloaded images
-        """
-        # Override base method to eager load image relationships
-        return db.query(self.model).options(joinedload(self.model.image)).offset(skip).limit(limit).all()
+        return await self.get(db, id, fields=fields, expand=("img",))
 
 
-type = CRUDType(Type) 
\ No newline at end of file
+type = CRUDType(Type)
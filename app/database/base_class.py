@@ -19,6 +19,7 @@ from app.models.plan import Plan
 from app.models.type import Type
 from app.models.processing_info import ProcessingInfo
 from app.models.solutions_data import SolutionsData
+from app.models.idempotency_key import IdempotencyKey
 
 # Export Base only
 __all__ = ["Base"] 
\ No newline at end of file
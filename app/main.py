@@ -3,11 +3,16 @@ Main FastAPI application module.
 
 This module initializes the FastAPI application and includes all routers.
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
 
-from app.api.endpoints import category, image, faq, menu_option, option, plan, type, processing_info, solutions_data
+from app.api.endpoints import admin, batch, bundle, category, image, faq, menu_option, metrics, option, plan, type, processing_info, solutions_data
 from app.core.config import settings
+from app.core.fieldsets import InvalidFields
+from app.core.filtering import InvalidFilter
+from app.core.pagination import InvalidCursor
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -44,6 +49,51 @@ app.include_router(
 app.include_router(
     solutions_data.router, prefix=f"{settings.API_V1_STR}/solutions-data", tags=["solutions-data"]
 )
+app.include_router(
+    bundle.router, prefix=f"{settings.API_V1_STR}/bundles", tags=["bundles"]
+)
+app.include_router(
+    batch.router, prefix=f"{settings.API_V1_STR}/batch", tags=["batch"]
+)
+app.include_router(
+    admin.router, prefix=f"{settings.API_V1_STR}/admin", tags=["admin"]
+)
+app.include_router(metrics.router, tags=["metrics"])
+
+
+@app.exception_handler(InvalidCursor)
+@app.exception_handler(InvalidFilter)
+@app.exception_handler(InvalidFields)
+async def invalid_list_query_handler(request: Request, exc: ValueError) -> JSONResponse:
+    """
+    Answer requests with an invalid cursor, filter, sort order or fieldset.
+    
+    Args:
+        request: Incoming request
+        exc: Error raised while reading the parameters
+        
+    Returns:
+        400 Bad Request response
+    """
+    return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)})
+
+
+@app.exception_handler(IntegrityError)
+async def integrity_error_handler(request: Request, exc: IntegrityError) -> JSONResponse:
+    """
+    Answer writes rejected by a constraint, such as a duplicate natural key.
+    
+    Args:
+        request: Incoming request
+        exc: Error raised by the database
+        
+    Returns:
+        409 Conflict response
+    """
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": "Conflicts with an existing record"},
+    )
 
 
 def custom_openapi():
@@ -20,5 +20,5 @@ class FAQ(Base):
     __tablename__ = "faqs"
 
     id = Column(Integer, primary_key=True, index=True)
-    question = Column(String(255), nullable=False, index=True)
+    question = Column(String(255), nullable=False, index=True, unique=True)
     answer = Column(Text, nullable=False) 
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""
+Idempotency key model module.
+
+This module defines the model storing the responses of POST requests sent with
+an Idempotency-Key header, so that retries of a request are answered with its
+first response.
+"""
+from sqlalchemy import Column, Integer, LargeBinary, SmallInteger, String
+
+from app.database.base import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Idempotency key database model.
+    
+    Attributes:
+        id: SHA-256 digest of the route path and the key sent by the client
+        fingerprint: SHA-256 digest of the method, URL and body of the request
+        status_code: Status of the stored response, None while the request runs
+        response: Compressed response, None while the request runs
+        expires_at: Unix time after which the key may be reused
+    """
+    __tablename__ = "idempotency_keys"
+    
+    id = Column(String(64), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(SmallInteger, nullable=True)
+    response = Column(LargeBinary(2 ** 24), nullable=True)
+    expires_at = Column(Integer, nullable=False, index=True)
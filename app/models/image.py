@@ -20,7 +20,7 @@ class Image(Base):
     __tablename__ = "images"
 
     id = Column(Integer, primary_key=True, index=True)
-    src = Column(String(512), nullable=False)
+    src = Column(String(512), nullable=False, index=True, unique=True)
     
     # Relationships - defined with consistent structure
     types = relationship("Type", back_populates="image", cascade="all, delete-orphan") 
@@ -25,6 +25,6 @@ class Plan(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(100), nullable=False, index=True)
     description = Column(Text, nullable=False)
-    price = Column(Numeric(precision=10, scale=2), nullable=False)
+    price = Column(Numeric(precision=10, scale=2), nullable=False, index=True)
     btnMessage = Column(String(255), nullable=False)
     blueBtn = Column(Boolean, default=False) 
\ No newline at end of file
@@ -21,6 +21,6 @@ class ProcessingInfo(Base):
     __tablename__ = "processing_info"
 
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String(100), nullable=False, index=True)
+    title = Column(String(100), nullable=False, index=True, unique=True)
     description = Column(Text, nullable=True)
-    pricing = Column(String(100), nullable=True) 
\ No newline at end of file
+    pricing = Column(String(100), nullable=True, index=True) 
\ No newline at end of file
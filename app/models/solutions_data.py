@@ -22,9 +22,9 @@ class SolutionsData(Base):
     __tablename__ = "solutions_data"
 
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String(100), nullable=False, index=True)
+    title = Column(String(100), nullable=False, index=True, unique=True)
     img_id = Column(Integer, ForeignKey("images.id"), nullable=True)
-    pricing = Column(String(100), nullable=True)
+    pricing = Column(String(100), nullable=True, index=True)
     
     # Define relationship with proper back_populates using explicit foreign_keys
     image = relationship("Image", back_populates="solutions", foreign_keys=[img_id])
@@ -28,7 +28,7 @@ class Type(Base):
     __tablename__ = "types"
 
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String(255), nullable=False, index=True)
+    title = Column(String(255), nullable=False, index=True, unique=True)
     description = Column(Text, nullable=True)
     _features = Column("features", Text, nullable=True)
     img_id = Column(Integer, ForeignKey("images.id"), nullable=True)
@@ -0,0 +1,85 @@
+"""
+Batch schema module.
+
+This module defines Pydantic models for the atomic batch endpoint.
+"""
+from typing import Any, Dict, List, Literal, Optional, Union
+
+from pydantic import BaseModel, Field, model_validator
+
+from app.core.config import settings
+
+
+class BatchOperation(BaseModel):
+    """
+    Schema for one operation of a batch.
+    
+    The id and any value of the data may be a reference to the result of
+    an earlier operation of the batch, such as ``"$op0.id"``.
+    
+    Attributes:
+        op: Kind of write
+        resource: Resource written, named after the path of its router
+        id: ID of the record to update or delete
+        data: Fields of the record to create, or to set on the record to update
+    """
+    op: Literal["create", "update", "delete"] = Field(..., description="Kind of write")
+    resource: str = Field(..., description="Resource, e.g. types or solutions-data")
+    id: Optional[Union[int, str]] = Field(None, description="Record ID, or a reference")
+    data: Optional[Dict[str, Any]] = Field(None, description="Record fields")
+    
+    @model_validator(mode="after")
+    def check_fields(self) -> "BatchOperation":
+        """
+        Check that the operation gives the fields its kind needs.
+        
+        Returns:
+            Validated operation
+            
+        Raises:
+            ValueError: If a create gives an id, an update or delete no id,
+                or a delete data
+        """
+        if (self.op == "create") == (self.id is not None):
+            raise ValueError("Creates take no id" if self.op == "create" else f"{self.op} needs an id")
+        if self.op == "delete" and self.data is not None:
+            raise ValueError("Deletes take no data")
+        if self.op != "delete" and self.data is None:
+            raise ValueError(f"{self.op} needs data")
+        return self
+
+
+class BatchRequest(BaseModel):
+    """
+    Schema for a batch of operations, run in order in one transaction.
+    
+    Attributes:
+        operations: Operations to run
+    """
+    operations: List[BatchOperation] = Field(
+        ..., description="Operations", min_length=1, max_length=settings.BATCH_MAX_OPERATIONS
+    )
+
+
+class BatchResult(BaseModel):
+    """
+    Schema for the result of one operation of a batch.
+    
+    Attributes:
+        status: Status code the operation would get from its own endpoint
+        id: ID of the record written
+        data: Fields of the created or updated record, without relationships
+    """
+    status: int = Field(..., description="Status code")
+    id: int = Field(..., description="Record ID")
+    data: Optional[Dict[str, Any]] = Field(None, description="Record fields")
+
+
+class BatchResponse(BaseModel):
+    """
+    Schema for the response of a batch.
+    
+    Attributes:
+        results: Result of each operation, in order
+    """
+    results: List[BatchResult] = Field(..., description="Results")
@@ -0,0 +1,84 @@
+"""
+Bulk schema module.
+
+This module defines Pydantic models shared by the bulk endpoints.
+"""
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel, Field, model_validator
+
+from app.core.config import settings
+
+UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
+
+
+class BulkCreated(BaseModel):
+    """
+    Schema for the response of a bulk create.
+    
+    Attributes:
+        ids: IDs of the created records, in the order of the payload
+    """
+    ids: List[int] = Field(..., description="IDs of the created records")
+
+
+class BulkUpdateItem(BaseModel, Generic[UpdateSchemaType]):
+    """
+    Schema for the new values of one record in a bulk update.
+    
+    Attributes:
+        id: ID of the record to update
+        values: Fields to set on the record
+    """
+    id: int = Field(..., description="Record ID")
+    values: UpdateSchemaType = Field(..., description="Fields to set")
+
+
+class BulkUpdate(BaseModel, Generic[UpdateSchemaType]):
+    """
+    Schema for a bulk update.
+    
+    Either ``values`` are set on every record matching ``ids`` and the
+    filters of the request, or each record of ``items`` gets its own values.
+    
+    Attributes:
+        ids: IDs of the records to update, every record matching the filters if None
+        values: Fields to set on every record
+        items: Records to update, each with its own values
+    """
+    ids: Optional[List[int]] = Field(
+        None, description="Record IDs", min_length=1, max_length=settings.BULK_MAX_ITEMS
+    )
+    values: Optional[UpdateSchemaType] = Field(None, description="Fields to set on every record")
+    items: Optional[List[BulkUpdateItem[UpdateSchemaType]]] = Field(
+        None, description="Records with their own values", min_length=1,
+        max_length=settings.BULK_MAX_ITEMS,
+    )
+    
+    @model_validator(mode="after")
+    def check_mode(self) -> "BulkUpdate":
+        """
+        Check that the update gives either values or items.
+        
+        Returns:
+            Validated update
+            
+        Raises:
+            ValueError: If both or neither of values and items are given,
+                or ids are given with items
+        """
+        if (self.values is None) == (self.items is None):
+            raise ValueError("Give either values or items")
+        if self.items is not None and self.ids is not None:
+            raise ValueError("Items already hold their ids")
+        return self
+
+
+class BulkAffected(BaseModel):
+    """
+    Schema for the response of a bulk update or delete.
+    
+    Attributes:
+        affected: Number of records updated or deleted
+    """
+    affected: int = Field(..., description="Number of records affected")
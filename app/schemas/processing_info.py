@@ -58,4 +58,5 @@ class ProcessingInfoInDB(ProcessingInfoInDBBase):
 class ProcessingInfoList(BaseModel):
     """Schema for returning a list of processing information items"""
     items: List[ProcessingInfoSchema]
-    count: int 
\ No newline at end of file
+    count: Optional[int]
+    next_cursor: Optional[str] = None 
\ No newline at end of file
@@ -60,4 +60,5 @@ class SolutionsDataInDB(SolutionsDataInDBBase):
 class SolutionsDataList(BaseModel):
     """Schema for returning a list of solutions data items"""
     items: List[SolutionsDataSchema]
-    count: int 
\ No newline at end of file
+    count: Optional[int]
+    next_cursor: Optional[str] = None 
\ No newline at end of file
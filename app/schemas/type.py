@@ -62,4 +62,5 @@ class TypeInDB(TypeInDBBase):
 class TypeList(BaseModel):
     """Schema for returning a list of service types"""
     types: List[TypeSchema]
-    count: int 
\ No newline at end of file
+    count: Optional[int]
+    next_cursor: Optional[str] = None
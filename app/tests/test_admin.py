@@ -0,0 +1,117 @@
+"""
+Tests for the admin API endpoints.
+
+This module contains tests for the cache stats and flush endpoints.
+"""
+import pytest
+
+from app.core.cache import caches
+from app.core.config import settings
+from app.tests.test_category import client, test_db  # reuse test setup
+
+HEADERS = {"X-Admin-Token": "secret"}
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    """Enable the admin API."""
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+
+
+def _create_plan(title: str = "Plan") -> dict:
+    response = client.post(
+        "/api/plans/",
+        json={"title": title, "description": "Plan", "price": 19.99, "btnMessage": "Buy"},
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def _stats() -> dict:
+    response = client.get("/api/admin/cache/stats", headers=HEADERS)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_admin_requires_token(test_db, monkeypatch):
+    """Test that the admin API is closed without a configured and matching token."""
+    assert client.get("/api/admin/cache/stats", headers=HEADERS).status_code == 403
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    assert client.get("/api/admin/cache/stats").status_code == 403
+    assert client.post("/api/admin/cache/flush", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/api/admin/cache/stats", headers=HEADERS).status_code == 200
+
+
+def test_stats_report_caches_and_routers(test_db, admin_token):
+    """Test that stats cover every cache and the GET traffic of each router."""
+    plan = _create_plan()
+    before = _stats()["routers"].get("plans", {"requests": 0, "cache_hits": 0})
+    client.get(f"/api/plans/{plan['id']}")
+    client.get(f"/api/plans/{plan['id']}")
+    stats = _stats()
+    
+    assert set(caches) <= set(stats["caches"])
+    plans = stats["caches"]["plans"]
+    assert plans["entries"] == 1
+    assert plans["bytes"] > 0
+    assert plans["age_seconds"]["+Inf"] == 1
+    assert "l2_hits" in stats["caches"]["responses"]
+    router = stats["routers"]["plans"]
+    assert router["requests"] - before["requests"] == 2
+    assert router["cache_hits"] - before["cache_hits"] == 1
+    assert stats["backend"] == {"type": "MemoryBackend", "shared": False}
+
+
+def test_flush_table_and_id(test_db, admin_token):
+    """Test that flushing a table or a row drops its entries and cached responses."""
+    first, second = _create_plan("First"), _create_plan("Second")
+    for plan in (first, second):
+        client.get(f"/api/plans/{plan['id']}")
+    etag = client.get(f"/api/plans/{first['id']}").headers["etag"]
+    
+    response = client.post(
+        "/api/admin/cache/flush", params={"table": "plans", "id": first["id"]}, headers=HEADERS
+    )
+    assert response.json() == {"removed": 1}
+    assert len(caches["plans"]) == 1
+    assert client.get(f"/api/plans/{first['id']}").headers["etag"] != etag
+    
+    response = client.post("/api/admin/cache/flush", params={"table": "plans"}, headers=HEADERS)
+    assert response.status_code == 200
+    assert len(caches["plans"]) == 0
+
+
+def test_flush_prefix_and_everything(test_db, admin_token):
+    """Test flushing entries by key prefix, and every entry at once."""
+    _create_plan()
+    assert client.get("/api/bundles/", params={"views": "plans"}).status_code == 200
+    assert client.get("/api/plans/").status_code == 200
+    
+    response = client.post("/api/admin/cache/flush", params={"prefix": "bundle:"}, headers=HEADERS)
+    assert response.json()["removed"] >= 1
+    assert not [key for key in caches["responses"]._data if key.startswith("bundle:")]
+    assert len(caches["responses"]) > 0
+    
+    response = client.post("/api/admin/cache/flush", headers=HEADERS)
+    assert response.json()["removed"] > 0
+    assert all(len(cache) == 0 for cache in caches.values())
+
+
+def test_flush_rejects_invalid_parameters(test_db, admin_token):
+    """Test flush parameter validation."""
+    flush = "/api/admin/cache/flush"
+    assert client.post(flush, params={"id": 1}, headers=HEADERS).status_code == 400
+    assert client.post(flush, params={"table": "plans", "prefix": "a"}, headers=HEADERS).status_code == 400
+    assert client.post(flush, params={"table": "missing"}, headers=HEADERS).status_code == 404
+
+
+def test_metrics_export_cache_stats(test_db):
+    """Test that the metrics endpoint exposes the cache stats."""
+    plan = _create_plan()
+    client.get(f"/api/plans/{plan['id']}")
+    client.get(f"/api/plans/{plan['id']}")
+    text = client.get("/metrics").text
+    assert 'resivate_cache_entries{cache="plans"} 1' in text
+    assert 'resivate_cache_hits_total{cache="plans"}' in text
+    assert 'resivate_cache_entry_age_seconds{cache="plans",le="+Inf"} 1' in text
+    assert 'resivate_cache_l2_misses_total{cache="responses"}' in text
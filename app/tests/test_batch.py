@@ -0,0 +1,121 @@
+"""
+Tests for the atomic batch endpoint.
+
+This module contains tests for running several writes in one request.
+"""
+import pytest
+
+from app.tests.test_category import client, test_db  # reuse test setup
+
+
+def test_batch_creates_records_with_references(test_db):
+    """Test that a type can be created with a new image and updated in one batch."""
+    client.get("/api/types/")
+    response = client.post("/api/batch", json={"operations": [
+        {"op": "create", "resource": "images", "data": {"src": "web.png"}},
+        {"op": "create", "resource": "types", "data": {"title": "Web", "img_id": "$op0.id"}},
+        {"op": "update", "resource": "types", "id": "$op1.id", "data": {"features": ["Fast"]}},
+    ]})
+    assert response.status_code == 200
+    image, created, updated = response.json()["results"]
+    assert image == {"status": 201, "id": image["id"], "data": {"src": "web.png", "id": image["id"]}}
+    assert created["status"] == 201
+    assert created["data"]["img_id"] == image["id"]
+    assert updated == {
+        "status": 200,
+        "id": created["id"],
+        "data": {**created["data"], "features": ["Fast"]},
+    }
+    
+    # The commit invalidated the cached list
+    types = client.get("/api/types/", params={"expand": "img"}).json()
+    assert types == [{**updated["data"], "img": image["data"]}]
+
+
+def test_batch_deletes_and_reports_status(test_db):
+    """Test that deletes run before later operations, which may reuse their keys."""
+    faq_id = client.post("/api/faqs/", json={"question": "Q?", "answer": "A"}).json()["id"]
+    response = client.post("/api/batch", json={"operations": [
+        {"op": "delete", "resource": "faqs", "id": faq_id},
+        {"op": "create", "resource": "faqs", "data": {"question": "Q?", "answer": "B"}},
+    ]})
+    assert response.json()["results"][0] == {"status": 204, "id": faq_id, "data": None}
+    assert [faq["answer"] for faq in client.get("/api/faqs/").json()] == ["B"]
+
+
+def test_batch_update_refreshes_filtered_lists(test_db):
+    """Test that a batch update moves its record between cached filtered pages."""
+    plan = {"description": "Plan", "btnMessage": "Buy"}
+    client.post("/api/plans/", json={**plan, "title": "Basic", "price": 10})
+    pro = client.post("/api/plans/", json={**plan, "title": "Pro", "price": 100}).json()
+    params = {"filter[price][lte]": "50", "count": "exact"}
+    assert client.get("/api/plans/", params=params).headers["x-total-count"] == "1"
+    
+    response = client.post("/api/batch", json={"operations": [
+        {"op": "update", "resource": "plans", "id": pro["id"], "data": {"price": 20}},
+    ]})
+    assert response.json()["results"][0]["data"] == {**pro, "price": 20}
+    response = client.get("/api/plans/", params=params)
+    assert [item["title"] for item in response.json()] == ["Basic", "Pro"]
+    assert response.headers["x-total-count"] == "2"
+
+
+@pytest.mark.parametrize(
+    "operation, status_code, detail",
+    [
+        (
+            {"op": "create", "resource": "users", "data": {}},
+            400,
+            "Operation 1: Unknown resource users",
+        ),
+        (
+            {"op": "update", "resource": "images", "id": 999, "data": {}},
+            404,
+            "Operation 1: Record 999 of images not found",
+        ),
+        (
+            {"op": "create", "resource": "types", "data": {"title": "T", "img_id": "$op1.id"}},
+            400,
+            "Operation 1: $op1.id is not an earlier operation",
+        ),
+        (
+            {"op": "create", "resource": "types", "data": {"title": "T", "img_id": "$op0.alt"}},
+            400,
+            "Operation 1: $op0.alt is not a field of the result",
+        ),
+        (
+            {"op": "create", "resource": "images", "data": {"src": "taken.png"}},
+            409,
+            "Operation 1: Conflicts with an existing record",
+        ),
+    ],
+)
+def test_failed_operation_rolls_back_the_batch(test_db, operation, status_code, detail):
+    """Test that an operation that fails leaves no write of the batch behind."""
+    client.post("/api/images/", json={"src": "taken.png"})
+    response = client.post("/api/batch", json={"operations": [
+        {"op": "create", "resource": "images", "data": {"src": "new.png"}},
+        operation,
+    ]})
+    assert response.status_code == status_code
+    assert response.json() == {"detail": detail}
+    assert [image["src"] for image in client.get("/api/images/").json()] == ["taken.png"]
+
+
+def test_invalid_operations_are_rejected(test_db):
+    """Test that invalid data is located in the request body."""
+    response = client.post("/api/batch", json={"operations": [
+        {"op": "create", "resource": "images", "data": {"src": "a.png"}},
+        {"op": "create", "resource": "types", "data": {"img_id": "$op0.id"}},
+    ]})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "operations", 1, "data", "title"]
+    assert client.get("/api/images/").json() == []
+    
+    for operation in (
+        {"op": "create", "resource": "faqs", "id": 1, "data": {}},
+        {"op": "delete", "resource": "faqs"},
+        {"op": "update", "resource": "faqs", "id": 1},
+    ):
+        assert client.post("/api/batch", json={"operations": [operation]}).status_code == 422
+    assert client.post("/api/batch", json={"operations": []}).status_code == 422
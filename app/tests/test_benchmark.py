@@ -0,0 +1,22 @@
+"""
+Tests for the database stack benchmark.
+
+This module contains tests for benchmark.py.
+"""
+from benchmark import benchmark
+from app.tests.test_category import async_engine, client, engine, test_db  # reuse test setup
+
+
+def test_benchmark_measures_both_models(test_db):
+    """Test that both models answer every request."""
+    for title in ("First", "Second"):
+        client.post(
+            "/api/plans/",
+            json={"title": title, "description": "Plan", "price": 19.99, "btnMessage": "Buy"},
+        )
+    results = benchmark(engine, async_engine, requests=20, concurrency=5, threads=2)
+    assert [result.model for result in results] == ["threadpool", "async"]
+    for result in results:
+        assert (result.requests, result.errors) == (20, 0)
+        assert result.throughput > 0
+        assert result.p99 >= result.p50
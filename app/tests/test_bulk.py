@@ -0,0 +1,189 @@
+"""
+Tests for bulk writes.
+
+This module contains tests for the bulk create, update and delete endpoints.
+"""
+import pytest
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.tests.test_category import async_engine, client, test_db  # reuse test setup
+
+
+@pytest.fixture
+def statements():
+    """
+    Record the SQL statements executed against the test engine.
+    
+    Yields:
+        List of executed statements
+    """
+    executed = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def _plans(count: int) -> list:
+    return [
+        {"title": f"Plan {i}", "description": "Plan", "price": 10 + i, "btnMessage": "Buy"}
+        for i in range(count)
+    ]
+
+
+def test_bulk_create_returns_ids_in_payload_order(test_db, statements):
+    """Test that a bulk create inserts every row with one statement and no refresh."""
+    response = client.post("/api/plans/bulk", json=_plans(3))
+    assert response.status_code == 201
+    ids = response.json()["ids"]
+    assert len(set(ids)) == 3
+    assert [sql for sql in statements if sql.startswith("INSERT")] == [statements[0]]
+    assert not [sql for sql in statements if sql.startswith("SELECT")]
+    
+    titles = [client.get(f"/api/plans/{id}").json()["title"] for id in ids]
+    assert titles == ["Plan 0", "Plan 1", "Plan 2"]
+
+
+def test_bulk_create_commits_each_chunk(test_db, statements, monkeypatch):
+    """Test that payloads are inserted in chunks of BULK_CHUNK_SIZE rows."""
+    monkeypatch.setattr(settings, "BULK_CHUNK_SIZE", 2)
+    ids = client.post("/api/plans/bulk", json=_plans(5)).json()["ids"]
+    assert ids == sorted(ids)
+    assert len([sql for sql in statements if sql.startswith("INSERT")]) == 3
+    assert [plan["id"] for plan in client.get("/api/plans/").json()] == ids
+
+
+def test_bulk_create_invalidates_cached_lists(test_db):
+    """Test that cached pages, counts and negative lookups see the new rows."""
+    assert client.get("/api/faqs/", params={"count": "exact"}).headers["x-total-count"] == "0"
+    assert client.get("/api/faqs/1").status_code == 404
+    payload = [{"question": "Why?", "answer": "Because."}, {"question": "How?", "answer": "So."}]
+    ids = client.post("/api/faqs/bulk", json=payload).json()["ids"]
+    
+    response = client.get("/api/faqs/", params={"count": "exact"})
+    assert [faq["id"] for faq in response.json()] == ids
+    assert response.headers["x-total-count"] == "2"
+    assert client.get(f"/api/faqs/{ids[0]}").status_code == 200
+
+
+def test_bulk_create_converts_json_columns(test_db):
+    """Test that list fields are stored as JSON, as by single creates."""
+    ids = client.post(
+        "/api/types/bulk", json=[{"title": "Web", "features": ["Fast"]}, {"title": "App"}]
+    ).json()["ids"]
+    assert client.get(f"/api/types/{ids[0]}").json()["features"] == ["Fast"]
+    assert client.get(f"/api/types/{ids[1]}").json()["features"] == []
+    
+    payload = [{"title": "Menu", "type": "list", "items": ["Home", {"label": "About"}]}]
+    ids = client.post("/api/menu-options/bulk", json=payload).json()["ids"]
+    assert client.get(f"/api/menu-options/{ids[0]}").json()["items"] == payload[0]["items"]
+
+
+@pytest.mark.parametrize("payload", [[], [{"question": "Why?"}], {"question": "Why?"}])
+def test_invalid_payloads_create_nothing(test_db, payload):
+    """Test that empty lists and invalid records are rejected before any insert."""
+    assert client.post("/api/faqs/bulk", json=payload).status_code == 422
+    assert client.get("/api/faqs/").json() == []
+
+
+def _writes(statements: list, verb: str) -> list:
+    return [sql for sql in statements if sql.startswith(verb)]
+
+
+def test_bulk_update_sets_values_with_one_statement(test_db, statements):
+    """Test that shared values are set by ids with one UPDATE, invalidating cached rows."""
+    ids = client.post("/api/plans/bulk", json=_plans(3)).json()["ids"]
+    assert client.get(f"/api/plans/{ids[0]}").json()["price"] == 10
+    statements.clear()
+    body = {"ids": ids[:2] + [999], "values": {"price": 5}}
+    response = client.patch("/api/plans/bulk", json=body)
+    assert response.status_code == 200
+    assert response.json() == {"affected": 2}
+    assert len(_writes(statements, "UPDATE")) == 1
+    assert [plan["price"] for plan in client.get("/api/plans/").json()] == [5, 5, 12]
+    assert client.get(f"/api/plans/{ids[0]}").json()["price"] == 5
+
+
+def test_bulk_update_items_use_case(test_db, statements, monkeypatch):
+    """Test that per-record values are set with a CASE on the id, by chunks."""
+    monkeypatch.setattr(settings, "BULK_CHUNK_SIZE", 2)
+    ids = client.post("/api/plans/bulk", json=_plans(3)).json()["ids"]
+    statements.clear()
+    items = [
+        {"id": ids[0], "values": {"title": "First", "price": 1}},
+        {"id": ids[1], "values": {"title": "Second", "price": 1}},
+        {"id": ids[2], "values": {"price": 3}},
+    ]
+    assert client.patch("/api/plans/bulk", json={"items": items}).json() == {"affected": 3}
+    updates = _writes(statements, "UPDATE")
+    assert len(updates) == 2 and "CASE" in updates[0]
+    plans = client.get("/api/plans/").json()
+    assert [(plan["title"], plan["price"]) for plan in plans] == [
+        ("First", 1), ("Second", 1), ("Plan 2", 3)
+    ]
+
+
+def test_bulk_writes_by_filter(test_db):
+    """Test bulk updates and deletes of the records matching filters."""
+    client.post("/api/plans/bulk", json=_plans(4))
+    params = {"filter[price][gte]": "12"}
+    response = client.patch("/api/plans/bulk", params=params, json={"values": {"blueBtn": True}})
+    assert response.json() == {"affected": 2}
+    plans = client.get("/api/plans/").json()
+    assert [plan["blueBtn"] for plan in plans] == [False, False, True, True]
+    
+    assert client.delete("/api/plans/bulk", params=params).json() == {"affected": 2}
+    response = client.get("/api/plans/", params={"count": "exact"})
+    assert [plan["price"] for plan in response.json()] == [10, 11]
+    assert response.headers["x-total-count"] == "2"
+
+
+def test_bulk_delete_by_ids(test_db, statements):
+    """Test that a bulk delete runs one DELETE and updates counts and lookups."""
+    payload = [{"question": f"Q{i}", "answer": "A"} for i in range(3)]
+    ids = client.post("/api/faqs/bulk", json=payload).json()["ids"]
+    assert client.get("/api/faqs/", params={"count": "exact"}).headers["x-total-count"] == "3"
+    statements.clear()
+    response = client.delete("/api/faqs/bulk", params={"ids": f"{ids[0]},{ids[2]},999"})
+    assert response.json() == {"affected": 2}
+    assert len(_writes(statements, "DELETE")) == 1
+    assert client.get(f"/api/faqs/{ids[0]}").status_code == 404
+    response = client.get("/api/faqs/", params={"count": "exact"})
+    assert [faq["id"] for faq in response.json()] == [ids[1]]
+    assert response.headers["x-total-count"] == "1"
+
+
+def test_bulk_delete_cascades(test_db):
+    """Test that deleting images deletes the records using them, as single deletes do."""
+    image_id = client.post("/api/images/", json={"src": "a.png"}).json()["id"]
+    type_id = client.post("/api/types/", json={"title": "Web", "img_id": image_id}).json()["id"]
+    client.post("/api/types/", json={"title": "App"})
+    response = client.delete("/api/images/bulk", params={"ids": str(image_id)})
+    assert response.json() == {"affected": 1}
+    assert client.get(f"/api/types/{type_id}").status_code == 404
+    assert [item["title"] for item in client.get("/api/types/").json()] == ["App"]
+
+
+@pytest.mark.parametrize(
+    "body, status_code",
+    [
+        ({"values": {"answer": "A"}}, 400),
+        ({"ids": [1]}, 422),
+        ({"values": {"answer": "A"}, "items": [{"id": 1, "values": {}}]}, 422),
+        ({"ids": [1], "items": [{"id": 1, "values": {}}]}, 422),
+    ],
+)
+def test_invalid_bulk_updates_are_rejected(test_db, body, status_code):
+    """Test that bulk updates need either values or items, and ids or filters."""
+    assert client.patch("/api/faqs/bulk", json=body).status_code == status_code
+
+
+def test_bulk_delete_needs_ids_or_filters(test_db):
+    """Test that a bulk delete without ids or filters deletes nothing."""
+    client.post("/api/faqs/", json={"question": "Q", "answer": "A"})
+    assert client.delete("/api/faqs/bulk").status_code == 400
+    assert len(client.get("/api/faqs/").json()) == 1
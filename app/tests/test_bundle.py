@@ -0,0 +1,99 @@
+"""
+Tests for the bundle API.
+
+This module contains tests for the bundle endpoints.
+"""
+import pytest
+from sqlalchemy import event
+
+from app.tests.test_category import async_engine, client, test_db  # reuse test setup
+
+
+@pytest.fixture
+def statements():
+    """
+    Record the SQL statements executed against the test engine.
+    
+    Yields:
+        List of executed statements
+    """
+    executed = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def _seed():
+    image = client.post("/api/images/", json={"src": "https://example.com/image.jpg"}).json()
+    client.post("/api/categories/", json={"title": "Category", "description": "Category"})
+    client.post(
+        "/api/plans/",
+        json={"title": "Plan", "description": "Plan", "price": 19.99, "btnMessage": "Buy"},
+    )
+    client.post(
+        "/api/types/",
+        json={"title": "Type", "description": "Type", "features": ["Fast"], "img_id": image["id"]},
+    )
+    client.post("/api/faqs/", json={"question": "Why?", "answer": "Because."})
+
+
+def test_landing_bundle_matches_list_endpoints(test_db):
+    """Test that the configured bundle holds every landing page list."""
+    _seed()
+    response = client.get("/api/bundles/landing")
+    assert response.status_code == 200
+    bundle = response.json()
+    assert list(bundle) == [
+        "categories",
+        "plans",
+        "types",
+        "faqs",
+        "options",
+        "menu-options",
+        "processing-info",
+        "solutions-data",
+    ]
+    assert bundle["plans"] == client.get("/api/plans/").json()
+    assert bundle["types"] == client.get("/api/types/", params={"expand": "img"}).json()
+    assert bundle["types"][0]["img"]["src"] == "https://example.com/image.jpg"
+    assert bundle["options"] == []
+
+
+def test_bundle_is_cached_per_table(test_db, statements):
+    """Test that only writes to tables behind a bundle rebuild it."""
+    _seed()
+    first = client.get("/api/bundles/?views=plans,types")
+    statements.clear()
+    
+    client.post("/api/faqs/", json={"question": "How?", "answer": "Like this."})
+    statements.clear()
+    second = client.get("/api/bundles/?views=plans,types")
+    assert statements == []
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.content == first.content
+    
+    client.put("/api/images/1", json={"src": "https://example.com/other.jpg"})
+    statements.clear()
+    third = client.get("/api/bundles/?views=plans,types")
+    assert statements != []
+    assert third.headers["etag"] != first.headers["etag"]
+    assert third.json()["types"][0]["img"]["src"] == "https://example.com/other.jpg"
+
+
+def test_bundle_answers_if_none_match(test_db):
+    """Test that a matching If-None-Match is answered with 304."""
+    _seed()
+    etag = client.get("/api/bundles/landing").headers["etag"]
+    response = client.get("/api/bundles/landing", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_unknown_views_and_bundles(test_db):
+    """Test that unknown names are rejected."""
+    assert client.get("/api/bundles/?views=plans,nope").status_code == 400
+    assert client.get("/api/bundles/?views=,").status_code == 400
+    assert client.get("/api/bundles/nope").status_code == 404
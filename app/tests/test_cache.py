@@ -0,0 +1,195 @@
+"""
+Tests for the CRUD read cache.
+
+This module contains tests for the LRU cache and its integration with CRUDBase.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+from app.core import cache as cache_module
+from app.core.cache import LRUCache
+from app.crud.image import image as image_crud
+from app.crud.plan import plan as plan_crud
+from app.crud.type import type as type_crud
+from app.schemas.image import ImageCreate
+from app.schemas.plan import PlanCreate
+from app.schemas.type import TypeCreate
+from app.tests.test_category import TestingSessionLocal, async_engine, test_db  # reuse test setup
+
+
+@pytest.fixture
+def statements():
+    """
+    Record the SQL statements executed against the test engine.
+    
+    Yields:
+        List of executed statements
+    """
+    executed = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def _plan(title: str) -> PlanCreate:
+    return PlanCreate(title=title, description="Plan", price=10, btnMessage="Buy")
+
+
+def test_lru_evicts_least_recently_used():
+    """Test that the least recently used entry is evicted first."""
+    lru = LRUCache("test", maxsize=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    assert lru.evictions == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    """Test that entries are dropped once their TTL has elapsed."""
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    lru = LRUCache("test", ttl=10)
+    lru.set("a", 1)
+    now[0] += 9
+    assert lru.get("a") == 1
+    now[0] += 2
+    assert lru.get("a") is None
+    assert len(lru) == 0
+
+
+def test_invalidate_tags_and_generation_guard():
+    """Test tag invalidation and that stale loads are not stored."""
+    lru = LRUCache("test")
+    lru.set("detail", 1, tags=[("plans", 1)])
+    lru.set("page", [1, 2], tags=[("plans", 1), ("plans", 2)])
+    lru.set("other", 3, tags=[("plans", 3)])
+    generation = lru.generation
+    assert lru.invalidate_tags([("plans", 1)]) == 2
+    assert lru.get("other") == 3
+    assert lru.set("detail", 1, generation=generation) is False
+    assert lru.get("detail") is None
+
+
+def test_stats_report_usage_and_ages(monkeypatch):
+    """Test hit, miss and size accounting and the entry age buckets."""
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    lru = LRUCache("test", ttl=600)
+    lru.set("old", b"x" * 100)
+    now[0] += 10
+    lru.set("new", b"y" * 100)
+    lru.get("old")
+    lru.get("missing")
+    stats = lru.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 2)
+    assert stats["hit_rate"] == 0.5
+    assert stats["bytes"] >= 200
+    assert stats["age_seconds"]["1"] == 1
+    assert stats["age_seconds"]["15"] == 2
+    assert stats["age_seconds"]["+Inf"] == 2
+    lru.delete("old")
+    lru.delete("new")
+    assert lru.stats()["bytes"] == 0
+
+
+def test_invalidate_table_and_prefix():
+    """Test flushing the entries of a table and the entries under a key prefix."""
+    lru = LRUCache("test")
+    lru.set("detail", 1, tags=[("plans", 1)])
+    lru.set("page", [1], tags=[("plans", cache_module.ALL), ("plans", 1)])
+    lru.set("type", 2, tags=[("types", 1)])
+    lru.set("bundle:a", b"a")
+    assert lru.invalidate_table("plans") == 2
+    assert lru.get("type") == 2
+    assert lru.invalidate_prefix("bundle:") == 1
+    assert len(lru) == 1
+
+
+def test_get_is_served_from_cache(test_db, statements):
+    """Test that a repeated get does not hit the database."""
+    async def run() -> None:
+        async with TestingSessionLocal() as db:
+            plan_id = (await plan_crud.create(db, obj_in=_plan("Basic"))).id
+    
+        async with TestingSessionLocal() as db:
+            assert (await plan_crud.get(db, id=plan_id)).title == "Basic"
+        statements.clear()
+    
+        async with TestingSessionLocal() as db:
+            assert (await plan_crud.get(db, id=plan_id)).title == "Basic"
+        assert statements == []
+    
+    asyncio.run(run())
+
+
+def test_update_invalidates_only_affected_entries(test_db, statements):
+    """Test that an update drops its row and the list pages of its table, not other rows."""
+    async def run() -> None:
+        async with TestingSessionLocal() as db:
+            first_id = (await plan_crud.create(db, obj_in=_plan("First"))).id
+            second_id = (await plan_crud.create(db, obj_in=_plan("Second"))).id
+    
+        async with TestingSessionLocal() as db:
+            await plan_crud.get_multi(db, skip=0, limit=1)
+            await plan_crud.get_multi(db, skip=1, limit=1)
+            await plan_crud.get(db, id=first_id)
+            second = await plan_crud.get(db, id=second_id)
+            await plan_crud.update(db, db_obj=second, obj_in={"title": "Changed"})
+        statements.clear()
+    
+        async with TestingSessionLocal() as db:
+            assert (await plan_crud.get(db, id=first_id)).title == "First"
+            assert statements == []
+            # The row may have entered or left any filtered or sorted page
+            assert (await plan_crud.get_multi(db, skip=0, limit=1))[0].title == "First"
+            assert (await plan_crud.get_multi(db, skip=1, limit=1))[0].title == "Changed"
+            assert len(statements) == 2
+    
+    asyncio.run(run())
+
+
+def test_create_and_remove_invalidate_list_pages(test_db):
+    """Test that inserts and deletes refresh cached list pages."""
+    async def run() -> None:
+        async with TestingSessionLocal() as db:
+            plan_id = (await plan_crud.create(db, obj_in=_plan("First"))).id
+            assert len(await plan_crud.get_multi(db)) == 1
+            await plan_crud.create(db, obj_in=_plan("Second"))
+            assert len(await plan_crud.get_multi(db)) == 2
+            await plan_crud.remove(db, id=plan_id)
+            assert [plan.title for plan in await plan_crud.get_multi(db)] == ["Second"]
+            assert await plan_crud.get(db, id=plan_id) is None
+    
+    asyncio.run(run())
+
+
+def test_related_row_update_invalidates_eager_loaded_entries(test_db):
+    """Test that updating an image drops cached types that embed it."""
+    async def run() -> None:
+        async with TestingSessionLocal() as db:
+            image = await image_crud.create(db, obj_in=ImageCreate(src="https://example.com/a.jpg"))
+            type_obj = await type_crud.create_with_features(
+                db, obj_in=TypeCreate(title="Type", features=["A"], img_id=image.id)
+            )
+            type_id, image_id = type_obj.id, image.id
+    
+        async with TestingSessionLocal() as db:
+            type_obj = await type_crud.get_with_image(db, id=type_id)
+            assert type_obj.image.src == "https://example.com/a.jpg"
+            image = await image_crud.get(db, id=image_id)
+            await image_crud.update(db, db_obj=image, obj_in={"src": "https://example.com/b.jpg"})
+    
+        async with TestingSessionLocal() as db:
+            type_obj = await type_crud.get_with_image(db, id=type_id)
+            assert type_obj.image.src == "https://example.com/b.jpg"
+
+    asyncio.run(run())
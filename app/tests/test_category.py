@@ -3,40 +3,46 @@ Tests for Category API endpoints.
 
 This module contains tests for the Category API endpoints.
 """
+import os
+import tempfile
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 
+from app.core import counts, existence
+from app.core.cache import clear_caches
 from app.database.base import Base
 from app.core.deps import get_db
 from app.main import app
 from app.models.category import Category
 
-# Create a test database
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Create a test database, shared by the sync engine used to set it up and
+# the async engine used by the application
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Each test client request runs in its own event loop, so connections
+# are not pooled
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{DATABASE_PATH}", poolclass=NullPool)
+TestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 
 # Override the get_db dependency to use test database
-def override_get_db():
+async def override_get_db():
     """
     Override the get_db dependency for testing.
     
-    Returns:
+    Yields:
         Database session for testing
     """
-    try:
-        db = TestingSessionLocal()
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 app.dependency_overrides[get_db] = override_get_db
@@ -53,6 +59,9 @@ def test_db():
     Base.metadata.create_all(bind=engine)
     yield
     Base.metadata.drop_all(bind=engine)
+    clear_caches()
+    existence.bitmaps.clear()
+    counts.counters.clear()
 
 
 client = TestClient(app)
@@ -0,0 +1,105 @@
+"""
+Tests for GET request coalescing.
+
+This module contains tests for sharing identical in-flight GET requests.
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app.api.routing import coalesced_total
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.main import app
+from app.tests.test_category import async_engine, client, test_db  # reuse test setup
+
+
+@pytest.fixture
+def slow_selects():
+    """
+    Slow down SELECT statements on the test engine and record them.
+    
+    Yields:
+        List of executed SELECT statements
+    """
+    executed = []
+    
+    def slow(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            executed.append(statement)
+            time.sleep(0.2)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", slow)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", slow)
+
+
+async def _get_concurrently(url: str, count: int, **kwargs) -> list:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        return await asyncio.gather(*(http.get(url, **kwargs) for _ in range(count)))
+
+
+def test_identical_gets_share_one_query(test_db, slow_selects):
+    """Test that concurrent identical GETs run the query once."""
+    client.post("/api/types/", json={"title": "Service Type", "features": ["A"]})
+    slow_selects.clear()
+    before = coalesced_total.value(route="types")
+    
+    responses = asyncio.run(_get_concurrently("/api/types/?limit=10&skip=0", 10))
+    
+    assert all(response.status_code == 200 for response in responses)
+    assert all(response.json()[0]["title"] == "Service Type" for response in responses)
+    assert len({response.headers["etag"] for response in responses}) == 1
+    assert len(slow_selects) == 1
+    assert coalesced_total.value(route="types") - before == 9
+
+
+def test_different_queries_are_not_shared(test_db, slow_selects):
+    """Test that requests with different parameters run separately."""
+    async def run() -> list:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(
+                http.get("/api/faqs/?limit=1"), http.get("/api/faqs/?limit=2")
+            )
+    
+    responses = asyncio.run(run())
+    assert [response.status_code for response in responses] == [200, 200]
+    assert len(slow_selects) == 2
+
+
+def test_waiters_receive_leader_errors(test_db, slow_selects, monkeypatch):
+    """Test that a 404 from the leader is returned to every waiter."""
+    monkeypatch.setattr(settings, "EXISTENCE_ENABLED", False)
+    responses = asyncio.run(_get_concurrently("/api/plans/42", 5))
+    assert [response.status_code for response in responses] == [404] * 5
+    assert len(slow_selects) == 1
+
+
+def test_single_flight_runs_again_after_completion():
+    """Test that results are not kept once the call has finished."""
+    flight = SingleFlight()
+    calls = []
+    
+    async def work() -> int:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+    
+    async def run() -> list:
+        first = await asyncio.gather(flight.do("k", work), flight.do("k", work))
+        second = await flight.do("k", work)
+        return [*first, second]
+    
+    assert asyncio.run(run()) == [1, 1, 2]
+
+
+def test_metrics_endpoint_reports_coalescing(test_db):
+    """Test that the metrics endpoint exposes the coalescing counters."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "resivate_get_requests_coalesced_total" in response.text
@@ -0,0 +1,115 @@
+"""
+Tests for conditional GET support.
+
+This module contains tests for ETag and If-None-Match handling.
+"""
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event, text
+
+from app.core import deps
+from app.core.config import settings
+from app.tests.test_category import async_engine, client, engine, test_db  # reuse test setup
+
+
+def _create_plan(title: str = "Basic Plan") -> dict:
+    response = client.post(
+        "/api/plans/",
+        json={
+            "title": title,
+            "description": "Basic features for small businesses",
+            "price": 19.99,
+            "btnMessage": "Get Started",
+        },
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_list_returns_etag_and_304(test_db):
+    """Test that a matching If-None-Match is answered without the database."""
+    _create_plan()
+    response = client.get("/api/plans/")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    
+    executed = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/api/plans/", headers={"If-None-Match": etag})
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    assert executed == []
+
+
+def test_etag_changes_after_write(test_db):
+    """Test that a write to the table invalidates the ETag."""
+    plan = _create_plan()
+    etag = client.get(f"/api/plans/{plan['id']}").headers["etag"]
+    
+    client.put(f"/api/plans/{plan['id']}", json={"price": 29.99})
+    
+    response = client.get(f"/api/plans/{plan['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["price"] == 29.99
+    assert response.headers["etag"] != etag
+
+
+def test_etag_differs_per_query(test_db):
+    """Test that list pages and detail documents get distinct ETags."""
+    plan = _create_plan()
+    first = client.get("/api/plans/").headers["etag"]
+    second = client.get("/api/plans/?limit=1").headers["etag"]
+    detail = client.get(f"/api/plans/{plan['id']}").headers["etag"]
+    assert len({first, second, detail}) == 3
+
+
+def test_type_etag_tracks_image_writes(test_db):
+    """Test that types revalidate when an image they embed changes."""
+    image = client.post("/api/images/", json={"src": "https://example.com/a.jpg"}).json()
+    client.post("/api/types/", json={"title": "Type", "img_id": image["id"]})
+    etag = client.get("/api/types/", params={"expand": "img"}).headers["etag"]
+    
+    client.put(f"/api/images/{image['id']}", json={"src": "https://example.com/b.jpg"})
+    
+    response = client.get(
+        "/api/types/", params={"expand": "img"}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.json()[0]["img"]["src"] == "https://example.com/b.jpg"
+
+
+def test_private_counters_bound_etag_validity(test_db, monkeypatch):
+    """Test that ETags of per-process counters change every RESPONSE_CACHE_TTL."""
+    _create_plan()
+    etag = client.get("/api/plans/").headers["etag"]
+    # A write made outside the API bumps no counter
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE plans SET price = 5"))
+    assert client.get("/api/plans/", headers={"If-None-Match": etag}).status_code == 304
+    
+    later = time.time() + settings.RESPONSE_CACHE_TTL
+    monkeypatch.setattr(deps, "time", SimpleNamespace(time=lambda: later))
+    response = client.get("/api/plans/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_write_methods_ignore_if_none_match(test_db):
+    """Test that only GET requests are answered with 304."""
+    response = client.post(
+        "/api/faqs/",
+        json={"question": "Why?", "answer": "Because."},
+        headers={"If-None-Match": "*"},
+    )
+    assert response.status_code == 201
+    assert "etag" not in response.headers
@@ -0,0 +1,116 @@
+"""
+Tests for existence checks of looked up rows.
+
+This module contains tests for the id bitmaps and the negative cache.
+"""
+import pytest
+from sqlalchemy import event, text
+
+from app.core import cache as cache_module
+from app.core import existence
+from app.core.cache import versions
+from app.core.cache_backends import FileBackend
+from app.core.existence import IdBitmap
+from app.tests.test_category import async_engine, client, engine, test_db  # reuse test setup
+
+
+@pytest.fixture
+def statements():
+    """
+    Record the SQL statements executed against the test engine.
+    
+    Yields:
+        List of executed statements
+    """
+    executed = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def _create_plan(title: str = "Plan") -> dict:
+    response = client.post(
+        "/api/plans/",
+        json={"title": title, "description": "Plan", "price": 19.99, "btnMessage": "Buy"},
+    )
+    return response.json()
+
+
+def test_bitmap_answers_up_to_largest_id():
+    """Test that only ids up to the largest at rebuild are ruled out."""
+    ids = IdBitmap("plans")
+    assert ids.expired() and ids.might_exist(1)
+    ids.rebuild([1, 3, 9])
+    assert not ids.expired()
+    assert [id for id in range(12) if ids.might_exist(id)] == [1, 3, 9, 10, 11]
+    ids.add(2)
+    ids.discard(3)
+    ids.add(20)
+    assert [id for id in range(12) if ids.might_exist(id)] == [1, 2, 9, 10, 11]
+    assert ids.max_id == 9
+
+
+def test_expired_bitmap_rules_nothing_out():
+    """Test that an expired bitmap reports every id as possibly existing."""
+    ids = IdBitmap("plans", ttl=-1)
+    ids.rebuild([1])
+    assert ids.might_exist(2)
+
+
+def test_deleted_row_is_answered_without_sql(test_db, statements):
+    """Test that a lookup of a deleted row does not query the database."""
+    first, second = _create_plan(), _create_plan()
+    assert client.get(f"/api/plans/{first['id']}").status_code == 200
+    client.delete(f"/api/plans/{second['id']}")
+    statements.clear()
+    
+    response = client.get(f"/api/plans/{second['id']}")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Plan not found"}
+    assert statements == []
+
+
+def test_rows_written_elsewhere_are_found(test_db, monkeypatch, tmp_path):
+    """Test that a bitmap rebuilds before ruling out an id once the shared version moves."""
+    shared = FileBackend(str(tmp_path / "cache"), slots=64, slot_size=1024)
+    monkeypatch.setattr(cache_module, "backend", shared)
+    monkeypatch.setattr(versions, "backend", shared)
+    first, second = _create_plan(), _create_plan()
+    client.delete(f"/api/plans/{second['id']}")
+    assert client.get(f"/api/plans/{first['id']}").status_code == 200
+    assert client.get(f"/api/plans/{second['id']}").status_code == 404
+    
+    # Another worker inserts the row again with its id, and bumps the version
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO plans (id, title, description, price, btnMessage, blueBtn) "
+                "VALUES (:id, 'Plan', 'Plan', 19.99, 'Buy', 0)"
+            ),
+            {"id": second["id"]},
+        )
+    shared.incr("version:plans")
+    assert client.get(f"/api/plans/{second['id']}").status_code == 200
+
+
+def test_missing_ids_are_cached_until_created(test_db, statements):
+    """Test that ids reported missing skip the database until they exist."""
+    plan = _create_plan()
+    missing_id = plan["id"] + 1
+    assert client.get(f"/api/plans/{missing_id}").status_code == 404
+    statements.clear()
+    assert client.get(f"/api/plans/{missing_id}").status_code == 404
+    assert statements == []
+    
+    assert _create_plan()["id"] == missing_id
+    assert client.get(f"/api/plans/{missing_id}").status_code == 200
+
+
+def test_writes_for_missing_rows_still_reach_endpoints(test_db):
+    """Test that only GET lookups are answered from the existence checks."""
+    existence.record_missing("plans", 1)
+    assert client.put("/api/plans/1", json={"price": -1}).status_code == 422
@@ -0,0 +1,85 @@
+"""
+Tests for the static snapshot exporter.
+
+This module contains tests for export_static.py.
+"""
+import gzip
+import hashlib
+import json
+
+from export_static import export
+from app.tests.test_category import client, engine, test_db  # reuse test setup
+
+
+def _create_plan(title: str) -> dict:
+    response = client.post(
+        "/api/plans/",
+        json={"title": title, "description": "Plan", "price": 19.99, "btnMessage": "Buy"},
+    )
+    return response.json()
+
+
+def _export(out_dir, **kwargs):
+    return export(str(out_dir), engine=engine, client=client, **kwargs)
+
+
+def test_export_renders_documents_and_manifest(test_db, tmp_path):
+    """Test that lists, details and bundles are exported with hashes."""
+    plan = _create_plan("First")
+    stats = _export(tmp_path)
+    assert stats["written"] > 0
+    
+    detail = (tmp_path / f"api/plans/{plan['id']}.json").read_bytes()
+    assert json.loads(detail) == client.get(f"/api/plans/{plan['id']}").json()
+    assert gzip.decompress((tmp_path / f"api/plans/{plan['id']}.json.gz").read_bytes()) == detail
+    assert json.loads((tmp_path / "api/plans/index.json").read_bytes()) == [plan]
+    assert json.loads((tmp_path / "api/plans/page-1.json").read_bytes()) == [plan]
+    assert json.loads((tmp_path / "api/bundles/landing.json").read_bytes())["plans"] == [plan]
+    
+    manifest = json.loads((tmp_path / "manifest.json").read_text())["files"]
+    assert manifest[f"api/plans/{plan['id']}.json"]["sha256"] == hashlib.sha256(detail).hexdigest()
+    assert "api/faqs/index.json" in manifest
+
+
+def test_incremental_export_rewrites_changed_rows(test_db, tmp_path):
+    """Test that a re-export only renders files whose rows changed."""
+    first = _create_plan("First")
+    second = _create_plan("Second")
+    _export(tmp_path)
+    assert _export(tmp_path)["written"] == 0
+    
+    client.put(f"/api/plans/{first['id']}", json={"title": "Changed"})
+    manifest = json.loads((tmp_path / "manifest.json").read_text())["files"]
+    stats = _export(tmp_path)
+    updated = json.loads((tmp_path / "manifest.json").read_text())["files"]
+    changed = {path for path in updated if updated[path] != manifest[path]}
+    assert changed == {
+        f"api/plans/{first['id']}.json",
+        "api/plans/index.json",
+        "api/plans/page-1.json",
+        "api/bundles/landing.json",
+    }
+    assert stats["written"] == 4
+    assert json.loads((tmp_path / f"api/plans/{first['id']}.json").read_bytes())["title"] == "Changed"
+    
+    client.delete(f"/api/plans/{second['id']}")
+    assert _export(tmp_path)["removed"] == 1
+    assert not (tmp_path / f"api/plans/{second['id']}.json").exists()
+    assert not (tmp_path / f"api/plans/{second['id']}.json.gz").exists()
+
+
+def test_referenced_row_change_rewrites_bundle(test_db, tmp_path):
+    """Test that a bundle embedding an image is rendered again when it changes."""
+    image = client.post("/api/images/", json={"src": "https://example.com/a.jpg"}).json()
+    type_item = client.post(
+        "/api/types/",
+        json={"title": "Type", "description": "Type", "features": [], "img_id": image["id"]},
+    ).json()
+    _export(tmp_path)
+    
+    client.put(f"/api/images/{image['id']}", json={"src": "https://example.com/b.jpg"})
+    _export(tmp_path)
+    bundle = json.loads((tmp_path / "api/bundles/landing.json").read_bytes())
+    assert bundle["types"][0]["img"]["src"] == "https://example.com/b.jpg"
+    detail = json.loads((tmp_path / f"api/types/{type_item['id']}.json").read_bytes())
+    assert detail["img_id"] == image["id"]
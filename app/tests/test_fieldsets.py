@@ -0,0 +1,110 @@
+"""
+Tests for sparse fieldsets.
+
+This module contains tests for the fields parameter of list and detail endpoints.
+"""
+import pytest
+from sqlalchemy import event
+
+from app.tests.test_category import async_engine, client, test_db  # reuse test setup
+
+
+@pytest.fixture
+def statements():
+    """
+    Record the SQL statements executed against the test engine.
+    
+    Yields:
+        List of executed statements
+    """
+    executed = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def _selects(statements: list, table: str) -> list:
+    return [sql for sql in statements if sql.startswith("SELECT") and f"FROM {table}" in sql]
+
+
+def test_list_fields_narrow_the_select(test_db, statements):
+    """Test that a list with fields only selects and returns those columns."""
+    faq_id = client.post("/api/faqs/", json={"question": "Why?", "answer": "Because."}).json()["id"]
+    response = client.get("/api/faqs/", params={"fields": "question,id", "limit": 1})
+    assert response.status_code == 200
+    assert response.json() == [{"id": faq_id, "question": "Why?"}]
+    assert "x-next-cursor" in response.headers
+    
+    selects = _selects(statements, "faqs")
+    assert selects and "faqs.answer" not in selects[-1]
+    assert client.get("/api/faqs/").json()[0]["answer"] == "Because."
+
+
+def test_type_without_img_skips_the_image(test_db, statements):
+    """Test that types only load their image when the img field is requested."""
+    image_id = client.post("/api/images/", json={"src": "a.png"}).json()["id"]
+    type_id = client.post(
+        "/api/types/", json={"title": "Web", "features": ["Fast"], "img_id": image_id}
+    ).json()["id"]
+    statements.clear()
+    
+    data = client.get("/api/types/", params={"fields": "title,features"}).json()
+    assert data == [{"title": "Web", "features": ["Fast"]}]
+    assert all("JOIN" not in sql for sql in _selects(statements, "types"))
+    assert not _selects(statements, "images")
+    
+    data = client.get(f"/api/types/{type_id}", params={"fields": "img"}).json()
+    assert data == {"img": {"id": image_id, "src": "a.png"}}
+    assert _selects(statements, "images")
+
+
+def test_wrapped_lists_and_details_are_trimmed(test_db):
+    """Test fields on wrapped lists and detail routes, which keep their ETag."""
+    item_id = client.post(
+        "/api/processing-info/", json={"title": "Item", "pricing": "$1", "description": "Long"}
+    ).json()["id"]
+    data = client.get("/api/processing-info/", params={"fields": "title"}).json()
+    assert data == {"items": [{"title": "Item"}], "count": 1, "next_cursor": None}
+    
+    response = client.get(f"/api/processing-info/{item_id}", params={"fields": "pricing"})
+    assert response.json() == {"pricing": "$1"}
+    etag = response.headers["etag"]
+    response = client.get(
+        f"/api/processing-info/{item_id}",
+        params={"fields": "pricing"},
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 304
+
+
+def test_expand_loads_relationships_on_request(test_db, statements):
+    """Test that images are only loaded when expanded, with each strategy."""
+    image_id = client.post("/api/images/", json={"src": "a.png"}).json()["id"]
+    client.post("/api/solutions-data/", json={"title": "Solution", "img_id": image_id})
+    statements.clear()
+    type_item = client.post("/api/types/", json={"title": "Web", "img_id": image_id}).json()
+    assert type_item["img"] is None
+    assert not _selects(statements, "images")
+    
+    assert client.get("/api/types/").json()[0]["img"] is None
+    assert not _selects(statements, "images")
+    data = client.get("/api/types/", params={"expand": "img"}).json()
+    assert data[0]["img"] == {"id": image_id, "src": "a.png"}
+    assert all("JOIN" not in sql for sql in _selects(statements, "types"))
+    assert _selects(statements, "images")
+    
+    data = client.get("/api/solutions-data/", params={"expand": "img"}).json()
+    assert data["items"][0]["img"] == {"id": image_id, "src": "a.png"}
+    assert "JOIN images" in _selects(statements, "solutions_data")[-1]
+    assert client.get("/api/types/", params={"expand": "features"}).status_code == 400
+
+
+@pytest.mark.parametrize("fields", ["answer,secret", "", " , "])
+def test_unknown_fields_are_rejected(test_db, fields):
+    """Test that unknown or empty fieldsets are rejected."""
+    response = client.get("/api/faqs/", params={"fields": fields})
+    assert response.status_code == 400
@@ -0,0 +1,134 @@
+"""
+Tests for filtering and sorting list endpoints.
+
+This module contains tests for the filter and sort parameters of lists.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+from app.crud.base import CRUDBase
+from app.crud.plan import plan as plan_crud
+from app.models.plan import Plan
+from app.models.processing_info import ProcessingInfo
+from app.tests.test_category import (  # reuse test setup
+    TestingSessionLocal,
+    async_engine,
+    client,
+    test_db,
+)
+
+
+@pytest.fixture
+def statements():
+    """
+    Record the SQL statements executed against the test engine.
+    
+    Yields:
+        List of executed statements
+    """
+    executed = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def _create_plan(title: str, price: float) -> dict:
+    response = client.post(
+        "/api/plans/",
+        json={"title": title, "description": "Plan", "price": price, "btnMessage": "Buy"},
+    )
+    return response.json()
+
+
+def test_filter_and_sort_plans(test_db, statements):
+    """Test range filters with a descending sort, paged through cursors."""
+    for title, price in (("A", 10), ("B", 60), ("C", 30), ("D", 30), ("E", 50)):
+        _create_plan(title, price)
+    params = {"filter[price][lte]": "50", "sort": "-price,id", "limit": 2, "count": "exact"}
+    response = client.get("/api/plans/", params=params)
+    assert [plan["title"] for plan in response.json()] == ["E", "C"]
+    assert response.headers["x-total-count"] == "4"
+    
+    params["cursor"] = response.headers["x-next-cursor"]
+    response = client.get("/api/plans/", params=params)
+    assert [plan["title"] for plan in response.json()] == ["D", "A"]
+    assert any("plans.price <= ?" in sql and "ORDER BY plans.price DESC, plans.id ASC" in sql for sql in statements)
+    
+    response = client.get("/api/plans/", params={"filter[price][in]": "30,60", "sort": "title"})
+    assert [plan["title"] for plan in response.json()] == ["B", "C", "D"]
+
+
+def test_updated_row_enters_cached_filtered_page(test_db):
+    """Test that updating a row invalidates the filtered pages and counts it enters."""
+    _create_plan("A", 10)
+    plan = _create_plan("B", 100)
+    params = {"filter[price][lte]": "50", "count": "exact"}
+    response = client.get("/api/plans/", params=params)
+    assert [item["title"] for item in response.json()] == ["A"]
+    assert response.headers["x-total-count"] == "1"
+    
+    async def update():
+        async with TestingSessionLocal() as db:
+            db_obj = await db.get(Plan, plan["id"])
+            await plan_crud.update(db, db_obj=db_obj, obj_in={"price": 20})
+    
+    asyncio.run(update())
+    response = client.get("/api/plans/", params=params)
+    assert [item["title"] for item in response.json()] == ["A", "B"]
+    assert response.headers["x-total-count"] == "2"
+
+
+def test_prefix_and_equality_filters(test_db):
+    """Test prefix filters, escaped wildcards and the equality shorthand."""
+    for title in ("News", "Newsletter", "N%ws", "Blog"):
+        client.post("/api/categories/", json={"title": title, "link": "https://example.com"})
+    response = client.get("/api/categories/", params={"filter[title][prefix]": "News"})
+    assert [category["title"] for category in response.json()] == ["News", "Newsletter"]
+    response = client.get("/api/categories/", params={"filter[title][prefix]": "N%"})
+    assert [category["title"] for category in response.json()] == ["N%ws"]
+    
+    for i, pricing in enumerate(("$1", "$2", "$1")):
+        client.post("/api/processing-info/", json={"title": f"Item {i}", "pricing": pricing})
+    data = client.get("/api/processing-info/", params={"filter[pricing]": "$1", "count": "exact"}).json()
+    assert [item["pricing"] for item in data["items"]] == ["$1", "$1"]
+    assert data["count"] == 2
+
+
+@pytest.mark.parametrize(
+    "url, params",
+    [
+        ("/api/plans/", {"filter[description]": "Plan"}),
+        ("/api/plans/", {"filter[price][ne]": "10"}),
+        ("/api/plans/", {"filter[price][lte]": "cheap"}),
+        ("/api/plans/", {"filter[price][prefix]": "1"}),
+        ("/api/plans/", {"filter": "price"}),
+        ("/api/plans/", {"sort": "description"}),
+        ("/api/categories/", {"filter[title][prefix]": ""}),
+        ("/api/processing-info/", {"sort": "pricing"}),
+    ],
+)
+def test_filters_that_need_a_scan_are_rejected(test_db, url, params):
+    """Test that filters and sorts not backed by an index are rejected."""
+    response = client.get(url, params=params)
+    assert response.status_code == 400
+
+
+def test_whitelist_requires_indexes():
+    """Test that CRUD objects can only whitelist indexed, sortable columns."""
+    
+    class PlanByDescription(CRUDBase[Plan, Plan, Plan]):
+        filterable = ("description",)
+    
+    class InfoByPricing(CRUDBase[ProcessingInfo, ProcessingInfo, ProcessingInfo]):
+        sortable = ("pricing",)
+    
+    with pytest.raises(ValueError):
+        PlanByDescription(Plan)
+    with pytest.raises(ValueError):
+        InfoByPricing(ProcessingInfo)
@@ -0,0 +1,98 @@
+"""
+Tests for batch reads by id.
+
+This module contains tests for the ids parameter of list endpoints.
+"""
+import pytest
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.tests.test_category import async_engine, client, test_db  # reuse test setup
+
+
+@pytest.fixture
+def statements():
+    """
+    Record the SQL statements executed against the test engine.
+    
+    Yields:
+        List of executed statements
+    """
+    executed = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def _create_plans(count: int) -> list:
+    ids = []
+    for i in range(count):
+        response = client.post(
+            "/api/plans/",
+            json={"title": f"Plan {i}", "description": "Plan", "price": 10 + i, "btnMessage": "Buy"},
+        )
+        ids.append(response.json()["id"])
+    return ids
+
+
+def _in_queries(statements: list, table: str) -> list:
+    return [sql for sql in statements if f"FROM {table}" in sql and f"{table}.id IN" in sql]
+
+
+def test_ids_keep_request_order_and_report_missing(test_db, statements):
+    """Test that a batch read runs one query and returns records in request order."""
+    ids = _create_plans(3)
+    statements.clear()
+    params = {"ids": f"{ids[2]},{ids[0]},999,{ids[2]}"}
+    response = client.get("/api/plans/", params=params)
+    assert response.status_code == 200
+    assert [plan["id"] for plan in response.json()] == [ids[2], ids[0]]
+    assert response.headers["x-missing-ids"] == "999"
+    assert "x-next-cursor" not in response.headers
+    assert len(_in_queries(statements, "plans")) == 1
+
+
+def test_ids_read_through_the_row_cache(test_db, statements):
+    """Test that cached rows are not queried again and loaded rows are cached."""
+    ids = _create_plans(3)
+    client.get(f"/api/plans/{ids[0]}")
+    statements.clear()
+    client.get("/api/plans/", params={"ids": ",".join(map(str, ids))})
+    assert [sql.count("?") for sql in _in_queries(statements, "plans")] == [2]
+    
+    statements.clear()
+    assert client.get(f"/api/plans/{ids[1]}").json()["id"] == ids[1]
+    assert not [sql for sql in statements if "FROM plans" in sql]
+
+
+def test_large_id_lists_are_chunked(test_db, statements, monkeypatch):
+    """Test that long id lists are split into several IN queries."""
+    monkeypatch.setattr(settings, "GET_MANY_CHUNK_SIZE", 2)
+    ids = _create_plans(5)
+    statements.clear()
+    response = client.get("/api/plans/", params={"ids": ",".join(map(str, reversed(ids)))})
+    assert [plan["id"] for plan in response.json()] == ids[::-1]
+    assert len(_in_queries(statements, "plans")) == 3
+
+
+def test_ids_on_wrapped_lists_with_fields(test_db):
+    """Test batch reads of wrapped lists and sparse fieldsets."""
+    first = client.post("/api/processing-info/", json={"title": "First", "pricing": "$1"}).json()
+    second = client.post("/api/processing-info/", json={"title": "Second", "pricing": "$2"}).json()
+    params = {"ids": f"{second['id']},{first['id']}", "fields": "title"}
+    data = client.get("/api/processing-info/", params=params).json()
+    assert data == {
+        "items": [{"title": "Second"}, {"title": "First"}],
+        "count": 2,
+        "next_cursor": None,
+    }
+
+
+@pytest.mark.parametrize("ids", ["1,two", "", " , "])
+def test_invalid_ids_are_rejected(test_db, ids):
+    """Test that malformed id lists are rejected."""
+    assert client.get("/api/faqs/", params={"ids": ids}).status_code == 400
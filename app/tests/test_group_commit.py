@@ -0,0 +1,154 @@
+"""
+Tests for group commits.
+
+This module contains tests for committing the writes of concurrent requests
+together.
+"""
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app.core import group_commit
+from app.core.config import settings
+from app.core.group_commit import GroupCommitWriter
+from app.crud.type import type as type_crud
+from app.main import app
+from app.models.image import Image
+from app.schemas.type import TypeCreate
+from app.tests.test_category import (  # reuse test setup
+    TestingSessionLocal,
+    async_engine,
+    client,
+    test_db,
+)
+
+
+@pytest.fixture
+def commits(monkeypatch):
+    """
+    Enable group commits and count the transactions committed on the test engine.
+    
+    Yields:
+        List with one entry per commit
+    """
+    monkeypatch.setattr(settings, "GROUP_COMMIT_ENABLED", True)
+    # Leave every concurrent request time to queue its write
+    monkeypatch.setattr(settings, "GROUP_COMMIT_DELAY", 0.1)
+    committed = []
+    
+    def record(conn):
+        committed.append(conn)
+    
+    event.listen(async_engine.sync_engine, "commit", record)
+    yield committed
+    event.remove(async_engine.sync_engine, "commit", record)
+
+
+async def _post_concurrently(url: str, bodies: list) -> list:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        return await asyncio.gather(*(http.post(url, json=body) for body in bodies))
+
+
+def test_concurrent_creates_share_one_commit(test_db, commits):
+    """Test that creates arriving together are committed in one transaction."""
+    before = group_commit.batches_total.value()
+    bodies = [{"question": f"Q{i}?", "answer": "A"} for i in range(20)]
+    responses = asyncio.run(_post_concurrently("/api/faqs/", bodies))
+    assert [response.status_code for response in responses] == [201] * 20
+    assert [response.json()["question"] for response in responses] == [f"Q{i}?" for i in range(20)]
+    assert len({response.json()["id"] for response in responses}) == 20
+    assert len(commits) == 1
+    assert group_commit.batches_total.value() == before + 1
+    assert group_commit.last_batch_size.value() == 20
+    assert len(client.get("/api/faqs/").json()) == 20
+
+
+def test_failed_write_leaves_its_batch_committed(test_db, commits):
+    """Test that a write that fails only fails its own request."""
+    client.post("/api/faqs/", json={"question": "Taken?", "answer": "A"})
+    bodies = [{"question": question, "answer": "A"} for question in ("One?", "Taken?", "Two?")]
+    responses = asyncio.run(_post_concurrently("/api/faqs/", bodies))
+    assert [response.status_code for response in responses] == [201, 409, 201]
+    questions = sorted(faq["question"] for faq in client.get("/api/faqs/").json())
+    assert questions == ["One?", "Taken?", "Two?"]
+
+
+def test_updates_and_deletes_go_through_the_writer(test_db, commits):
+    """Test that written records are returned as without group commits."""
+    image = client.post("/api/images/", json={"src": "a.png"}).json()
+    response = client.post("/api/types/?expand=img", json={"title": "Web", "img_id": image["id"]})
+    type_ = response.json()
+    assert type_["img"] == image
+    
+    response = client.put(f"/api/types/{type_['id']}?expand=img", json={"description": "Sites"})
+    assert response.json() == {**type_, "description": "Sites"}
+    assert client.put("/api/types/999", json={"description": "Sites"}).status_code == 404
+    
+    assert client.delete(f"/api/types/{type_['id']}").status_code == 204
+    assert client.delete(f"/api/types/{type_['id']}").status_code == 404
+    assert client.get("/api/types/").json() == []
+
+
+def test_writer_batches_and_applies_backpressure(test_db):
+    """Test batch size limits and that the queue never holds more than allowed."""
+    writer = GroupCommitWriter(TestingSessionLocal, max_batch=3, delay=0.01, max_pending=2)
+    queued = []
+    
+    def write(n):
+        async def run(db):
+            queued.append(writer.pending)
+            return n
+        return run
+    
+    async def submit_all():
+        return await asyncio.gather(*(writer.submit(write(n)) for n in range(7)))
+    
+    before = group_commit.batches_total.value()
+    assert asyncio.run(submit_all()) == list(range(7))
+    assert max(queued) <= 2
+    assert group_commit.batches_total.value() - before >= 4
+
+
+def test_open_transactions_bypass_the_writer(test_db, commits):
+    """Test that a write joins its caller's transaction rather than the writer's."""
+    before = group_commit.batches_total.value()
+    
+    async def run():
+        async with TestingSessionLocal() as db:
+            image = Image(src="a.png")
+            db.add(image)
+            await db.flush()
+            type_ = await type_crud.create(db, obj_in=TypeCreate(title="Web", img_id=image.id))
+            return image.id, type_.img_id
+    
+    image_id, img_id = asyncio.run(run())
+    assert img_id == image_id
+    assert group_commit.batches_total.value() == before
+    assert len(commits) == 1
+    assert [image["src"] for image in client.get("/api/images/").json()] == ["a.png"]
+    assert len(client.get("/api/types/").json()) == 1
+
+
+def test_cancelled_writer_fails_its_writes(test_db):
+    """Test that callers do not wait forever when the writer task is cancelled."""
+    writer = GroupCommitWriter(TestingSessionLocal, max_batch=10, delay=0.01, max_pending=10)
+    started = []
+    
+    async def hang(db):
+        started.append(True)
+        await asyncio.Event().wait()
+    
+    async def run():
+        calls = [asyncio.ensure_future(writer.submit(hang)) for _ in range(2)]
+        while not started:
+            await asyncio.sleep(0.01)
+        queued = asyncio.ensure_future(writer.submit(hang))
+        await asyncio.sleep(0)
+        writer._task.cancel()
+        return await asyncio.gather(*calls, queued, return_exceptions=True)
+    
+    results = asyncio.run(asyncio.wait_for(run(), 5))
+    assert [type(result) for result in results] == [RuntimeError] * 3
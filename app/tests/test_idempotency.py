@@ -0,0 +1,178 @@
+"""
+Tests for idempotency keys.
+
+This module contains tests for replaying the responses of POST requests sent
+with an Idempotency-Key header.
+"""
+import asyncio
+
+import httpx
+from sqlalchemy import create_engine, select
+
+from app.core import idempotency
+from app.core.config import settings
+from app.crud.type import type as type_crud
+from app.main import app
+from app.models.idempotency_key import IdempotencyKey
+from app.tests.test_category import (  # reuse test setup
+    SQLALCHEMY_DATABASE_URL,
+    TestingSessionLocal,
+    client,
+    test_db,
+)
+from app.tests.test_get_many import statements  # reuse the statement recorder
+
+
+def _keys() -> list:
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    with engine.connect() as conn:
+        rows = conn.execute(select(IdempotencyKey.__table__)).all()
+    engine.dispose()
+    return rows
+
+
+def test_retry_replays_the_stored_response(test_db, statements):
+    """Test that a retry gets the first response without writing again."""
+    headers = {"Idempotency-Key": "create-web"}
+    first = client.post("/api/types/", json={"title": "Web"}, headers=headers)
+    assert first.status_code == 201
+    assert "idempotent-replayed" not in first.headers
+    
+    statements.clear()
+    retry = client.post("/api/types/", json={"title": "Web"}, headers=headers)
+    assert retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert not [sql for sql in statements if "types" in sql]
+    assert len(client.get("/api/types/").json()) == 1
+    
+    # Requests without a key are not affected
+    assert client.post("/api/types/", json={"title": "Web"}).status_code == 409
+
+
+def test_key_reused_for_another_request_is_rejected(test_db):
+    """Test that a key only replays the request it was first sent with."""
+    headers = {"Idempotency-Key": "k1"}
+    client.post("/api/menu-options/", json={"type": "main", "items": ["Home"]}, headers=headers)
+    response = client.post(
+        "/api/menu-options/", json={"type": "main", "items": ["About"]}, headers=headers
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Idempotency-Key was already used for a different request"
+    
+    # Keys are scoped to their route
+    response = client.post("/api/faqs/", json={"question": "Q?", "answer": "A"}, headers=headers)
+    assert response.status_code == 201
+    response = client.post("/api/types/", json={"title": "T"}, headers={"Idempotency-Key": ""})
+    assert response.status_code == 400
+
+
+def test_concurrent_duplicates_wait_for_the_first(test_db):
+    """Test that duplicates sent together create one record."""
+    
+    async def post_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*(
+                http.post(
+                    "/api/plans/",
+                    json={"title": "Basic", "description": "Plan", "price": 10, "btnMessage": "Buy"},
+                    headers={"Idempotency-Key": "plan"},
+                )
+                for _ in range(5)
+            ))
+    
+    responses = asyncio.run(post_all())
+    assert [response.status_code for response in responses] == [201] * 5
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert sum("idempotent-replayed" in response.headers for response in responses) == 4
+    assert len(client.get("/api/plans/").json()) == 1
+
+
+def test_errors_release_the_key(test_db):
+    """Test that a request that failed can be retried with its key."""
+    headers = {"Idempotency-Key": "invalid"}
+    assert client.post("/api/faqs/", json={"question": "Q?"}, headers=headers).status_code == 422
+    response = client.post("/api/faqs/", json={"question": "Q?", "answer": "A"}, headers=headers)
+    assert response.status_code == 201
+    assert "idempotent-replayed" not in response.headers
+    
+    headers = {"Idempotency-Key": "expand"}
+    response = client.post("/api/types/?expand=owner", json={"title": "T"}, headers=headers)
+    assert response.status_code == 400
+    assert client.post("/api/types/", json={"title": "T"}, headers=headers).status_code == 201
+    assert [key.status_code for key in _keys()] == [201, 201]
+
+
+def test_keys_expire(test_db, monkeypatch):
+    """Test that an expired key runs its request again and is purged."""
+    monkeypatch.setattr(settings, "IDEMPOTENCY_TTL", -1)
+    monkeypatch.setattr(idempotency, "_next_purge", 0.0)
+    headers = {"Idempotency-Key": "image"}
+    first = client.post("/api/images/", json={"src": "a.png"}, headers=headers)
+    client.delete(f"/api/images/{first.json()['id']}")
+    assert len(_keys()) == 1
+    
+    retry = client.post("/api/images/", json={"src": "a.png"}, headers=headers)
+    assert retry.status_code == 201
+    assert "idempotent-replayed" not in retry.headers
+    assert len(client.get("/api/images/").json()) == 1
+    [key] = _keys()
+    assert key.status_code == 201
+
+
+def test_key_held_by_another_worker(test_db, monkeypatch):
+    """Test that a retry gives up on a request that does not complete in time."""
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT", 0.2)
+    body = b'{"title":"Web"}'
+    id = idempotency.key_id("/api/types/", "held")
+    fingerprint = idempotency.fingerprint("POST", "/api/types/", "", body)
+    
+    async def reserve():
+        async with TestingSessionLocal() as db:
+            return await idempotency.reserve(db, id, fingerprint)
+    
+    assert asyncio.run(reserve()) is None
+    response = client.post(
+        "/api/types/",
+        content=body,
+        headers={"Idempotency-Key": "held", "Content-Type": "application/json"},
+    )
+    assert response.status_code == 409
+    assert response.json()["detail"] == "A request with this Idempotency-Key is in progress"
+    assert client.get("/api/types/").json() == []
+
+
+def test_running_requests_keep_their_key(test_db, monkeypatch):
+    """Test that a key stays reserved while its request outlives the lock TTL."""
+    monkeypatch.setattr(settings, "IDEMPOTENCY_LOCK_TTL", 2)
+    create = type_crud.create
+    
+    async def slow_create(*args, **kwargs):
+        await asyncio.sleep(3)
+        return await create(*args, **kwargs)
+    
+    monkeypatch.setattr(type_crud, "create", slow_create)
+    body = b'{"title":"Web"}'
+    id = idempotency.key_id("/api/types/", "slow")
+    fingerprint = idempotency.fingerprint("POST", "/api/types/", "", body)
+    
+    async def post_and_retry():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            first = asyncio.create_task(http.post(
+                "/api/types/",
+                content=body,
+                headers={"Idempotency-Key": "slow", "Content-Type": "application/json"},
+            ))
+            await asyncio.sleep(2.5)
+            # A retry in another worker still finds the key held by the first request
+            async with TestingSessionLocal() as db:
+                held = await idempotency.reserve(db, id, fingerprint)
+            return held, await first
+    
+    held, response = asyncio.run(post_and_retry())
+    assert held is not None and held.status_code is None
+    assert response.status_code == 201
+    [key] = _keys()
+    assert key.status_code == 201
@@ -0,0 +1,148 @@
+"""
+Tests for keyset pagination of list endpoints.
+
+This module contains tests for the cursors returned with list pages.
+"""
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, select
+
+from app.core import pagination
+from app.core.pagination import InvalidCursor
+from app.models.plan import Plan
+from app.tests.test_category import async_engine, client, test_db  # reuse test setup
+
+
+@pytest.fixture
+def statements():
+    """
+    Record the SQL statements executed against the test engine.
+    
+    Yields:
+        List of executed statements
+    """
+    executed = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def _create_plans(count: int) -> list:
+    ids = []
+    for i in range(count):
+        response = client.post(
+            "/api/plans/",
+            json={"title": f"Plan {i}", "description": "Plan", "price": 10 + i, "btnMessage": "Buy"},
+        )
+        ids.append(response.json()["id"])
+    return ids
+
+
+def test_cursor_walks_every_page(test_db, statements):
+    """Test that following the cursors returns every row once, in id order."""
+    ids = _create_plans(5)
+    seen = []
+    response = client.get("/api/plans/", params={"limit": 2})
+    while True:
+        assert response.status_code == 200
+        seen.extend(plan["id"] for plan in response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+        response = client.get("/api/plans/", params={"limit": 2, "cursor": cursor})
+    
+    assert seen == sorted(ids)
+    pages = [sql for sql in statements if "FROM plans" in sql and "ORDER BY plans.id" in sql]
+    assert len(pages) == 3
+    seeks = [sql for sql in statements if "WHERE plans.id > ? ORDER BY plans.id" in sql]
+    assert len(seeks) == 2
+
+
+def test_offset_mode_is_unchanged(test_db):
+    """Test that skip still pages by offset and offers a cursor to continue."""
+    ids = _create_plans(3)
+    response = client.get("/api/plans/", params={"skip": 1, "limit": 1})
+    assert [plan["id"] for plan in response.json()] == [ids[1]]
+    cursor = response.headers["x-next-cursor"]
+    response = client.get("/api/plans/", params={"cursor": cursor})
+    assert [plan["id"] for plan in response.json()] == [ids[2]]
+    assert "x-next-cursor" not in response.headers
+
+
+def test_invalid_cursors_are_rejected(test_db):
+    """Test that malformed cursors and cursors combined with skip are rejected."""
+    ids = _create_plans(2)
+    cursor = client.get("/api/plans/", params={"limit": 1}).headers["x-next-cursor"]
+    for params in ({"cursor": "not-a-cursor"}, {"cursor": cursor, "skip": 1}):
+        response = client.get("/api/plans/", params=params)
+        assert response.status_code == 400
+    assert client.get("/api/plans/", params={"cursor": cursor}).json()[0]["id"] == ids[1]
+
+
+def test_wrapped_lists_include_next_cursor(test_db):
+    """Test that list wrappers return the cursor in the body."""
+    for title in ("First", "Second"):
+        client.post("/api/processing-info/", json={"title": title, "pricing": "$1"})
+    data = client.get("/api/processing-info/", params={"limit": 1}).json()
+    assert data["count"] == 1
+    data = client.get("/api/processing-info/", params={"cursor": data["next_cursor"]}).json()
+    assert [item["title"] for item in data["items"]] == ["Second"]
+    assert data["next_cursor"] is None
+
+
+def test_cursor_encodes_sort_values():
+    """Test cursors over mixed sort directions and decimal keys."""
+    keys = pagination.sort_columns(Plan, ("-price",))
+    assert [(column.key, descending) for column, descending in keys] == [("price", True), ("id", False)]
+    cursor = pagination.encode_cursor(Plan(id=4, price=Decimal("10.50")), keys)
+    assert pagination.decode_cursor(cursor, keys) == [Decimal("10.50"), 4]
+    
+    condition = pagination.seek(Plan, ("-price",), cursor)
+    sql = str(select(Plan.id).where(condition).compile(compile_kwargs={"literal_binds": True}))
+    assert "plans.price < 10.50 OR plans.price = 10.50 AND plans.id > 4" in sql
+    with pytest.raises(InvalidCursor):
+        pagination.seek(Plan, ("price",), cursor)
+
+
+def test_exact_count_is_cached_until_rows_change(test_db, statements):
+    """Test that exact counts are cached until a row is created or deleted."""
+    ids = _create_plans(3)
+    response = client.get("/api/plans/", params={"limit": 1, "count": "exact"})
+    assert response.headers["x-total-count"] == "3"
+    client.get("/api/plans/", params={"limit": 2, "count": "exact"})
+    assert len([sql for sql in statements if "count(*)" in sql]) == 1
+    
+    client.delete(f"/api/plans/{ids[0]}")
+    response = client.get("/api/plans/", params={"limit": 1, "count": "exact"})
+    assert response.headers["x-total-count"] == "2"
+    assert len([sql for sql in statements if "count(*)" in sql]) == 2
+
+
+def test_estimated_count_follows_writes(test_db, statements):
+    """Test that estimates are maintained by writes without counting again."""
+    _create_plans(2)
+    response = client.get("/api/plans/", params={"count": "estimate"})
+    assert response.headers["x-total-count"] == "2"
+    ids = _create_plans(2)
+    client.delete(f"/api/plans/{ids[0]}")
+    response = client.get("/api/plans/", params={"count": "estimate"})
+    assert response.headers["x-total-count"] == "3"
+    assert len([sql for sql in statements if "count(*)" in sql]) == 1
+
+
+def test_wrapped_list_count_modes(test_db):
+    """Test that wrappers keep the page size by default and report totals on request."""
+    for title in ("First", "Second", "Third"):
+        client.post("/api/solutions-data/", json={"title": title, "pricing": "$1"})
+    url = "/api/solutions-data/"
+    assert client.get(url, params={"limit": 2}).json()["count"] == 2
+    assert client.get(url, params={"limit": 2, "count": "exact"}).json()["count"] == 3
+    assert client.get(url, params={"limit": 2, "count": "estimate"}).json()["count"] == 3
+    assert client.get(url, params={"limit": 2, "count": "none"}).json()["count"] is None
+    assert "x-total-count" not in client.get("/api/plans/").headers
+    assert client.get(url, params={"count": "all"}).status_code == 422
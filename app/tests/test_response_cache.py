@@ -0,0 +1,397 @@
+"""
+Tests for the shared response cache.
+
+This module contains tests for the cache backends and for GET responses read
+through the two-tier cache.
+"""
+import asyncio
+import socketserver
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app.api import routing
+from app.api.routing import response_cache
+from app.core import cache as cache_module
+from app.core import deps
+from app.core.config import settings
+from app.core.cache import call_backend, versions
+from app.core.cache_backends import FileBackend, MemoryBackend, RedisBackend, read_reply
+from app.crud import base as crud_base
+from app.crud.plan import plan as plan_crud
+from app.main import app
+from app.models.type import Type
+from app.schemas.plan import PlanCreate
+from app.tests.test_category import TestingSessionLocal, async_engine, client, engine, test_db  # reuse test setup
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Answer the subset of Redis commands used by RedisBackend."""
+    
+    def handle(self):
+        store = self.server.store
+        while True:
+            try:
+                command = read_reply(self.rfile)
+            except ConnectionError:
+                return
+            name, args = command[0].upper(), command[1:]
+            now = time.time()
+            for key, (_, expires_at) in list(store.items()):
+                if expires_at and expires_at <= now:
+                    del store[key]
+            if name == b"GET":
+                entry = store.get(args[0])
+                reply = b"$-1\r\n" if entry is None else b"$%d\r\n%s\r\n" % (len(entry[0]), entry[0])
+            elif name == b"SET":
+                if b"NX" in args and args[0] in store:
+                    reply = b"$-1\r\n"
+                else:
+                    expires_at = now + int(args[args.index(b"PX") + 1]) / 1000 if b"PX" in args else 0
+                    store[args[0]] = (args[1], expires_at)
+                    reply = b"+OK\r\n"
+            elif name == b"DEL":
+                reply = b":%d\r\n" % sum(store.pop(key, None) is not None for key in args)
+            elif name == b"INCR":
+                value = int(store.get(args[0], (b"0", 0))[0]) + 1
+                store[args[0]] = (str(value).encode(), 0)
+                reply = b":%d\r\n" % value
+            elif name == b"PTTL":
+                entry = store.get(args[0])
+                reply = b":-2\r\n" if entry is None else b":%d\r\n" % (int((entry[1] - now) * 1000) if entry[1] else -1)
+            elif name == b"SCAN":
+                prefix = args[args.index(b"MATCH") + 1].rstrip(b"*")
+                keys = [key for key in store if key.startswith(prefix)]
+                reply = b"*2\r\n$1\r\n0\r\n*%d\r\n" % len(keys)
+                reply += b"".join(b"$%d\r\n%s\r\n" % (len(key), key) for key in keys)
+            else:
+                reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+
+@pytest.fixture
+def redis_url():
+    """
+    Run a local stand-in for a Redis server.
+    
+    Yields:
+        URL of the server
+    """
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), FakeRedisHandler)
+    server.daemon_threads = True
+    server.store = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["memory", "file", "redis"])
+def backend(request, tmp_path):
+    """Build each kind of cache backend."""
+    if request.param == "memory":
+        return MemoryBackend()
+    if request.param == "file":
+        return FileBackend(str(tmp_path / "cache"), slots=64, slot_size=1024)
+    return RedisBackend(request.getfixturevalue("redis_url"))
+
+
+@pytest.fixture
+def statements():
+    """
+    Record the SQL statements executed against the test engine.
+    
+    Yields:
+        List of executed statements
+    """
+    executed = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def _create_plan(title: str = "Basic Plan") -> dict:
+    response = client.post(
+        "/api/plans/",
+        json={"title": title, "description": "Plan", "price": 19.99, "btnMessage": "Buy"},
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_backend_get_set_delete(backend):
+    """Test storing, expiring and removing entries."""
+    assert backend.get("missing") is None
+    backend.set("key", b"value", 60)
+    assert backend.get("key") == b"value"
+    backend.set("key", b"other", 60)
+    assert backend.get("key") == b"other"
+    backend.delete("key")
+    assert backend.get("key") is None
+    backend.set("short", b"value", 0.05)
+    time.sleep(0.1)
+    assert backend.get("short") is None
+
+
+def test_backend_clear_keeps_counters(backend):
+    """Test that counters survive a clear while entries do not."""
+    assert backend.incr("counter") == 1
+    assert backend.incr("counter") == 2
+    backend.set("key", b"value", 60)
+    backend.clear()
+    assert backend.get("key") is None
+    assert backend.incr("counter") == 3
+    assert backend.epoch
+
+
+def test_backend_delete_prefix(backend):
+    """Test removing the entries under a key prefix."""
+    backend.incr("bundle:counter")
+    backend.set("bundle:a", b"a", 60)
+    backend.set("bundle:b", b"b", 60)
+    backend.set("response:a", b"a", 60)
+    assert backend.delete_prefix("bundle:") == 2
+    assert backend.get("bundle:a") is None
+    assert backend.get("response:a") == b"a"
+    assert backend.incr("bundle:counter") == 2
+
+
+def test_file_backend_is_shared_between_instances(tmp_path):
+    """Test that two workers mapping the same file see each other's writes."""
+    path = str(tmp_path / "cache")
+    first = FileBackend(path, slots=64, slot_size=1024)
+    second = FileBackend(path)
+    assert (second.slots, second.slot_size, second.epoch) == (64, 1024, first.epoch)
+    first.set("key", b"value", 60)
+    assert second.get("key") == b"value"
+    first.incr("version:plans")
+    assert second.incr("version:plans") == 2
+
+
+def test_file_backend_skips_oversized_values(tmp_path):
+    """Test that values larger than a slot are not stored."""
+    backend = FileBackend(str(tmp_path / "cache"), slots=4, slot_size=256)
+    backend.set("key", b"x" * 512, 60)
+    assert backend.get("key") is None
+
+
+def test_file_backend_evicts_entries_before_counters(tmp_path):
+    """Test that a full probe window overwrites entries, not counters."""
+    backend = FileBackend(str(tmp_path / "cache"), slots=4, slot_size=256)
+    backend.incr("version:plans")
+    for index in range(20):
+        backend.set(f"key{index}", b"value", 60)
+    assert backend.incr("version:plans") == 2
+
+
+def test_file_backend_keeps_counters_apart_from_entries(tmp_path):
+    """Test that no number of entries or counters overwrites a counter."""
+    backend = FileBackend(str(tmp_path / "cache"), slots=4, slot_size=256)
+    tables = [f"table{index}" for index in range(12)]
+    for table in tables:
+        backend.incr(f"version:{table}")
+    for index in range(20):
+        backend.set(f"key{index}", b"value", 60)
+    assert [backend.incr(f"version:{table}") for table in tables] == [2] * 12
+    assert backend.get("key19") == b"value"
+
+
+def test_redis_delete_prefix_pipelines_ttl_checks(redis_url, monkeypatch):
+    """Test that a prefix delete sends one request per scanned page."""
+    backend = RedisBackend(redis_url)
+    backend.incr("bundle:counter")
+    for index in range(10):
+        backend.set(f"bundle:{index}", b"value", 60)
+    commands = []
+    execute = backend.execute
+    monkeypatch.setattr(backend, "execute", lambda *args: commands.append(args[0]) or execute(*args))
+    assert backend.delete_prefix("bundle:") == 10
+    assert commands == ["SCAN", "DEL"]
+    assert backend.incr("bundle:counter") == 2
+
+
+def test_get_is_served_from_cache(test_db, statements):
+    """Test that a repeated GET runs no SQL, in this worker or another."""
+    plan = _create_plan()
+    first = client.get(f"/api/plans/{plan['id']}")
+    statements.clear()
+    
+    second = client.get(f"/api/plans/{plan['id']}")
+    assert statements == []
+    assert second.json() == first.json()
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.headers["content-type"] == "application/json"
+    
+    # A worker with a cold L1 reads the entry from the shared tier
+    response_cache.l1.clear()
+    assert client.get(f"/api/plans/{plan['id']}").json() == first.json()
+    assert statements == []
+
+
+def test_cached_get_answers_if_none_match(test_db):
+    """Test that a cache hit still honours If-None-Match."""
+    _create_plan()
+    etag = client.get("/api/plans/").headers["etag"]
+    response = client.get("/api/plans/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+def test_write_bypasses_cached_responses(test_db):
+    """Test that a write changes the key the next read looks up."""
+    plan = _create_plan()
+    assert len(client.get("/api/plans/").json()) == 1
+    client.put(f"/api/plans/{plan['id']}", json={"title": "Changed"})
+    _create_plan("Second")
+    
+    response = client.get("/api/plans/")
+    assert [item["title"] for item in response.json()] == ["Changed", "Second"]
+    assert client.get(f"/api/plans/{plan['id']}").json()["title"] == "Changed"
+
+
+def test_errors_are_not_cached(test_db, statements, monkeypatch):
+    """Test that only successful responses are stored."""
+    monkeypatch.setattr(settings, "EXISTENCE_ENABLED", False)
+    assert client.get("/api/plans/999").status_code == 404
+    statements.clear()
+    assert client.get("/api/plans/999").status_code == 404
+    assert statements != []
+
+
+def test_shared_versions_expire_crud_entries(test_db, monkeypatch, tmp_path):
+    """Test that a write by another worker makes cached rows stale."""
+    monkeypatch.setattr(crud_base, "backend", FileBackend(str(tmp_path / "cache")))
+    
+    async def run() -> None:
+        async with TestingSessionLocal() as db:
+            plan = await plan_crud.create(
+                db, obj_in=PlanCreate(title="First", description="Plan", price=10, btnMessage="Buy")
+            )
+            plan_id = plan.id
+            assert (await plan_crud.get(db, id=plan_id)).title == "First"
+        
+        # Simulate another worker committing an update
+        async with TestingSessionLocal() as db:
+            await db.execute(plan_crud.model.__table__.update().values(title="Changed"))
+            await db.commit()
+        async with TestingSessionLocal() as db:
+            assert (await plan_crud.get(db, id=plan_id)).title == "First"
+        versions.bump(["plans"])
+        async with TestingSessionLocal() as db:
+            assert (await plan_crud.get(db, id=plan_id)).title == "Changed"
+    
+    asyncio.run(run())
+
+
+def test_commits_bump_versions_off_the_event_loop(test_db, monkeypatch, redis_url):
+    """Test that a blocking backend is never called from the thread running the loop."""
+    redis = RedisBackend(redis_url)
+    monkeypatch.setattr(cache_module, "backend", redis)
+    monkeypatch.setattr(versions, "backend", redis)
+    threads = []
+    incr = redis.incr
+    
+    def record_incr(key):
+        threads.append(threading.current_thread())
+        return incr(key)
+    
+    monkeypatch.setattr(redis, "incr", record_incr)
+    
+    async def run() -> int:
+        async with TestingSessionLocal() as db:
+            await plan_crud.create(
+                db, obj_in=PlanCreate(title="First", description="Plan", price=10, btnMessage="Buy")
+            )
+        # Lookups wait for the bumps queued by earlier commits
+        return await call_backend(versions.get, "plans")
+    
+    assert asyncio.run(run()) == 1
+    assert threads and threading.main_thread() not in threads
+
+
+@pytest.fixture
+def expired_responses(monkeypatch):
+    """Expire cached responses at once and bypass the CRUD cache."""
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_TTL", 0)
+    monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+    # Keep ETags of the per-process counters from changing with the clock
+    now = time.time()
+    monkeypatch.setattr(deps, "time", SimpleNamespace(time=lambda: now))
+
+
+async def _get_sequence(url: str, count: int) -> list:
+    """Send GETs one after another, letting background refreshes finish in between."""
+    transport = httpx.ASGITransport(app=app)
+    responses = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        for _ in range(count):
+            responses.append(await http.get(url))
+            time.sleep(0.01)
+            await asyncio.gather(*routing.refresh_tasks.values())
+    return responses
+
+
+def test_stale_response_is_served_and_refreshed(test_db, expired_responses, statements):
+    """Test that an expired entry is returned at once and refreshed behind it."""
+    client.post("/api/types/", json={"title": "Old", "features": []})
+    
+    async def run() -> list:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            first = await http.get("/api/types/")
+            time.sleep(0.01)
+            # A change the version counters do not see, e.g. made by another tool
+            with engine.begin() as conn:
+                conn.execute(Type.__table__.update().values(title="New"))
+            statements.clear()
+            second = await http.get("/api/types/")
+            assert statements == []
+            await asyncio.gather(*routing.refresh_tasks.values())
+            assert statements != []
+            time.sleep(0.01)
+            third = await http.get("/api/types/")
+            await asyncio.gather(*routing.refresh_tasks.values())
+            return [first, second, third]
+    
+    first, second, third = asyncio.run(run())
+    assert first.json()[0]["title"] == "Old"
+    assert second.json()[0]["title"] == "Old"
+    assert third.json()[0]["title"] == "New"
+    assert routing.stale_hits_total.value(route="types") >= 2
+
+
+def test_staleness_is_bounded_per_router(test_db, expired_responses, monkeypatch, statements):
+    """Test that a router with no allowed staleness refreshes synchronously."""
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_MAX_STALE_ROUTERS", {"plans": 0})
+    _create_plan()
+    statements.clear()
+    asyncio.run(_get_sequence("/api/plans/", 3))
+    assert len(statements) == 3
+    assert routing.refresh_tasks == {}
+
+
+def test_cache_control_exposes_policy(test_db, monkeypatch):
+    """Test that responses announce the stale-while-revalidate window."""
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_MAX_STALE_ROUTERS", {"faqs": 120})
+    response = client.get("/api/plans/")
+    assert response.headers["cache-control"] == "max-age=0, stale-while-revalidate=30"
+    assert client.get("/api/plans/").headers["cache-control"] == response.headers["cache-control"]
+    assert client.get("/api/faqs/").headers["cache-control"] == "max-age=0, stale-while-revalidate=120"
+
+
+def test_refresh_header_requires_token(test_db, statements):
+    """Test that clients cannot force a cache bypass."""
+    _create_plan()
+    client.get("/api/plans/")
+    statements.clear()
+    client.get("/api/plans/", headers={routing.REFRESH_HEADER: "guess"})
+    assert statements == []
@@ -0,0 +1,85 @@
+"""
+Tests for streaming table exports.
+
+This module contains tests for the NDJSON and CSV export endpoints.
+"""
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+
+from app.core import streaming
+from app.core.config import settings
+from app.tests.test_category import client, test_db  # reuse test setup
+
+
+def _create_plans(count: int) -> list:
+    ids = []
+    for i in range(count):
+        response = client.post(
+            "/api/plans/",
+            json={"title": f"Plan {i}", "description": "Plan", "price": 10 + i, "btnMessage": "Buy"},
+        )
+        ids.append(response.json()["id"])
+    return ids
+
+
+def test_ndjson_export_streams_every_row(test_db, monkeypatch):
+    """Test that an NDJSON export holds every row in id order, across batches."""
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    ids = _create_plans(5)
+    response = client.get("/api/plans/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="plans.ndjson"'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == ids
+    assert rows[0] == client.get(f"/api/plans/{ids[0]}").json()
+    
+    etag = response.headers["etag"]
+    response = client.get("/api/plans/export", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_csv_export_flattens_records(test_db):
+    """Test CSV exports, with lists written as JSON and relationships left out."""
+    image_id = client.post("/api/images/", json={"src": "a.png"}).json()["id"]
+    client.post("/api/types/", json={"title": "Web", "features": ["Fast", "Safe"], "img_id": image_id})
+    response = client.get("/api/types/export", params={"format": "csv"})
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert list(rows[0]) == ["title", "description", "features", "img_id", "id"]
+    assert rows[0]["features"] == '["Fast","Safe"]'
+    assert rows[0]["img_id"] == str(image_id)
+    
+    response = client.get("/api/faqs/export", params={"format": "csv", "fields": "question"})
+    assert response.text.splitlines() == ["question"]
+    assert client.get("/api/faqs/export", params={"format": "xml"}).status_code == 422
+
+
+def test_encoders_send_bounded_chunks(monkeypatch):
+    """Test that rows are encoded in chunks of at most the batch size."""
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    
+    async def records():
+        for i in range(5):
+            yield {"id": i, "tags": ["a"]}
+    
+    async def collect(chunks):
+        return [chunk async for chunk in chunks]
+    
+    ndjson = asyncio.run(collect(streaming.encode_ndjson(records())))
+    assert [chunk.count(b"\n") for chunk in ndjson] == [2, 2, 1]
+    csv_chunks = asyncio.run(collect(streaming.encode_csv(records(), ["id", "tags"])))
+    assert b"".join(csv_chunks).decode().splitlines()[1] == '0,"[""a""]"'
+    assert len(csv_chunks) == 3
+
+
+@pytest.mark.parametrize("url", ["/api/categories/export", "/api/solutions-data/export"])
+def test_export_routes_are_not_detail_routes(test_db, url):
+    """Test that export paths are not read as record ids."""
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.text == ""
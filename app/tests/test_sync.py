@@ -0,0 +1,117 @@
+"""
+Tests for the content sync script.
+
+This module contains tests for syncing tables with JSON, NDJSON and CSV files.
+"""
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.tests.test_category import DATABASE_PATH, client, test_db  # reuse test setup
+from sync import main
+
+DATABASE_URL = f"sqlite+aiosqlite:///{DATABASE_PATH}"
+
+
+def _sync(capsys, *argv: str) -> str:
+    main([*argv, "--async-database-url", DATABASE_URL])
+    return capsys.readouterr().out.splitlines()[0]
+
+
+def _write(tmp_path, name: str, records: list) -> str:
+    path = tmp_path / name
+    path.write_text(json.dumps(records))
+    return str(path)
+
+
+def test_sync_writes_only_the_differences(test_db, tmp_path, capsys, monkeypatch):
+    """Test that a sync creates, updates and deletes by natural key, by chunks."""
+    monkeypatch.setattr(settings, "BULK_CHUNK_SIZE", 2)
+    kept = client.post("/api/faqs/", json={"question": "Kept?", "answer": "Yes"}).json()
+    changed = client.post("/api/faqs/", json={"question": "Changed?", "answer": "Old"}).json()
+    client.post("/api/faqs/", json={"question": "Gone?", "answer": "Yes"})
+    assert len(client.get("/api/faqs/").json()) == 3
+    path = _write(tmp_path, "faqs.json", [
+        {"question": "Kept?", "answer": "Yes"},
+        {"question": "Changed?", "answer": "New"},
+        {"question": "New 1?", "answer": "Yes"},
+        {"question": "New 2?", "answer": "Yes"},
+        {"question": "New 3?", "answer": "Yes"},
+    ])
+    
+    assert _sync(capsys, "faqs", path, "--dry-run") == (
+        "Would write faqs: 3 created, 1 updated, 1 deleted, 1 unchanged"
+    )
+    assert len(client.get("/api/faqs/").json()) == 3
+    
+    assert _sync(capsys, "FAQ", path) == "Wrote faqs: 3 created, 1 updated, 1 deleted, 1 unchanged"
+    faqs = {faq["question"]: faq for faq in client.get("/api/faqs/").json()}
+    assert sorted(faqs) == ["Changed?", "Kept?", "New 1?", "New 2?", "New 3?"]
+    assert faqs["Kept?"]["id"] == kept["id"]
+    assert faqs["Changed?"] == {**changed, "answer": "New"}
+    assert len(client.get("/api/faqs/").json()) == 5
+    
+    assert _sync(capsys, "faqs", path) == "Wrote faqs: 0 created, 0 updated, 0 deleted, 5 unchanged"
+
+
+def test_sync_keeps_missing_rows_and_unset_fields(test_db, tmp_path, capsys):
+    """Test that --keep-missing keeps rows and fields left out of the file are kept."""
+    client.post("/api/types/", json={"title": "Web", "description": "Sites", "features": ["Fast"]})
+    client.post("/api/types/", json={"title": "App"})
+    path = tmp_path / "types.ndjson"
+    path.write_text('{"title": "Web", "features": ["Fast", "Safe"]}\n\n{"title": "Api"}\n')
+    
+    assert _sync(capsys, "types", str(path), "--keep-missing") == (
+        "Wrote types: 1 created, 1 updated, 0 deleted, 0 unchanged"
+    )
+    types = {type_["title"]: type_ for type_ in client.get("/api/types/").json()}
+    assert sorted(types) == ["Api", "App", "Web"]
+    assert types["Web"]["description"] == "Sites"
+    assert types["Web"]["features"] == ["Fast", "Safe"]
+
+
+def test_sync_by_id_round_trips_csv_exports(test_db, tmp_path, capsys):
+    """Test that models without a natural key sync by id, from a CSV export."""
+    for i in range(3):
+        client.post(
+            "/api/plans/",
+            json={"title": f"Plan {i}", "description": "Plan", "price": 10 + i, "btnMessage": "Buy"},
+        )
+    export = client.get("/api/plans/export", params={"format": "csv"}).text
+    path = tmp_path / "plans.csv"
+    path.write_text(export)
+    assert _sync(capsys, "plans", str(path)) == (
+        "Wrote plans: 0 created, 0 updated, 0 deleted, 3 unchanged"
+    )
+    
+    lines = export.splitlines()
+    path.write_text("\n".join([lines[0], lines[1].replace("Plan 0", "First"), lines[3]]) + "\n")
+    assert _sync(capsys, "Plan", str(path)) == (
+        "Wrote plans: 0 created, 1 updated, 1 deleted, 1 unchanged"
+    )
+    plans = client.get("/api/plans/").json()
+    assert [plan["title"] for plan in plans] == ["First", "Plan 2"]
+    assert len(client.get("/api/plans/").json()) == 2
+
+
+@pytest.mark.parametrize(
+    "model, records, message",
+    [
+        ("nothing", [], "Unknown model nothing"),
+        ("idempotency_keys", [], "idempotency_keys has no CRUD object and cannot be synced"),
+        ("faqs", [{"question": "Q?"}, {"question": "Q?", "answer": "A"}], "Record 1 is invalid"),
+        ("faqs", [{"question": "Q?", "answer": "A"}] * 2, "Two records have the question 'Q\\?'"),
+        (
+            "plans",
+            [{"title": "T", "description": "D", "price": 1, "btnMessage": "B"}],
+            "every record needs an id",
+        ),
+    ],
+)
+def test_invalid_content_writes_nothing(test_db, tmp_path, model, records, message):
+    """Test that invalid content is reported before anything is written."""
+    path = _write(tmp_path, "content.json", records)
+    with pytest.raises(SystemExit, match=message):
+        main([model, path, "--async-database-url", DATABASE_URL])
+    assert len(client.get("/api/faqs/").json()) == 0
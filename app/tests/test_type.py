@@ -39,9 +39,10 @@ def test_create_type_with_image(test_db):
     assert image_response.status_code == 201
     image_id = image_response.json()["id"]
     
-    # Now create a type that references this image
+    # Now create a type that references this image, embedding it in the response
     response = client.post(
         "/api/types/",
+        params={"expand": "img"},
         json={
             "title": "Service Type with Image",
             "description": "Description with image",
@@ -0,0 +1,114 @@
+"""
+Tests for upserts by natural key.
+
+This module contains tests for the by-key endpoints and CRUDBase.upsert.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.crud.base import CRUDBase
+from app.crud.faq import faq as faq_crud
+from app.models.category import Category
+from app.schemas.faq import FAQCreate
+from app.tests.test_category import (  # reuse test setup
+    DATABASE_PATH,
+    async_engine,
+    client,
+    test_db,
+)
+
+
+@pytest.fixture
+def statements():
+    """
+    Record the SQL statements executed against the test engine.
+    
+    Yields:
+        List of executed statements
+    """
+    executed = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def test_upsert_creates_then_replaces(test_db, statements):
+    """Test that a by-key write creates a record, then updates it, without reading it."""
+    assert client.get("/api/types/1").status_code == 404
+    body = {"title": "Web", "description": "Sites", "features": ["Fast"]}
+    statements.clear()
+    response = client.put("/api/types/by-key/Web", json=body)
+    assert response.status_code == 201
+    assert [sql.split()[0] for sql in statements] == ["UPDATE", "INSERT"]
+    type_id = response.json()["id"]
+    assert client.get(f"/api/types/{type_id}").json()["features"] == ["Fast"]
+    
+    statements.clear()
+    response = client.put("/api/types/by-key/Web", json={"title": "Web", "features": ["Safe"]})
+    assert response.status_code == 200
+    assert response.json() == {
+        "id": type_id, "title": "Web", "description": None, "features": ["Safe"],
+        "img_id": None, "img": None,
+    }
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE types SET") and "RETURNING" in statements[0]
+    assert client.get(f"/api/types/{type_id}").json()["features"] == ["Safe"]
+    assert len(client.get("/api/types/").json()) == 1
+
+
+def test_repeated_upsert_on_a_pooled_connection_updates(test_db):
+    """Test that an upsert reusing the connection of the last insert reports an update."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{DATABASE_PATH}", pool_size=1)
+    sessions = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    
+    async def run() -> list:
+        created = []
+        for answer in ("A", "A", "B"):
+            async with sessions() as db:
+                faq_in = FAQCreate(question="Q?", answer=answer)
+                created.append((await faq_crud.upsert(db, obj_in=faq_in))[1])
+        await engine.dispose()
+        return created
+    
+    assert asyncio.run(run()) == [True, False, False]
+    assert [faq["answer"] for faq in client.get("/api/faqs/").json()] == ["B"]
+
+
+def test_keys_may_hold_slashes(test_db):
+    """Test that keys are read from the rest of the path."""
+    response = client.put("/api/images/by-key/img/logo.png", json={"src": "img/logo.png"})
+    assert response.status_code == 201
+    response = client.put("/api/images/by-key/img/logo.png", json={"src": "img/logo.png"})
+    assert response.status_code == 200
+    assert [image["src"] for image in client.get("/api/images/").json()] == ["img/logo.png"]
+
+
+def test_key_must_match_the_body(test_db):
+    """Test that the key in the path and the body must be the same."""
+    response = client.put("/api/faqs/by-key/Why%3F", json={"question": "How?", "answer": "So."})
+    assert response.status_code == 400
+    assert client.get("/api/faqs/").json() == []
+
+
+def test_duplicate_keys_conflict(test_db):
+    """Test that natural keys are unique for plain creates too."""
+    body = {"title": "Item", "pricing": "$1"}
+    assert client.put("/api/processing-info/by-key/Item", json=body).status_code == 201
+    assert client.post("/api/processing-info/", json=body).status_code == 409
+
+
+def test_natural_key_needs_a_unique_index():
+    """Test that a natural key must be backed by a unique index."""
+    
+    class CRUDCategory(CRUDBase):
+        natural_key = "link"
+    
+    with pytest.raises(ValueError):
+        CRUDCategory(Category)
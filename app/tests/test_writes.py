@@ -0,0 +1,136 @@
+"""
+Tests for single-statement writes.
+
+This module contains query-count tests for the update and delete endpoints.
+"""
+import pytest
+from sqlalchemy import text
+
+from app.tests.test_category import async_engine, client, engine, test_db  # reuse test setup
+from app.tests.test_get_many import statements  # reuse the statement recorder
+
+
+def _create_plan(**values) -> dict:
+    plan = {"title": "Basic", "description": "Plan", "price": 10, "btnMessage": "Buy", **values}
+    return client.post("/api/plans/", json=plan).json()
+
+
+@pytest.fixture
+def no_returning(monkeypatch):
+    """Make the test dialect behave like one without RETURNING, such as MySQL."""
+    dialect = async_engine.sync_engine.dialect
+    monkeypatch.setattr(dialect, "update_returning", False)
+    monkeypatch.setattr(dialect, "delete_returning", False)
+
+
+def test_update_is_one_statement(test_db, statements):
+    """Test that an update runs a single UPDATE ... RETURNING, with no read."""
+    plan = _create_plan()
+    statements.clear()
+    response = client.put(f"/api/plans/{plan['id']}", json={"price": 12.5})
+    assert response.json() == {**plan, "price": 12.5}
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE plans SET price=?")
+    assert "RETURNING" in statements[0]
+    assert client.get(f"/api/plans/{plan['id']}").json()["price"] == 12.5
+
+
+def test_noop_update_writes_nothing(test_db, statements):
+    """Test that an update changing nothing invalidates no cache entry."""
+    plan = _create_plan()
+    etag = client.get("/api/plans/").headers["etag"]
+    client.get(f"/api/plans/{plan['id']}")
+    statements.clear()
+    response = client.put(f"/api/plans/{plan['id']}", json={"title": "Basic", "price": 10})
+    assert response.json() == plan
+    # The UPDATE matched no row, and the record was read from the cache
+    assert [sql.split()[0] for sql in statements] == ["UPDATE"]
+    assert client.get("/api/plans/").headers["etag"] == etag
+
+
+def test_delete_is_one_statement(test_db, statements):
+    """Test that a delete runs a single DELETE ... RETURNING, with no read."""
+    plan = _create_plan()
+    item = client.post("/api/processing-info/", json={"title": "Cards", "pricing": "2%"}).json()
+    statements.clear()
+    assert client.delete(f"/api/plans/{plan['id']}").status_code == 204
+    assert len(statements) == 1
+    assert statements[0].startswith("DELETE FROM plans")
+    assert client.delete(f"/api/plans/{plan['id']}").status_code == 404
+    assert client.get("/api/plans/").json() == []
+    
+    # Endpoints answering with the removed record get it from RETURNING
+    assert client.delete(f"/api/processing-info/{item['id']}").json() == item
+
+
+def test_delete_cascades_without_reading_the_record(test_db, statements):
+    """Test that deleting an image still deletes the types using it."""
+    image_id = client.post("/api/images/", json={"src": "a.png"}).json()["id"]
+    client.post("/api/types/", json={"title": "Web", "img_id": image_id})
+    statements.clear()
+    assert client.delete(f"/api/images/{image_id}").status_code == 204
+    assert not [sql for sql in statements if "FROM images" in sql and sql.startswith("SELECT")]
+    assert client.get("/api/types/").json() == []
+
+
+def test_missing_records_are_not_written(test_db):
+    """Test that updates and deletes of missing records answer 404."""
+    assert client.put("/api/faqs/999", json={"answer": "A"}).status_code == 404
+    assert client.put("/api/types/999", json={}).status_code == 404
+    assert client.delete("/api/faqs/999").status_code == 404
+    assert client.delete("/api/solutions-data/999").status_code == 404
+
+
+def test_fallback_writes_with_one_statement(test_db, statements, no_returning):
+    """Test that dialects without RETURNING write without reading the record first."""
+    plan = _create_plan()
+    item = client.post("/api/processing-info/", json={"title": "Cards", "pricing": "2%"}).json()
+    statements.clear()
+    response = client.put(f"/api/plans/{plan['id']}", json={"title": "Basic", "price": 12})
+    assert response.json() == {**plan, "price": 12}
+    # The row count of the UPDATE tells it updated the record, which is read back
+    assert [sql.split()[0] for sql in statements] == ["UPDATE", "SELECT"]
+    assert statements[0].startswith("UPDATE plans SET title=?, price=? WHERE")
+    assert "FOR UPDATE" not in statements[1]
+    
+    client.get(f"/api/plans/{plan['id']}")
+    statements.clear()
+    assert client.put(f"/api/plans/{plan['id']}", json={"price": 12}).json() == response.json()
+    assert [sql.split()[0] for sql in statements] == ["UPDATE"]
+    
+    statements.clear()
+    assert client.delete(f"/api/plans/{plan['id']}").status_code == 204
+    assert [sql.split()[0] for sql in statements] == ["DELETE"]
+    assert client.delete(f"/api/plans/{plan['id']}").status_code == 404
+    assert client.put(f"/api/plans/{plan['id']}", json={"price": 1}).status_code == 404
+    
+    # Endpoints answering with the removed record read it first
+    assert client.delete(f"/api/processing-info/{item['id']}").json() == item
+    assert client.delete(f"/api/processing-info/{item['id']}").status_code == 404
+
+
+def test_fallback_deletes_cascade(test_db, statements, no_returning):
+    """Test that deletes without RETURNING still delete the types using an image."""
+    image_id = client.post("/api/images/", json={"src": "a.png"}).json()["id"]
+    client.post("/api/types/", json={"title": "Web", "img_id": image_id})
+    statements.clear()
+    assert client.delete(f"/api/images/{image_id}").status_code == 204
+    assert not [sql for sql in statements if "FROM images" in sql and sql.startswith("SELECT")]
+    assert client.get("/api/types/").json() == []
+
+
+def test_fallback_ignores_stale_cache_entries(test_db, no_returning):
+    """Test that writes without RETURNING see rows changed by another worker."""
+    plan = _create_plan()
+    client.get(f"/api/plans/{plan['id']}")
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE plans SET price = 99 WHERE id = :id"), {"id": plan["id"]})
+    # The cache still holds price 10, but the row must be updated
+    assert client.put(f"/api/plans/{plan['id']}", json={"price": 10}).json()["price"] == 10
+    with engine.connect() as conn:
+        assert conn.scalar(text("SELECT price FROM plans WHERE id = :id"), {"id": plan["id"]}) == 10
+    
+    client.get(f"/api/plans/{plan['id']}")
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM plans WHERE id = :id"), {"id": plan["id"]})
+    assert client.delete(f"/api/plans/{plan['id']}").status_code == 404
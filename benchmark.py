@@ -0,0 +1,270 @@
+"""
+Script to benchmark the async database stack.
+
+This script compares the throughput of the async stack used by the API with
+the threadpool model it replaced. Both models serve ``GET /plans/{id}`` by
+reading one row, without any caching:
+
+- ``threadpool``: a sync endpoint using a blocking connection, run in
+  Starlette's threadpool (40 threads by default);
+- ``async``: an async endpoint using an ``AsyncSession``.
+
+Requests are sent in-process through the ASGI interface by ``--concurrency``
+concurrent clients, so the results measure the concurrency model rather than
+the HTTP server. Both engines get a pool of ``--pool-size`` connections.
+Against a local database, ``--latency`` adds a simulated round-trip to each
+read to model a remote server.
+
+Usage:
+    python benchmark.py --concurrency 500 --requests 5000
+    python benchmark.py --database-url sqlite:///bench.db \\
+        --async-database-url sqlite+aiosqlite:///bench.db --seed 100
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import anyio
+import httpx
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import Engine, create_engine, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.base import Base
+from app.models.plan import Plan
+
+
+class Result(NamedTuple):
+    """Outcome of a benchmark run."""
+    model: str
+    requests: int
+    errors: int
+    seconds: float
+    p50: float
+    p99: float
+    
+    @property
+    def throughput(self) -> float:
+        """Requests completed per second."""
+        return self.requests / self.seconds
+
+
+def _serialize(plan: Plan) -> Dict[str, Any]:
+    return {"id": plan.id, "title": plan.title, "price": float(plan.price)}
+
+
+def build_threadpool_app(engine: Engine, latency: float = 0.0) -> FastAPI:
+    """
+    Build an app reading plans through a blocking session in the threadpool.
+    
+    Args:
+        engine: Sync engine
+        latency: Simulated round-trip added to each read, in seconds
+        
+    Returns:
+        Application serving ``GET /plans/{plan_id}``
+    """
+    app = FastAPI()
+    
+    @app.get("/plans/{plan_id}")
+    def read_plan(plan_id: int) -> Dict[str, Any]:
+        with Session(engine) as db:
+            plan = db.get(Plan, plan_id)
+            time.sleep(latency)
+            if plan is None:
+                raise HTTPException(status_code=404, detail="Plan not found")
+            return _serialize(plan)
+    
+    return app
+
+
+def build_async_app(engine: AsyncEngine, latency: float = 0.0) -> FastAPI:
+    """
+    Build an app reading plans through an async session.
+    
+    Args:
+        engine: Async engine
+        latency: Simulated round-trip added to each read, in seconds
+        
+    Returns:
+        Application serving ``GET /plans/{plan_id}``
+    """
+    app = FastAPI()
+    
+    @app.get("/plans/{plan_id}")
+    async def read_plan(plan_id: int) -> Dict[str, Any]:
+        async with AsyncSession(engine) as db:
+            plan = await db.get(Plan, plan_id)
+            await asyncio.sleep(latency)
+            if plan is None:
+                raise HTTPException(status_code=404, detail="Plan not found")
+            return _serialize(plan)
+    
+    return app
+
+
+async def run_load(
+    model: str,
+    app: FastAPI,
+    ids: List[int],
+    *,
+    requests: int,
+    concurrency: int,
+    threads: int = 40,
+) -> Result:
+    """
+    Send requests to an app from concurrent clients.
+    
+    Args:
+        model: Name of the model being measured
+        app: Application to query
+        ids: Plan ids to request, in turn
+        requests: Total number of requests
+        concurrency: Number of concurrent clients
+        threads: Size of the threadpool running sync endpoints
+        
+    Returns:
+        Throughput and latency of the run
+    """
+    anyio.to_thread.current_default_thread_limiter().total_tokens = threads
+    latencies: List[float] = []
+    errors = 0
+    sent = 0
+    transport = httpx.ASGITransport(app=app)
+    
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        
+        async def client() -> None:
+            nonlocal errors, sent
+            while sent < requests:
+                plan_id = ids[sent % len(ids)]
+                sent += 1
+                started = time.perf_counter()
+                response = await http.get(f"/plans/{plan_id}")
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        seconds = time.perf_counter() - started
+    
+    latencies.sort()
+    return Result(
+        model,
+        len(latencies),
+        errors,
+        seconds,
+        latencies[len(latencies) // 2],
+        latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    )
+
+
+def seed(engine: Engine, count: int) -> None:
+    """
+    Create the tables and insert plans until there are at least ``count``.
+    
+    Args:
+        engine: Sync engine
+        count: Minimum number of plans
+    """
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        existing = db.scalar(select(func.count()).select_from(Plan))
+        db.add_all(
+            Plan(title=f"Plan {i}", description="Benchmark plan", price=10, btnMessage="Buy")
+            for i in range(existing, count)
+        )
+        db.commit()
+
+
+def benchmark(
+    engine: Engine,
+    async_engine: AsyncEngine,
+    *,
+    requests: int = 5000,
+    concurrency: int = 500,
+    threads: int = 40,
+    latency: float = 0.0,
+) -> List[Result]:
+    """
+    Run the benchmark against both models.
+    
+    Args:
+        engine: Sync engine used by the threadpool model
+        async_engine: Async engine used by the async model
+        requests: Requests sent to each model
+        concurrency: Number of concurrent clients
+        threads: Size of the threadpool running sync endpoints
+        latency: Simulated round-trip added to each read, in seconds
+        
+    Returns:
+        Result of each model
+    """
+    with Session(engine) as db:
+        ids = list(db.scalars(select(Plan.id).order_by(Plan.id)))
+    if not ids:
+        raise SystemExit("No plans to read; pass --seed to create some")
+    
+    async def run() -> List[Result]:
+        results = []
+        for model, app in (
+            ("threadpool", build_threadpool_app(engine, latency)),
+            ("async", build_async_app(async_engine, latency)),
+        ):
+            results.append(
+                await run_load(
+                    model, app, ids, requests=requests, concurrency=concurrency, threads=threads
+                )
+            )
+        await async_engine.dispose()
+        return results
+    
+    return asyncio.run(run())
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Parse the command line and run the benchmark.
+    
+    Args:
+        argv: Command line arguments, sys.argv by default
+    """
+    parser = argparse.ArgumentParser(description="Compare the threadpool and async models.")
+    parser.add_argument("--requests", type=int, default=5000, help="requests per model")
+    parser.add_argument("--concurrency", type=int, default=500, help="concurrent clients")
+    parser.add_argument("--threads", type=int, default=40, help="threadpool size")
+    parser.add_argument("--pool-size", type=int, default=settings.DB_POOL_SIZE, help="connections per engine")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL, help="sync database URL")
+    parser.add_argument("--async-database-url", default=settings.ASYNC_DATABASE_URL, help="async database URL")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated round-trip in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="create tables and at least this many plans")
+    args = parser.parse_args(argv)
+    
+    engine = create_engine(args.database_url, pool_size=args.pool_size, max_overflow=0)
+    async_engine = create_async_engine(
+        args.async_database_url, pool_size=args.pool_size, max_overflow=0
+    )
+    if args.seed:
+        seed(engine, args.seed)
+    results = benchmark(
+        engine,
+        async_engine,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        threads=args.threads,
+        latency=args.latency,
+    )
+    print(f"{'model':<12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for result in results:
+        print(
+            f"{result.model:<12}{result.throughput:>10.0f}{result.p50 * 1000:>10.1f}"
+            f"{result.p99 * 1000:>10.1f}{result.errors:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
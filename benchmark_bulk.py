@@ -0,0 +1,147 @@
+"""
+Script to benchmark bulk creates.
+
+This script compares the throughput of creating plans one request at a time
+through ``POST /api/plans/``, which commits and refreshes every row, with
+``POST /api/plans/bulk``, which inserts chunks of ``BULK_CHUNK_SIZE`` rows
+with one statement and one commit each.
+
+Requests are sent in-process through the ASGI interface to the application,
+with its database dependency pointed at ``--async-database-url``. Tables
+are created if needed, and the rows created by each run are kept.
+
+Usage:
+    python benchmark_bulk.py --rows 5000
+    python benchmark_bulk.py --async-database-url sqlite+aiosqlite:///bench.db \\
+        --chunk-size 1000
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, AsyncGenerator, Dict, List, NamedTuple, Optional
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.deps import get_db
+from app.database.base import Base
+from app.main import app
+
+
+class Result(NamedTuple):
+    """Outcome of a benchmark run."""
+    path: str
+    rows: int
+    errors: int
+    seconds: float
+    
+    @property
+    def throughput(self) -> float:
+        """Rows created per second."""
+        return self.rows / self.seconds
+
+
+def _plans(count: int) -> List[Dict[str, Any]]:
+    return [
+        {"title": f"Plan {i}", "description": "Benchmark plan", "price": 10, "btnMessage": "Buy"}
+        for i in range(count)
+    ]
+
+
+async def run_per_row(http: httpx.AsyncClient, rows: int) -> Result:
+    """
+    Create plans with one request each.
+    
+    Args:
+        http: Client of the application
+        rows: Number of plans to create
+        
+    Returns:
+        Throughput of the run
+    """
+    errors = 0
+    started = time.perf_counter()
+    for plan in _plans(rows):
+        response = await http.post("/api/plans/", json=plan)
+        if response.status_code != 201:
+            errors += 1
+    return Result("/api/plans/", rows, errors, time.perf_counter() - started)
+
+
+async def run_bulk(http: httpx.AsyncClient, rows: int) -> Result:
+    """
+    Create plans with bulk requests of at most ``BULK_MAX_ITEMS`` plans.
+    
+    Args:
+        http: Client of the application
+        rows: Number of plans to create
+        
+    Returns:
+        Throughput of the run
+    """
+    errors = 0
+    plans = _plans(rows)
+    started = time.perf_counter()
+    for start in range(0, rows, settings.BULK_MAX_ITEMS):
+        payload = plans[start:start + settings.BULK_MAX_ITEMS]
+        response = await http.post("/api/plans/bulk", json=payload)
+        if response.status_code != 201:
+            errors += len(payload)
+    return Result("/api/plans/bulk", rows, errors, time.perf_counter() - started)
+
+
+async def benchmark(async_engine: AsyncEngine, *, rows: int = 5000) -> List[Result]:
+    """
+    Run the benchmark against both paths.
+    
+    Args:
+        async_engine: Async engine of the benchmark database
+        rows: Plans created by each path
+        
+    Returns:
+        Result of each path
+    """
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    
+    async def bench_db() -> AsyncGenerator[Any, None]:
+        async with sessions() as db:
+            yield db
+    
+    app.dependency_overrides[get_db] = bench_db
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            return [await run_per_row(http, rows), await run_bulk(http, rows)]
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        await async_engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Parse the command line and run the benchmark.
+    
+    Args:
+        argv: Command line arguments, sys.argv by default
+    """
+    parser = argparse.ArgumentParser(description="Compare per-row and bulk creates.")
+    parser.add_argument("--rows", type=int, default=5000, help="plans created by each path")
+    parser.add_argument("--chunk-size", type=int, default=settings.BULK_CHUNK_SIZE, help="rows per insert")
+    parser.add_argument("--async-database-url", default=settings.ASYNC_DATABASE_URL, help="async database URL")
+    args = parser.parse_args(argv)
+    
+    settings.BULK_CHUNK_SIZE = args.chunk_size
+    results = asyncio.run(benchmark(create_async_engine(args.async_database_url), rows=args.rows))
+    print(f"{'path':<18}{'rows/s':>10}{'seconds':>10}{'errors':>8}")
+    for result in results:
+        print(
+            f"{result.path:<18}{result.throughput:>10.0f}{result.seconds:>10.2f}"
+            f"{result.errors:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,7 @@ from app.models.plan import Plan
 from app.models.type import Type  # This must be imported after Image due to FK dependency
 from app.models.processing_info import ProcessingInfo
 from app.models.solutions_data import SolutionsData  # This must be imported after Image due to FK dependency
+from app.models.idempotency_key import IdempotencyKey
 
 from app.core.config import settings
 
@@ -0,0 +1,296 @@
+"""
+Script to export static snapshots of the API.
+
+This script renders every GET document served by the routers registered in
+``app/main.py`` to JSON files that a CDN or nginx can serve directly: list
+pages, every detail document and the configured bundles. Each file gets a
+precompressed ``.gz`` copy, and ``manifest.json`` records its SHA-256 hash.
+
+Re-exports are incremental: the manifest also records a fingerprint of the
+rows behind each file, and only files whose rows changed are rendered again.
+Files whose rows were deleted are removed.
+
+Usage:
+    python export_static.py --out static
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import os
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, select
+
+from app.api.endpoints.bundle import VIEWS
+from app.api.routing import iter_routes, route_tables
+from app.core.config import settings
+from app.database.base import Base
+from app.database.session import engine as default_engine
+from app.main import app
+
+MANIFEST = "manifest.json"
+
+
+class Document(NamedTuple):
+    """A GET document to export."""
+    path: str
+    url: str
+    fingerprint: str
+
+
+class RowIndex:
+    """
+    Rows of the exported tables, read once per export.
+    """
+    
+    def __init__(self, engine: Engine):
+        """
+        Initialize the index.
+        
+        Args:
+            engine: Engine of the exported database
+        """
+        self.engine = engine
+        self._rows: Dict[str, Dict[Any, Any]] = {}
+    
+    def rows(self, table_name: str) -> Dict[Any, Any]:
+        """
+        Get every row of a table.
+        
+        Args:
+            table_name: Name of the table
+            
+        Returns:
+            Mapping of primary key to row, in primary key order
+        """
+        if table_name not in self._rows:
+            table = Base.metadata.tables[table_name]
+            with self.engine.connect() as conn:
+                result = conn.execute(select(table).order_by(table.c.id))
+                self._rows[table_name] = {row.id: row for row in result}
+        return self._rows[table_name]
+    
+    def row_digest(self, table_name: str, key: Any) -> Optional[str]:
+        """
+        Digest one row.
+        
+        Args:
+            table_name: Name of the table
+            key: Primary key of the row
+            
+        Returns:
+            Digest of the row's values, None if the row does not exist
+        """
+        row = self.rows(table_name).get(key)
+        return None if row is None else _digest(repr(tuple(row)))
+    
+    def tables_fingerprint(self, table_names: Iterable[str]) -> str:
+        """
+        Fingerprint every row of the given tables.
+        
+        Args:
+            table_names: Names of the tables
+            
+        Returns:
+            Digest changing whenever a row of the tables changes
+        """
+        parts = [
+            f"{name}:{key}={self.row_digest(name, key)}"
+            for name in sorted(set(table_names))
+            for key in self.rows(name)
+        ]
+        return _digest("\n".join(parts))
+    
+    def row_fingerprint(self, table_name: str, key: Any) -> str:
+        """
+        Fingerprint a row together with the rows its foreign keys reference.
+        
+        Args:
+            table_name: Name of the table
+            key: Primary key of the row
+            
+        Returns:
+            Digest changing whenever the row or a referenced row changes
+        """
+        row = self.rows(table_name)[key]
+        parts = [f"{table_name}:{key}={self.row_digest(table_name, key)}"]
+        for fk in Base.metadata.tables[table_name].foreign_keys:
+            target, value = fk.column.table.name, getattr(row, fk.parent.name)
+            parts.append(f"{target}:{value}={self.row_digest(target, value)}")
+        return _digest("\n".join(parts))
+
+
+def iter_documents(index: RowIndex, page_size: int) -> Iterator[Document]:
+    """
+    List the documents served by the GET routes of the API.
+    
+    Routes requiring query parameters are skipped since they have no
+    canonical document, and so are the streaming table exports.
+    
+    Args:
+        index: Rows of the exported tables
+        page_size: Number of records per exported list page
+        
+    Yields:
+        Documents to export
+    """
+    for path, route in iter_routes(app.routes):
+        if (
+            "GET" not in route.methods
+            or not path.startswith(settings.API_V1_STR)
+            or any(param.field_info.is_required() for param in route.dependant.query_params)
+            or route.response_class is StreamingResponse
+        ):
+            continue
+        directory = path.rstrip("/").split("/{", 1)[0].lstrip("/")
+        tables = route_tables(route)
+        path_params = route.dependant.path_params
+        if not path_params and tables:
+            yield from _list_pages(path, route, directory, tables, index, page_size)
+        elif len(path_params) == 1 and path_params[0].name == "bundle_name":
+            for name, views in settings.BUNDLES.items():
+                bundle_tables = [table for view in views for table in VIEWS[view].tables]
+                url = path.replace("{bundle_name}", name)
+                fingerprint = index.tables_fingerprint(bundle_tables)
+                yield Document(f"{directory}/{name}.json", url, fingerprint)
+        elif len(path_params) == 1 and tables:
+            placeholder = "{" + path_params[0].name + "}"
+            for key in index.rows(tables[0]):
+                url = path.replace(placeholder, str(key))
+                yield Document(
+                    f"{directory}/{key}.json", url, index.row_fingerprint(tables[0], key)
+                )
+
+
+def _list_pages(
+    path: str,
+    route: APIRoute,
+    directory: str,
+    tables: Iterable[str],
+    index: RowIndex,
+    page_size: int,
+) -> Iterator[Document]:
+    """Yield the default list document and one document per page."""
+    fingerprint = index.tables_fingerprint(tables)
+    yield Document(f"{directory}/index.json", path, fingerprint)
+    query_params = {param.name for param in route.dependant.query_params}
+    if not {"skip", "limit"} <= query_params:
+        return
+    pages = max(1, math.ceil(len(index.rows(tables[0])) / page_size))
+    for page in range(pages):
+        url = f"{path}?skip={page * page_size}&limit={page_size}"
+        yield Document(f"{directory}/page-{page + 1}.json", url, fingerprint)
+
+
+def export(
+    out_dir: str,
+    *,
+    full: bool = False,
+    page_size: int = 100,
+    engine: Optional[Engine] = None,
+    client: Optional[TestClient] = None,
+) -> Dict[str, int]:
+    """
+    Export the API to static files.
+    
+    Args:
+        out_dir: Directory receiving the files and the manifest
+        full: Render every document even if its rows did not change
+        page_size: Number of records per exported list page
+        engine: Engine of the exported database, the application's by default
+        client: Client rendering the documents, one wrapping the app by default
+        
+    Returns:
+        Number of files written, unchanged and removed
+    """
+    engine = engine or default_engine
+    client = client or TestClient(app)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    previous: Dict[str, Dict[str, Any]] = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous = json.load(f)["files"]
+    
+    files: Dict[str, Dict[str, Any]] = {}
+    stats = {"written": 0, "unchanged": 0, "removed": 0}
+    for document in iter_documents(RowIndex(engine), page_size):
+        entry = previous.get(document.path)
+        target = os.path.join(out_dir, document.path)
+        if (
+            not full
+            and entry is not None
+            and entry["fingerprint"] == document.fingerprint
+            and os.path.exists(target)
+        ):
+            files[document.path] = entry
+            stats["unchanged"] += 1
+            continue
+        response = client.get(document.url)
+        if response.status_code != 200:
+            print(f"Skipping {document.url}: HTTP {response.status_code}")
+            continue
+        body = response.content
+        sha256 = hashlib.sha256(body).hexdigest()
+        if entry is None or entry["sha256"] != sha256 or not os.path.exists(target):
+            _write(target, body)
+            _write(target + ".gz", gzip.compress(body, mtime=0))
+            stats["written"] += 1
+        else:
+            stats["unchanged"] += 1
+        files[document.path] = {
+            "sha256": sha256,
+            "size": len(body),
+            "fingerprint": document.fingerprint,
+        }
+    
+    for path in set(previous) - set(files):
+        for name in (path, path + ".gz"):
+            target = os.path.join(out_dir, name)
+            if os.path.exists(target):
+                os.remove(target)
+        stats["removed"] += 1
+    
+    manifest = json.dumps({"files": dict(sorted(files.items()))}, indent=2)
+    _write(manifest_path, manifest.encode())
+    return stats
+
+
+def _write(path: str, data: bytes) -> None:
+    """Atomically replace a file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _digest(data: str) -> str:
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Parse the command line and run the export.
+    
+    Args:
+        argv: Command line arguments, sys.argv by default
+    """
+    parser = argparse.ArgumentParser(description="Export static snapshots of the API.")
+    parser.add_argument("--out", default="static", help="output directory")
+    parser.add_argument("--full", action="store_true", help="render every document again")
+    parser.add_argument("--page-size", type=int, default=100, help="records per list page")
+    args = parser.parse_args(argv)
+    stats = export(args.out, full=args.full, page_size=args.page_size)
+    print(
+        f"Exported to {args.out}: {stats['written']} written, "
+        f"{stats['unchanged']} unchanged, {stats['removed']} removed"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Script to sync a table with a content file.
+
+This script makes a table hold exactly the records of a JSON, NDJSON or CSV
+file, in the formats written by the export endpoints. Records are matched to
+rows by the natural key of the model, or by the ``id`` of each record for
+models without one, and only the differences are written: new records are
+inserted, changed ones updated and rows missing from the file deleted, by
+chunks of ``BULK_CHUNK_SIZE`` rows each committed in its own transaction.
+Every record is validated before anything is written.
+
+The table may be named by table or model name, for any model registered in
+``app/database/base_class.py``.
+
+Usage:
+    python sync.py types content/types.json
+    python sync.py faqs content/faqs.csv --dry-run
+    python sync.py Plan plans.ndjson --keep-missing
+"""
+import argparse
+import asyncio
+import csv
+import importlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple, Type, get_args, get_origin
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.crud.base import CRUDBase, SyncResult
+from app.database.base_class import Base
+
+
+def find_crud(name: str) -> CRUDBase:
+    """
+    Get the CRUD object of a model.
+    
+    Args:
+        name: Table name or model class name
+        
+    Returns:
+        CRUD object defined in the ``app.crud`` module of the model
+        
+    Raises:
+        SystemExit: If no registered model has that name, or it has no CRUD object
+    """
+    for mapper in Base.registry.mappers:
+        model = mapper.class_
+        if name in (model.__tablename__, model.__name__):
+            crud_module = model.__module__.replace("app.models.", "app.crud.")
+            try:
+                module = importlib.import_module(crud_module)
+            except ModuleNotFoundError as exc:
+                if exc.name != crud_module:
+                    raise
+                raise SystemExit(f"{name} has no CRUD object and cannot be synced")
+            crud = next(
+                (
+                    obj for obj in vars(module).values()
+                    if isinstance(obj, CRUDBase) and obj.model is model
+                ),
+                None,
+            )
+            if crud is None:
+                raise SystemExit(f"{name} has no CRUD object and cannot be synced")
+            return crud
+    raise SystemExit(f"Unknown model {name}")
+
+
+def create_schema(crud: CRUDBase) -> Type[BaseModel]:
+    """Get the schema a CRUD object creates records from."""
+    for base in getattr(type(crud), "__orig_bases__", ()):
+        if get_origin(base) is CRUDBase:
+            return get_args(base)[1]
+    raise SystemExit(f"{type(crud).__name__} does not declare its schemas")
+
+
+def load_records(path: str, schema: Type[BaseModel]) -> List[Dict[str, Any]]:
+    """
+    Read the records of a content file.
+    
+    ``.json`` files hold an array of objects and ``.ndjson`` or ``.jsonl``
+    files one object per line. ``.csv`` files have a header row; empty cells
+    are null, and lists and objects are written as JSON.
+    
+    Args:
+        path: Path of the file
+        schema: Schema of the records, telling which CSV cells hold JSON
+        
+    Returns:
+        Records, as read
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="" if extension == ".csv" else None, encoding="utf-8") as file:
+        if extension == ".json":
+            return json.load(file)
+        if extension in (".ndjson", ".jsonl"):
+            return [json.loads(line) for line in file if line.strip()]
+        if extension == ".csv":
+            nested = _json_fields(schema)
+            return [
+                {
+                    name: None if cell == "" else json.loads(cell) if name in nested else cell
+                    for name, cell in row.items()
+                }
+                for row in csv.DictReader(file)
+            ]
+    raise SystemExit(f"Unsupported file type {extension}")
+
+
+def validate(
+    crud: CRUDBase, schema: Type[BaseModel], records: List[Dict[str, Any]]
+) -> Tuple[List[BaseModel], Optional[List[int]]]:
+    """
+    Validate records, and read their ids if the model has no natural key.
+    
+    Args:
+        crud: CRUD object of the model
+        schema: Schema to validate records with
+        records: Records, as read
+        
+    Returns:
+        Validated records, and their ids or None
+        
+    Raises:
+        SystemExit: If a record is invalid
+    """
+    objs_in = []
+    for index, record in enumerate(records, start=1):
+        try:
+            objs_in.append(schema.model_validate(record))
+        except ValidationError as exc:
+            raise SystemExit(f"Record {index} is invalid: {exc}")
+    if crud.natural_key is not None:
+        return objs_in, None
+    try:
+        return objs_in, [int(record["id"]) for record in records]
+    except (KeyError, TypeError, ValueError):
+        raise SystemExit(f"{crud.model.__name__} has no natural key; every record needs an id")
+
+
+async def sync(
+    crud: CRUDBase,
+    objs_in: List[BaseModel],
+    ids: Optional[List[int]],
+    *,
+    database_url: str,
+    delete_missing: bool = True,
+    dry_run: bool = False,
+) -> SyncResult:
+    """
+    Sync the table of a CRUD object with records.
+    
+    Args:
+        crud: CRUD object of the model
+        objs_in: Validated records
+        ids: ID of each record, for models without a natural key
+        database_url: Async database URL
+        delete_missing: Whether to delete rows missing from the records
+        dry_run: Whether to only count the changes
+        
+    Returns:
+        Number of records created, updated, deleted and left unchanged
+    """
+    engine = create_async_engine(database_url)
+    sessions = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    try:
+        async with sessions() as db:
+            return await crud.sync(
+                db, objs_in, ids=ids, delete_missing=delete_missing, dry_run=dry_run
+            )
+    finally:
+        await engine.dispose()
+
+
+def _json_fields(schema: Type[BaseModel]) -> Set[str]:
+    """Names of the schema fields holding lists or objects."""
+    names = set()
+    for name, field in schema.model_fields.items():
+        for annotation in (field.annotation, *get_args(field.annotation)):
+            if annotation in (list, dict) or get_origin(annotation) in (list, dict):
+                names.add(name)
+    return names
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Parse the command line and run the sync.
+    
+    Args:
+        argv: Command line arguments, sys.argv by default
+    """
+    parser = argparse.ArgumentParser(description="Sync a table with a content file.")
+    parser.add_argument("model", help="table or model name, e.g. types or Type")
+    parser.add_argument("path", help="JSON, NDJSON or CSV file")
+    parser.add_argument("--dry-run", action="store_true", help="report the changes without writing them")
+    parser.add_argument("--keep-missing", action="store_true", help="keep rows missing from the file")
+    parser.add_argument("--chunk-size", type=int, default=settings.BULK_CHUNK_SIZE, help="rows per transaction")
+    parser.add_argument("--async-database-url", default=settings.ASYNC_DATABASE_URL, help="async database URL")
+    args = parser.parse_args(argv)
+    
+    started = time.perf_counter()
+    crud = find_crud(args.model)
+    schema = create_schema(crud)
+    objs_in, ids = validate(crud, schema, load_records(args.path, schema))
+    settings.BULK_CHUNK_SIZE = args.chunk_size
+    try:
+        result = asyncio.run(
+            sync(
+                crud,
+                objs_in,
+                ids,
+                database_url=args.async_database_url,
+                delete_missing=not args.keep_missing,
+                dry_run=args.dry_run,
+            )
+        )
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    seconds = time.perf_counter() - started
+    
+    verb = "Would write" if args.dry_run else "Wrote"
+    print(
+        f"{verb} {crud.model.__tablename__}: {result.created} created, {result.updated} updated, "
+        f"{result.deleted} deleted, {result.unchanged} unchanged"
+    )
+    print(f"{len(objs_in)} records in {seconds:.2f}s ({len(objs_in) / seconds:.0f} records/s)")
+
+
+if __name__ == "__main__":
+    main()